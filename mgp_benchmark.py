@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 21:40:00 2026
+
+@mcarlisle
+
+# Benchmarks of the hot paths on synthetic MGP tables (see mgp_synthetic),
+# at several scales, written as JSON to compare commits:
+#     python mgp_benchmark.py [--scales 10000 100000 1000000] [--repeat 3]
+#     python mgp_benchmark.py --compare benchmarks/<old>.json benchmarks/<new>.json
+# Each scale's tables replace the MGP tables in mgp_data (and in a
+# temporary degree store), then each stage is timed `repeat` times:
+#     put_data_under_year_ranges, bin_schools_by_time_frame, aggs,
+#     build_lineage (of the busiest advisor), generate_mgp_map (one frame)
+#     and msc_classify_string (of a forest trained on the synthetic titles).
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+import argparse
+import contextlib
+import io
+import json
+import numpy as np
+import os
+import pandas as pd
+import pickle
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import mgp_store
+import msc_service
+from mgp_data import mgp_data
+from mgp_functions import build_lineage, build_year_ranges, bin_schools_by_time_frame, \
+                          generate_mgp_map, put_data_under_year_ranges
+from mgp_map import aggs
+from mgp_metrics import configure
+from mgp_synthetic import generate_mgp_tables, set_mgp_tables
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+benchmark_folder = "benchmarks"
+default_scales = [10000, 100000, 1000000]
+
+# the year ranges of the aggregate maps (as in mgp_map)
+benchmark_year_ranges = dict(first=1290, last=2019, inc=9, over=10)
+
+# titles classified one by one in the msc_classify_string stage
+classify_titles = 200
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" git_commit:
+    input:  None
+    output: the commit hash of the working tree of this file (with "-dirty"
+            if it has changes), or None outside git.
+"""
+def git_commit():
+    repo = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True,
+                                text=True, check=True, cwd=repo).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, check=True, cwd=repo).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+""" time_stage:
+    input:  function: the stage, called with no arguments
+            repeat: number of timed calls
+    output: (seconds, result): the wall time of each call, and the result
+            of the last one. The stage's printing is swallowed.
+"""
+def time_stage(function, repeat=3):
+    seconds, result = [], None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = function()
+            seconds.append(time.perf_counter() - start)
+    return seconds, result
+
+
+""" train_synthetic_classifier:
+    input:  degree: a synthetic degree table
+            filename: where to pickle the pipeline
+            n_titles: most titles to train on
+    output: None. filename holds a CountVectorizer + RandomForest pipeline
+            like count_rf_20190729.pickle, trained on the titled, classified degrees.
+"""
+def train_synthetic_classifier(degree, filename, n_titles=20000):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.pipeline import Pipeline
+    known = degree[(degree['msc'] > -1) & (degree['thesis'] != "")].head(n_titles)
+    pipe = Pipeline([('count', CountVectorizer(stop_words='english')),
+                     ('rf', RandomForestClassifier(n_estimators=50, random_state=42))])
+    pipe.fit(list(known['thesis']), known['msc'].to_numpy())
+    with open(filename, "wb") as f:
+        pickle.dump(pipe, f)
+
+
+""" benchmark_scale:
+    input:  n_degrees: scale of the synthetic tables
+            repeat: timed calls per stage
+            folder: scratch folder (degree store, map frame, model)
+            seed: seed of the synthetic tables
+    output: list of dicts, one per stage: 'scale', 'stage', 'rows', 'seconds'
+            (every call), 'best' and 'median' (seconds), or 'error' if the
+            stage could not run here.
+"""
+def benchmark_scale(n_degrees, repeat=3, folder=".", seed=0):
+    results = []
+
+    def record(stage, rows, seconds):
+        results.append({'scale': n_degrees, 'stage': stage, 'rows': int(rows),
+                        'seconds': seconds, 'best': min(seconds),
+                        'median': float(np.median(seconds))})
+
+    def run(stage, function, rows=None):
+        try:
+            seconds, result = time_stage(function, repeat)
+        except Exception as error:
+            results.append({'scale': n_degrees, 'stage': stage,
+                            'error': f"{type(error).__name__}: {error}"})
+            return None
+        record(stage, rows(result) if rows is not None else 0, seconds)
+        return result
+
+    start = time.perf_counter()
+    tables = generate_mgp_tables(n_degrees, seed=seed)
+    record('generate', len(tables['degree']), [time.perf_counter() - start])
+    set_mgp_tables(tables)
+
+    db_file = os.path.join(folder, f"mgp_store_{n_degrees}.sqlite")
+    start = time.perf_counter()
+    mgp_store.build_store({name: tables[name] for name in mgp_store.store_tables}, db_file)
+    record('build_store', len(tables['degree']), [time.perf_counter() - start])
+
+    with mgp_store.use_store(db_file):
+        degree_with_year = mgp_data.degree_with_year
+        year_ranges = build_year_ranges(**benchmark_year_ranges)
+        binned_degrees = run('put_data_under_year_ranges',
+                             lambda: put_data_under_year_ranges(degree_with_year['degree_id'],
+                                                                degree_with_year['year'],
+                                                                year_ranges),
+                             lambda binned: sum(len(v) for v in binned.values()))
+        if binned_degrees is not None:
+            run('bin_schools_by_time_frame', lambda: bin_schools_by_time_frame(binned_degrees),
+                lambda binned: sum(len(v) for v in binned.values()))
+        aggregate = run('aggs', lambda: aggs(degree_with_year), lambda agg: len(degree_with_year))
+
+        busiest = int(tables['advises']['advisor'].value_counts().index[0])
+        run('build_lineage', lambda: build_lineage(busiest), len)
+
+        if aggregate is not None:
+            last = list(aggregate.keys())[-1]
+            frame = {last: aggregate[last]}
+            run('generate_mgp_map', lambda: generate_mgp_map(frame, folder=folder + os.sep,
+                                                             fileprefix=f"benchmark_{n_degrees}",
+                                                             max_size=3000, processes=1),
+                lambda files: len(frame[last]))
+
+        model_file = os.path.join(folder, f"count_rf_{n_degrees}.pickle")
+        titled = tables['degree'][tables['degree']['thesis'] != ""]
+        titles = list(titled['thesis'].drop_duplicates().sample(
+            min(classify_titles * repeat, titled['thesis'].nunique()), random_state=seed))
+
+        def classify():
+            from what_msc_are_you import msc_classify_string
+            batch = [titles.pop() for _ in range(min(classify_titles, len(titles)))]
+            return [msc_classify_string(t) for t in batch]
+
+        try:
+            train_synthetic_classifier(tables['degree'], model_file)
+            msc_service.get_classifier(model_file)
+            run('msc_classify_string', classify, len)
+        except Exception as error:
+            results.append({'scale': n_degrees, 'stage': 'msc_classify_string',
+                            'error': f"{type(error).__name__}: {error}"})
+    return results
+
+
+""" run_benchmarks:
+    input:  scales: numbers of degrees to benchmark at
+            repeat: timed calls per stage
+            output: JSON file to write (default: benchmarks/<commit>.json)
+            seed: seed of the synthetic tables
+    output: the report: a dict with 'commit', 'created', 'python', 'numpy',
+            'pandas', 'platform', 'repeat' and 'results' (see benchmark_scale),
+            also written to output.
+"""
+def run_benchmarks(scales=default_scales, repeat=3, output=None, seed=0):
+    commit = git_commit()
+    report = {'commit': commit,
+              'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+              'python': platform.python_version(),
+              'numpy': np.__version__,
+              'pandas': pd.__version__,
+              'platform': platform.platform(),
+              'repeat': repeat,
+              'results': []}
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            for n_degrees in scales:
+                results = benchmark_scale(n_degrees, repeat, folder, seed)
+                report['results'].extend(results)
+                for r in results:
+                    timing = f"{r['best']:.4f}s" if 'best' in r else r['error']
+                    print(f"{n_degrees:>9} {r['stage']:<28} {timing}", file=sys.stderr)
+    finally:
+        mgp_data.clear()
+        msc_service.classifier = None
+
+    if output is None:
+        os.makedirs(benchmark_folder, exist_ok=True)
+        output = os.path.join(benchmark_folder, f"{commit or 'nocommit'}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=1)
+    return report
+
+
+""" compare_benchmarks:
+    input:  old, new: two benchmark JSON files (or their reports)
+    output: pd.DataFrame with one row per (scale, stage) in both:
+            the best seconds of each and the ratio new / old.
+"""
+def compare_benchmarks(old, new):
+    def best(report):
+        if isinstance(report, str):
+            with open(report, "r") as f:
+                report = json.load(f)
+        rows = [r for r in report['results'] if 'best' in r]
+        return pd.DataFrame(rows, columns=['scale', 'stage', 'best'])
+    both = best(old).merge(best(new), on=['scale', 'stage'], suffixes=('_old', '_new'))
+    both['ratio'] = both['best_new'] / both['best_old']
+    return both
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ------------
+#  BEGIN MAIN
+# ------------
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark the MGP hot paths on synthetic data.")
+    parser.add_argument("--scales", type=int, nargs="+", default=default_scales)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+    configure(progress="none")
+    if args.compare is not None:
+        print(compare_benchmarks(*args.compare).to_string(index=False))
+    else:
+        run_benchmarks(args.scales, args.repeat, args.output, args.seed)
+
+# ------------
+#   END  MAIN
+# ------------
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 13:40:00 2026
+
+@mcarlisle
+
+# A columnar storage format for the MGP tables.
+# Each table is a folder with one .npy file per numeric column
+# (memory-mapped on load, so parallel processes share the pages)
+# and one UTF-8 string heap plus .npy offsets per text column,
+# described by a manifest.json.
+# Optionally, tables can be written as Arrow/Parquet instead (needs pyarrow).
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+import json
+import numpy as np
+import os
+import pandas as pd
+import pickle
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+columnar_folder = "mgp_columnar"
+columnar_tables = ["academic", "advises", "degree", "degree_grant", "school"]
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" write_string_column:
+    input:  path: file prefix for the column
+            values: list-like of str (or None/NaN for missing)
+    output: None. Writes <path>.heap (all strings, UTF-8, back to back),
+            <path>.offsets.npy (n+1 byte offsets into the heap) and
+            <path>.missing.npy (True where values had no string).
+"""
+def write_string_column(path, values):
+    missing = np.array([not isinstance(v, str) for v in values], dtype=bool)
+    encoded = [v.encode('utf-8') if isinstance(v, str) else b"" for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    with open(f"{path}.heap", "wb") as f:
+        f.write(b"".join(encoded))
+    np.save(f"{path}.offsets.npy", offsets)
+    np.save(f"{path}.missing.npy", missing)
+
+
+""" read_string_column:
+    input:  path: file prefix for the column (see write_string_column)
+    output: np.array (dtype object) of the strings, None where missing.
+"""
+def read_string_column(path):
+    offsets = np.load(f"{path}.offsets.npy", mmap_mode='r')
+    missing = np.load(f"{path}.missing.npy", mmap_mode='r')
+    with open(f"{path}.heap", "rb") as f:
+        heap = f.read()
+    values = np.empty(len(offsets) - 1, dtype=object)
+    values[:] = [heap[a:b].decode('utf-8') for a, b in zip(offsets[:-1].tolist(),
+                                                           offsets[1:].tolist())]
+    values[missing] = None
+    return values
+
+
+""" column_kind:
+    input:  column: a pd.Series
+    output: 'numeric' for numbers and booleans (stored as .npy),
+            'string' for text, 'json' for anything else (dicts, lists),
+            which is stored as JSON text.
+"""
+def column_kind(column):
+    if column.dtype.kind in 'biuf':
+        return 'numeric'
+    present = column.dropna()
+    if present.map(lambda x: isinstance(x, str)).all():
+        return 'string'
+    return 'json'
+
+
+""" export_table:
+    input:  df: a pd.DataFrame
+            name: table name
+            folder: root folder of the columnar store
+    output: None. Writes folder/name/ with one file (or heap) per column
+            and a manifest.json listing the columns, their kinds and dtypes.
+"""
+def export_table(df, name, folder=columnar_folder):
+    table_folder = os.path.join(folder, name)
+    os.makedirs(table_folder, exist_ok=True)
+    manifest = {'name': name, 'rows': len(df), 'columns': []}
+    for c in df.columns:
+        path = os.path.join(table_folder, str(c))
+        kind = column_kind(df[c])
+        if kind == 'numeric':
+            values = np.ascontiguousarray(df[c].to_numpy())
+            np.save(f"{path}.npy", values)
+            manifest['columns'].append({'name': c, 'kind': kind, 'dtype': values.dtype.str})
+        elif kind == 'string':
+            write_string_column(path, df[c].tolist())
+            manifest['columns'].append({'name': c, 'kind': kind})
+        else:
+            write_string_column(path, [json.dumps(v) for v in df[c].tolist()])
+            manifest['columns'].append({'name': c, 'kind': kind})
+    with open(os.path.join(table_folder, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=1)
+
+
+""" has_table:
+    input:  name: table name
+            folder: root folder of the columnar store
+    output: True if folder holds table name, in either format.
+"""
+def has_table(name, folder=columnar_folder):
+    return os.path.exists(os.path.join(folder, name, "manifest.json")) or \
+           os.path.exists(os.path.join(folder, f"{name}.parquet"))
+
+
+""" load_column:
+    input:  name: table name
+            column: column name
+            folder: root folder of the columnar store
+            mmap: boolean: if True, memory-map numeric columns (read-only)
+    output: np.array of the column (a np.memmap for numeric columns if mmap).
+"""
+def load_column(name, column, folder=columnar_folder, mmap=True):
+    table_folder = os.path.join(folder, name)
+    with open(os.path.join(table_folder, "manifest.json"), "r") as f:
+        manifest = json.load(f)
+    kinds = {c['name']: c['kind'] for c in manifest['columns']}
+    assert column in kinds, f"load_column: {name} has no column {column}"
+    path = os.path.join(table_folder, str(column))
+    if kinds[column] == 'numeric':
+        return np.load(f"{path}.npy", mmap_mode='r' if mmap else None)
+    values = read_string_column(path)
+    if kinds[column] == 'json':
+        values[:] = [None if v is None else json.loads(v) for v in values]
+    return values
+
+
+""" load_table:
+    input:  name: table name
+            folder: root folder of the columnar store
+            mmap: boolean: if True, numeric columns are memory-mapped
+                  (read-only) and shared between processes
+    output: the pd.DataFrame, with the columns in their original order.
+"""
+def load_table(name, folder=columnar_folder, mmap=True):
+    parquet_file = os.path.join(folder, f"{name}.parquet")
+    if os.path.exists(parquet_file):
+        return pd.read_parquet(parquet_file)
+
+    with open(os.path.join(folder, name, "manifest.json"), "r") as f:
+        manifest = json.load(f)
+    columns = dict()
+    for c in manifest['columns']:
+        columns[c['name']] = load_column(name, c['name'], folder, mmap)
+    # copy=False keeps the memory-mapped arrays instead of copying them
+    return pd.DataFrame(columns, copy=False)
+
+
+""" export_parquet:
+    input:  df, name, folder: as in export_table
+    output: None. Writes folder/name.parquet (requires pyarrow);
+            dict/list columns are written as JSON text.
+"""
+def export_parquet(df, name, folder=columnar_folder):
+    os.makedirs(folder, exist_ok=True)
+    df = df.copy()
+    for c in df.columns:
+        if df[c].dtype == object and column_kind(df[c]) == 'json':
+            df[c] = [json.dumps(v) for v in df[c].tolist()]
+    df.to_parquet(os.path.join(folder, f"{name}.parquet"), index=False)
+
+
+""" convert_pickles:
+    input:  source: folder holding <table>.pickle for each of columnar_tables
+            folder: root folder of the columnar store to write
+            fmt: 'npy' (memory-mappable, default) or 'parquet'
+    output: None. Every pickled table found in source is written to folder.
+"""
+def convert_pickles(source=".", folder=columnar_folder, fmt='npy'):
+    for name in columnar_tables:
+        pickle_file = os.path.join(source, f"{name}.pickle")
+        if not os.path.exists(pickle_file):
+            print(f"convert_pickles: no {pickle_file}, skipping.")
+            continue
+        with open(pickle_file, "rb") as f:
+            df = pickle.load(f)
+        if fmt == 'parquet':
+            export_parquet(df, name, folder)
+        else:
+            export_table(df, name, folder)
+        print(f"convert_pickles: {name}: {len(df)} rows.")
+
+
+""" convert_geneal_dump:
+    input:  dump_folder: a raw MGP dump, e.g. './MGP_official/geneal_20190711'
+            folder: root folder of the columnar store to write
+            fmt: 'npy' (memory-mappable, default) or 'parquet'
+    output: None. Every <table>.tsv of columnar_tables found in dump_folder
+            is written to folder; degree comes from degree.tsv, or degree.csv,
+            with missing msc/year as -1 and missing text as "" (as in notebook 0).
+
+    note: this is a plain read of the dump; malformed degree rows need
+          the repairs of notebook 0 first.
+"""
+def convert_geneal_dump(dump_folder, folder=columnar_folder, fmt='npy'):
+    for name in columnar_tables:
+        tsv_file = os.path.join(dump_folder, f"{name}.tsv")
+        csv_file = os.path.join(dump_folder, f"{name}.csv")
+        if os.path.exists(tsv_file):
+            df = pd.read_csv(tsv_file, sep='\t')
+        elif os.path.exists(csv_file):
+            df = pd.read_csv(csv_file)
+        else:
+            print(f"convert_geneal_dump: no {name} in {dump_folder}, skipping.")
+            continue
+        if name == 'degree':
+            for c in ['msc', 'year']:
+                df[c] = df[c].fillna(-1).astype('int64')
+            for c in ['thesis', 'degree_type']:
+                df[c] = df[c].fillna("")
+        if fmt == 'parquet':
+            export_parquet(df, name, folder)
+        else:
+            export_table(df, name, folder)
+        print(f"convert_geneal_dump: {name}: {len(df)} rows.")
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ------------
+#  BEGIN MAIN
+# ------------
+
+if __name__ == "__main__":
+
+    import sys
+    # python mgp_columnar.py                   converts the pickles in this folder
+    # python mgp_columnar.py geneal_YYYYMMDD   converts a raw MGP dump
+    if len(sys.argv) > 1:
+        convert_geneal_dump(sys.argv[1])
+    else:
+        convert_pickles()
+
+# ------------
+#   END  MAIN
+# ------------
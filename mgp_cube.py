@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 17:10:00 2026
+
+@mcarlisle
+
+# One sparse cube of degree counts over (year, country, school, msc),
+# built in a single pass over the degree tables, and a query API on it:
+# slicing, roll-ups (decade, century, continent, MSC group), top-k and
+# per-capita counts against cia_world_factbook_pop.tsv.
+# The separately pickled aggregates of the notebooks (msc_per_year_df,
+# msc_per_school_big_df, mtpcn_top25_df, pop_count_top25_df, ...)
+# are queries on the cube: see cube_recipes.
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+# https://gist.github.com/graydon/11198540
+from country_bounding_boxes import country_bounding_boxes
+import numpy as np
+import os
+import pandas as pd
+import pickle
+from mgp_data import mgp_data
+from mgp_spatial import school_countries
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+cube_file = "degree_cube.pickle"
+msc_names_file = "msc_2010.pickle"
+population_file = "cia_world_factbook_pop.tsv"
+
+# the cube's dimensions; missing values are -1 (year, school, msc) or "" (country)
+cube_dimensions = ['year', 'country', 'school', 'msc']
+
+# continents, by ISO 3166 alpha-2 code (the codes of country_bounding_boxes)
+continents = {
+    'Africa': "AO BI BJ BF BW CF CI CM CD CG DJ DZ EG ER ET GA GH GN GM GW GQ KE LR "
+              "LY LS MA MG ML MR MW MZ NA NE NG RW SD SS SN SL SO SZ TD TG TN TZ "
+              "UG ZA ZM ZW".split(),
+    'Asia': "AF AE AM AZ BD BN BT CN CY GE ID IN IR IQ IL JO JP KZ KG KH KR KW LA "
+            "LB LK MM MN MY NP OM PK PH KP PS QA SA SY TH TJ TM TL TR TW UZ VN "
+            "YE".split(),
+    'Europe': "AL AT BA BE BG BY CH CZ DE DK EE ES FI FR GB GR HR HU IE IS IT LT LU "
+              "LV MD ME MK NL NO PL PT RO RS RU SE SI SK UA".split(),
+    'North America': "BS BZ CA CR CU DO GL GT HN HT JM MX NI PA PR SV TT US".split(),
+    'South America': "AR BO BR CL CO EC FK GY PE PY SR UY VE".split(),
+    'Oceania': "AU FJ NC NZ PG SB VU".split(),
+    'Antarctica': "AQ TF".split(),
+}
+
+# top-level groups of the two-digit MSC 2010 codes: (first, last, name)
+msc_groups = [(0,  3,  "General, history, logic and foundations"),
+              (5,  22, "Discrete mathematics and algebra"),
+              (26, 49, "Analysis"),
+              (51, 58, "Geometry and topology"),
+              (60, 97, "Applied mathematics and other sciences")]
+
+# names of countries in the World Factbook where they differ from
+# country_bounding_boxes by more than spaces ("UnitedStates")
+factbook_names = {'BS': "Bahamas, The", 'BA': "Bosnia and Herzegovina",
+                  'CF': "Central African Republic", 'CI': "Cote d'Ivoire",
+                  'CD': "Congo, Democratic Republic of the",
+                  'CG': "Congo, Republic of the", 'CZ': "Czechia",
+                  'DO': "Dominican Republic", 'FK': "Falkland Islands (Islas Malvinas)",
+                  'GM': "Gambia, The", 'GW': "Guinea-Bissau", 'GQ': "Equatorial Guinea",
+                  'KR': "Korea, South", 'KP': "Korea, North", 'MM': "Burma",
+                  'SS': "South Sudan", 'SB': "Solomon Islands", 'SZ': "Eswatini",
+                  'TL': "Timor-Leste"}
+
+# dimensions that roll up a cube dimension: name -> (base, function of the base column)
+derived_dimensions = {
+    'decade':    ('year',    lambda year: np.where(year >= 0, year // 10 * 10, -1)),
+    'century':   ('year',    lambda year: np.where(year >= 0, year // 100 * 100, -1)),
+    'continent': ('country', lambda country: country.map(
+                                 {c: k for k, codes in continents.items() for c in codes}
+                             ).fillna("").to_numpy()),
+    'msc_group': ('msc',     lambda msc: np.select([(msc >= a) & (msc <= b) for a, b, _ in msc_groups],
+                                                   [name for _, _, name in msc_groups],
+                                                   "no classification given")),
+}
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" build_cube_cells:
+    input:  degree: the degree pd.DataFrame (default: mgp_data.degree)
+            degree_grant: the degree_grant pd.DataFrame (default: mgp_data.degree_grant)
+            countries: output of mgp_spatial.school_countries (default: computed)
+    output: a pd.DataFrame of the nonzero cells of the cube, with columns
+            'year', 'country', 'school', 'msc' (see cube_dimensions) and 'count'.
+            A degree counts at its first granting school (as in mgp_functions);
+            its country is that school's (see mgp_spatial.school_countries).
+"""
+def build_cube_cells(degree=None, degree_grant=None, countries=None):
+    degree = mgp_data.degree if degree is None else degree
+    degree_grant = mgp_data.degree_grant if degree_grant is None else degree_grant
+    countries = school_countries() if countries is None else countries
+
+    grants = degree_grant[['degree', 'school']].drop_duplicates('degree', keep='first')
+    school_of = pd.Series(grants['school'].to_numpy(), index=grants['degree'].to_numpy())
+    country_of = pd.Series(countries['country'].fillna("").to_numpy(),
+                           index=countries['school_id'].to_numpy())
+
+    school = school_of.reindex(degree['degree_id'].to_numpy()).fillna(-1).astype(np.int64)
+    country = country_of.reindex(school.to_numpy()).fillna("")
+    cells = pd.DataFrame({'year': degree['year'].to_numpy(dtype=np.int64),
+                          'country': country.to_numpy(),
+                          'school': school.to_numpy(),
+                          'msc': degree['msc'].to_numpy(dtype=np.int64)})
+    cells = cells.groupby(cube_dimensions, sort=True).size().reset_index(name='count')
+    return cells
+
+
+""" load_msc_names:
+    input:  filename: pickle of { msc code: name } (msc_2010.pickle)
+    output: the dict, loaded once per process and kept in mgp_data.
+"""
+def load_msc_names(filename=msc_names_file):
+    def load():
+        with open(os.path.join(mgp_data.folder, filename), "rb") as f:
+            return pickle.load(f)
+    return mgp_data.cached(('msc_names', filename), load)
+
+
+""" load_population:
+    input:  filename: the World Factbook population table
+            (rank, country, population; tab-separated, no header)
+    output: a pd.Series of populations indexed by ISO 3166 alpha-2 code,
+            for the countries of country_bounding_boxes found in filename.
+"""
+def load_population(filename=population_file):
+    def load():
+        factbook = pd.read_csv(os.path.join(mgp_data.folder, filename), sep='\t',
+                               header=None, names=['rank', 'country', 'population'])
+        by_name = dict(zip(factbook['country'].str.replace(" ", "").str.lower(),
+                           factbook['population']))
+        population = dict()
+        for code, (name, _) in country_bounding_boxes.items():
+            key = factbook_names.get(code, name).replace(" ", "").lower()
+            if key in by_name:
+                population[code] = by_name[key]
+        return pd.Series(population, name='population', dtype=np.int64)
+    return mgp_data.cached(('population', filename), load)
+
+
+""" get_cube:
+    input:  filename: a pickled cube to load (None: build from mgp_data)
+    output: the DegreeCube, built or loaded once and kept in mgp_data.
+"""
+def get_cube(filename=None):
+    def build():
+        if filename is not None and os.path.exists(filename):
+            with open(filename, "rb") as f:
+                return DegreeCube(pickle.load(f))
+        return DegreeCube(build_cube_cells())
+    return mgp_data.cached(('degree_cube', filename), build)
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ----------------------------
+#  START CLASS DEFINITIONS
+# ----------------------------
+""" DegreeCube:
+    input:  cells: output of build_cube_cells
+            school: the school table, for the school names
+                    (default: mgp_data.school)
+
+    query(by, where) sums the counts over every dimension not in by, e.g.
+        cube.query(['year', 'msc'], where={'year': slice(1850, 2020)})
+        cube.query(['continent', 'msc_group'], where={'decade': 1950})
+    by and where take the cube dimensions and the roll-ups of
+    derived_dimensions ('decade', 'century', 'continent', 'msc_group').
+    where maps a dimension to a value, a list of values, a
+    slice(start, stop) of values start <= v < stop, or a function
+    of the column giving a boolean mask (e.g. lambda c: c != "").
+    dense=True fills in the zero counts; names=True adds msc_name,
+    school name and country_name columns where they apply.
+    top(k, by, where) keeps the k largest; per_capita(where) counts
+    per 100 inhabitants by country.
+"""
+class DegreeCube:
+
+    def __init__(self, cells, school=None):
+        self.cells = cells
+        self.school = school
+
+    def column(self, dimension):
+        if dimension in cube_dimensions:
+            return self.cells[dimension]
+        base, rollup = derived_dimensions[dimension]
+        name = f"_{dimension}"
+        if name not in self.cells:  # roll-ups are computed once
+            self.cells[name] = rollup(self.cells[base])
+        return self.cells[name]
+
+    def select(self, where=None):
+        keep = np.ones(len(self.cells), dtype=bool)
+        for dimension, value in (where or dict()).items():
+            values = self.column(dimension)
+            if callable(value):
+                keep &= np.asarray(value(values), dtype=bool)
+            elif isinstance(value, slice):
+                if value.start is not None:
+                    keep &= (values >= value.start).to_numpy()
+                if value.stop is not None:
+                    keep &= (values < value.stop).to_numpy()
+            elif isinstance(value, (list, tuple, set, np.ndarray)):
+                keep &= values.isin(list(value)).to_numpy()
+            else:
+                keep &= (values == value).to_numpy()
+        return keep
+
+    def query(self, by, where=None, dense=False, names=False):
+        by = [by] if isinstance(by, str) else list(by)
+        keep = self.select(where)
+        counts = pd.Series(self.cells['count'].to_numpy()[keep])
+        keys = [self.column(d).to_numpy()[keep] for d in by]
+        if len(by) == 0:
+            return pd.DataFrame({'count': [int(counts.sum())]})
+        result = counts.groupby(keys, sort=True, observed=True).sum()
+        result.index.names = by
+        if dense and len(by) > 1:
+            full = pd.MultiIndex.from_product(result.index.levels, names=by)
+            result = result.reindex(full, fill_value=0)
+        result = result.rename('count').reset_index()
+        return self.add_names(result) if names else result
+
+    def top(self, k, by, where=None, names=False):
+        result = self.query(by, where, names=names)
+        return result.sort_values('count', ascending=False, kind='stable')\
+                     .head(k).reset_index(drop=True)
+
+    def per_capita(self, where=None, k=None):
+        result = self.query('country', where)
+        population = load_population()
+        result = result[result['country'].isin(population.index)].copy()
+        result['population'] = population.reindex(result['country']).to_numpy()
+        result['pct'] = 100 * result['count'] / result['population']
+        result = self.add_names(result).sort_values('pct', ascending=False, kind='stable')
+        return result.reset_index(drop=True) if k is None else result.head(k).reset_index(drop=True)
+
+    def add_names(self, result):
+        if 'msc' in result:
+            msc_names = load_msc_names()
+            result['msc_name'] = [msc_names.get(c, "no classification given")
+                                  for c in result['msc']]
+        if 'school' in result:
+            school = mgp_data.school if self.school is None else self.school
+            school = school.drop_duplicates('school_id', keep='first')
+            school_names = pd.Series(school['school_name'].to_numpy(),
+                                     index=school['school_id'].to_numpy())
+            result['name'] = school_names.reindex(result['school'].to_numpy()).to_numpy()
+        if 'country' in result:
+            result['country_name'] = [country_bounding_boxes[c][0] if c in country_bounding_boxes
+                                      else c for c in result['country']]
+        return result
+
+    def save(self, filename=cube_file):
+        cells = self.cells[cube_dimensions + ['count']]
+        with open(filename, "wb") as f:
+            pickle.dump(cells, f)
+
+# ----------------------------
+#   END  CLASS DEFINITIONS
+# ----------------------------
+
+
+# ------------------------
+#  START CUBE RECIPES
+# ------------------------
+
+""" the notebooks' pickled aggregates, as queries on a DegreeCube, in the
+    notebooks' columns: classified degrees only (msc >= 0), countries named
+    without spaces ("UnitedStates"); the country ids of msc_per_country_df
+    are ISO 3166 alpha-2 codes here, not the MGP's country ids
+"""
+classified = {'msc': slice(0, None)}
+located = {'country': lambda c: c != "", 'msc': slice(0, None)}
+
+# msc_per_school_big_df: schools with at least this many classified degrees
+big_school_degrees = 500
+
+
+""" notebook_countries:
+    input:  result: a query result with names (a 'country_name' column)
+    output: np.array of the country names without spaces.
+"""
+def notebook_countries(result):
+    return result['country_name'].str.replace(" ", "").to_numpy()
+
+
+""" msc_per_school:
+    input:  cube: a DegreeCube
+            min_degrees: keep the schools with at least this many
+                         classified degrees
+    output: msc_per_school_df (min_degrees=0) or msc_per_school_big_df.
+"""
+def msc_per_school(cube, min_degrees=0):
+    result = cube.query(['school', 'msc'], where={'school': slice(0, None), **classified},
+                        names=True)
+    result = result[result.groupby('school')['count'].transform('sum') >= min_degrees]
+    return result[['msc', 'msc_name', 'school', 'name', 'count']].reset_index(drop=True)
+
+
+cube_recipes = {
+    'msc_per_year_df':       lambda cube: cube.query(['year', 'msc'],
+                                                     where={'year': slice(1850, 2020), **classified},
+                                                     dense=True, names=True)
+                                              [['year', 'msc', 'count', 'msc_name']],
+    'msc_per_country_df':    lambda cube: cube.query(['country', 'msc'], where=located, names=True)
+                                              .assign(name=notebook_countries)
+                                              [['msc', 'msc_name', 'country', 'name', 'count']],
+    'msc_per_school_df':     lambda cube: msc_per_school(cube),
+    'msc_per_school_big_df': lambda cube: msc_per_school(cube, big_school_degrees),
+    'mtpcn_top25_df':        lambda cube: cube.top(25, 'country', where=located, names=True)
+                                              .assign(country=notebook_countries)
+                                              [['country', 'count']],
+    'pop_count_top25_df':    lambda cube: cube.per_capita(where=classified, k=25)
+                                              .assign(country=notebook_countries)
+                                              [['country', 'pct']],
+}
+
+# ------------------------
+#   END  CUBE RECIPES
+# ------------------------
+
+
+# ------------
+#  BEGIN MAIN
+# ------------
+
+if __name__ == "__main__":
+
+    cube = get_cube(cube_file)
+    cube.save(cube_file)
+    for name, recipe in cube_recipes.items():
+        print(f"{name}:")
+        print(recipe(cube).head(10).to_string())
+
+# ------------
+#   END  MAIN
+# ------------
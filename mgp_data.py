@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 13:05:00 2026
+
+@mcarlisle
+
+# A lazily loaded, shared data context for the MGP tables.
+# Each table is unpickled on first access, once per process,
+# and every module (mgp_functions, mgp_map, ...) reads it from here.
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+import hashlib
+import os
+import pandas as pd
+import pickle
+import time
+from mgp_columnar import columnar_folder, has_table, load_table
+from mgp_metrics import register_cache, stage
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+# the core tables, each stored as <name>.pickle in the data folder
+# (or in its columnar store, see mgp_columnar.py)
+mgp_table_names = ["academic", "advises", "degree", "degree_grant", "school"]
+
+# tables computed from the core tables on first access
+derived_tables = {
+    'degree_with_year': lambda data: data.degree[data.degree['year'] > -1].copy(),
+}
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" table_digest:
+    input:  table: a pd.DataFrame
+    output: bytes: a digest of the column names and contents of table
+            (columns of dicts or lists, e.g. school['geocode_json'],
+            are hashed through their repr).
+"""
+def table_digest(table):
+    digest = hashlib.sha1(repr((list(table.columns), len(table))).encode('utf-8'))
+    for c in table.columns:
+        try:
+            hashed = pd.util.hash_pandas_object(table[c], index=False)
+        except TypeError:
+            hashed = pd.util.hash_pandas_object(table[c].map(repr), index=False)
+        digest.update(hashed.to_numpy().tobytes())
+    return digest.digest()
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ----------------------------
+#  START CLASS DEFINITIONS
+# ----------------------------
+""" MGPData:
+    input:  folder: folder holding <name>.pickle for each of mgp_table_names,
+                    or a columnar store of them in folder/mgp_columnar
+                    (see mgp_columnar.py), which is used first if present:
+                    its numeric columns are memory-mapped, not copied.
+
+    A table is loaded the first time it is asked for, as an attribute
+    (mgp_data.degree) or with get("degree"), and kept for later calls.
+    load_report() lists load time, rows and memory for each loaded table.
+    set() replaces a table (e.g. with synthetic data), and drops everything
+    built from the old one; cached() memoizes other structures built
+    from the tables (e.g. the advice index in mgp_functions), and
+    cache_stats() counts its hits and misses. Loads are 'load' stages
+    of mgp_metrics. fingerprint() identifies tables, for stores and files
+    built from them, without loading them: by the paths, sizes and
+    modification times of their files, or by their contents if set().
+"""
+class MGPData:
+
+    def __init__(self, folder="."):
+        self.folder = folder
+        self.tables = dict()
+        self.replaced = set()
+        self.load_stats = dict()
+        self.cache = dict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __getattr__(self, name):
+        if name in mgp_table_names or name in derived_tables:
+            return self.get(name)
+        raise AttributeError(f"MGPData has no table {name}")
+
+    def get(self, name):
+        if name not in self.tables:
+            with stage('load', table=name) as s:
+                start = time.perf_counter()
+                if name in derived_tables:
+                    table = derived_tables[name](self)
+                elif has_table(name, os.path.join(self.folder, columnar_folder)):
+                    table = load_table(name, os.path.join(self.folder, columnar_folder))
+                else:
+                    with open(os.path.join(self.folder, f"{name}.pickle"), "rb") as f:
+                        table = pickle.load(f)
+                self.tables[name] = table
+                self.record(name, table, time.perf_counter() - start)
+                s['rows'] = len(table)
+        return self.tables[name]
+
+    def set(self, name, table):
+        self.tables[name] = table
+        self.replaced.add(name)
+        self.record(name, table, 0.0)
+        # anything built from the tables may be stale now
+        for derived in derived_tables:
+            if derived != name:
+                self.tables.pop(derived, None)
+        self.cache.clear()
+
+    def record(self, name, table, seconds):
+        memory = table.memory_usage(deep=True).sum() \
+                 if isinstance(table, pd.DataFrame) else 0
+        self.load_stats[name] = { 'seconds': seconds,
+                                  'rows': len(table),
+                                  'bytes': int(memory) }
+
+    def source_files(self, name):
+        table_folder = os.path.join(self.folder, columnar_folder, name)
+        if os.path.exists(os.path.join(table_folder, "manifest.json")):
+            return sorted(os.path.join(table_folder, f) for f in os.listdir(table_folder))
+        if has_table(name, os.path.join(self.folder, columnar_folder)):
+            return [os.path.join(self.folder, columnar_folder, f"{name}.parquet")]
+        return [os.path.join(self.folder, f"{name}.pickle")]
+
+    def fingerprint(self, names):
+        digest = hashlib.sha1()
+        for name in sorted(names):
+            digest.update(name.encode('utf-8'))
+            if name in self.replaced:
+                # set() in this process: only the contents identify it
+                digest.update(self.cached(('table_digest', name),
+                                          lambda: table_digest(self.tables[name])))
+                continue
+            for path in self.source_files(name):
+                stat = os.stat(path) if os.path.exists(path) else None
+                digest.update(repr((os.path.relpath(path, self.folder),
+                                    None if stat is None else (stat.st_size, stat.st_mtime_ns))
+                                   ).encode('utf-8'))
+        return digest.hexdigest()
+
+    def cached(self, key, build):
+        if key not in self.cache:
+            self.cache_misses += 1
+            self.cache[key] = build()
+        else:
+            self.cache_hits += 1
+        return self.cache[key]
+
+    def cache_stats(self):
+        return {'entries': len(self.cache), 'hits': self.cache_hits,
+                'misses': self.cache_misses}
+
+    def clear(self):
+        self.tables.clear()
+        self.replaced.clear()
+        self.load_stats.clear()
+        self.cache.clear()
+
+    def load_report(self):
+        report = pd.DataFrame.from_dict(self.load_stats, orient='index')
+        report.index.name = 'table'
+        return report
+
+# ----------------------------
+#   END  CLASS DEFINITIONS
+# ----------------------------
+
+
+# ------------------------
+#  START SHARED CONTEXT
+# ------------------------
+
+# the one data context shared by every module in this process
+mgp_data = MGPData()
+register_cache('mgp_data', mgp_data.cache_stats)
+
+# ------------------------
+#   END  SHARED CONTEXT
+# ------------------------
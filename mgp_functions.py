@@ -12,15 +12,12 @@ Created: Sat Jul 27 15:50:00 2019
 # -------------------------
 #  START IMPORT STATEMENTS 
 # -------------------------
-import matplotlib as mpl
-#import matplotlib.animation as animation
-import matplotlib.pyplot as plt
-from mpl_toolkits.basemap import Basemap
 import numpy as np
 import pandas as pd
 import pickle
-import pandasql as ps # sqldf
-from tqdm import tqdm_notebook as tqdm
+import scipy.sparse as sp
+from mgp_data import mgp_data, mgp_table_names
+from mgp_metrics import instrument, note
 
 # -------------------------
 #   END  IMPORT STATEMENTS
@@ -31,19 +28,10 @@ from tqdm import tqdm_notebook as tqdm
 #  START GLOBAL VARIABLES 
 # ------------------------
 
-acad_file = "academic.pickle"
-with open(acad_file, "rb") as f:
-    academic = pickle.load(f)
-adv_file = "advises.pickle"
-with open(adv_file, "rb") as f:
-    advises = pickle.load(f)
-
-degree_grant_file = "degree_grant.pickle"
-with open(degree_grant_file, "rb") as f:
-    degree_grant = pickle.load(f)
-school_file = "school.pickle"
-with open(school_file, "rb") as f:
-    school = pickle.load(f)
+# The MGP tables (academic, advises, degree, degree_grant, school) 
+# live in the shared, lazily loaded data context mgp_data (see mgp_data.py),
+# and are read as mgp_data.school, etc.
+# mgp_functions.school, etc. also work, through __getattr__ below.
 
 # ------------------------
 #   END  GLOBAL VARIABLES 
@@ -75,49 +63,191 @@ def build_year_ranges(first, last, inc=1, over=1):
     return year_ranges
 
 
+""" year_range_bounds:
+    input:  year_ranges: list of year ranges (output from build_year_ranges)
+    
+    output: two int arrays (starts, ends), one entry per year range, 
+            in the same order as year_ranges.
+"""
+def year_range_bounds(year_ranges):
+    bounds = np.asarray(year_ranges, dtype=np.int64).reshape(-1, 2)
+    return bounds[:, 0], bounds[:, 1]
+
+
+""" bin_indices_by_year_ranges:
+    input:  years: list-like of years (list, np.array, pd.Series)
+            year_ranges: list of year ranges (output from build_year_ranges)
+    required structure: year_ranges may overlap, and need not be sorted.
+    
+    output: a dict of 
+        { key = year_range
+          value = np.array of positions i (into years) with 
+                  year_range[0] <= years[i] < year_range[1], in increasing order }
+
+    note: the years are sorted once, and each range is two binary searches
+          into the sorted years, so overlapping ranges cost nothing extra.
+"""
+def bin_indices_by_year_ranges(years, year_ranges):
+    years = np.asarray(years)
+    order = np.argsort(years, kind='stable')
+    sorted_years = years[order]
+    starts, ends = year_range_bounds(year_ranges)
+    lo = np.searchsorted(sorted_years, starts, side='left')
+    hi = np.searchsorted(sorted_years, ends, side='left')
+
+    bin_indices = dict()
+    for y, a, b in zip(year_ranges, lo, hi):
+        # positions come back in year order; restore the order of the data
+        bin_indices[y] = np.sort(order[a:b])
+    return bin_indices
+
+
+""" year_range_membership_matrix:
+    input:  years: list-like of years (list, np.array, pd.Series)
+            year_ranges: list of year ranges (output from build_year_ranges)
+    
+    output: a scipy.sparse.csr_matrix M of shape (len(year_ranges), len(years))
+            with M[k, i] = 1 if years[i] falls in year_ranges[k].
+            Row k holds the same positions as 
+            bin_indices_by_year_ranges(years, year_ranges)[year_ranges[k]].
+"""
+def year_range_membership_matrix(years, year_ranges):
+    bin_indices = bin_indices_by_year_ranges(years, year_ranges)
+    rows = [bin_indices[y] for y in year_ranges]
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(r) for r in rows])
+    indices = np.concatenate(rows) if len(rows) > 0 else np.zeros(0, dtype=np.int64)
+    values = np.ones(len(indices), dtype=np.int8)
+    return sp.csr_matrix((values, indices, indptr), 
+                         shape=(len(year_ranges), len(years)))
+
+
 """ put_data_under_year_ranges:
-    input:  data:  list-like (indexable) - CURRENTLY ONLY LIST IS HANDLED
-            years: list of years
+    input:  data:  list-like (indexable): list, np.array, pd.Series or pd.DataFrame
+            years: list-like of years, or (if data is a pd.DataFrame) 
+                   the name of the column of data holding the years
             year_ranges: list of year ranges (output from build_year_ranges)
     required structure: data and years have same length
-                        all entries in years are in the partition year_ranges
         
     output: a dict of 
         { key = year_range
-          value = list of data that line up with years in key
+          value = the data that line up with years in key, 
+                  of the same type as data (list, np.array, pd.Series, pd.DataFrame)
         } 
             
     note: if year_ranges overlap, most of data should show up multiple times.
+    note: use bin_indices_by_year_ranges or year_range_membership_matrix 
+          directly if only the positions are needed.
 """
+@instrument('bin')
 def put_data_under_year_ranges(data, years, year_ranges):
 
+    if isinstance(data, pd.DataFrame) and isinstance(years, str):
+        years = data[years]
     assert len(data) == len(years), \
-        "get_content_under_ranges: data and years do not match length"
+        "put_data_under_year_ranges: data and years do not match length"
+    note(rows=len(data))
 
-#    build a dict with keys = year_ranges, with a list for each range
-    data_ranges = dict()
-    for y in year_ranges:
-        data_ranges[y] = []
+    bin_indices = bin_indices_by_year_ranges(years, year_ranges)
 
     # bin all the data by range - each row should fall in two bins, 
     # if ranges are cleanly overlapped
+    data_ranges = dict()
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        for y, idx in bin_indices.items():
+            data_ranges[y] = data.iloc[idx]
+    elif isinstance(data, np.ndarray):
+        for y, idx in bin_indices.items():
+            data_ranges[y] = data[idx]
+    else:  # if data is a list (or any other indexable)
+        values = np.empty(len(data), dtype=object)
+        values[:] = list(data)
+        for y, idx in bin_indices.items():
+            data_ranges[y] = values[idx].tolist()
 
-    # if data is a list
-    for i in range(len(data)):
-        for y in year_ranges:
-            if y[0] <= years[i] and years[i] < y[1]:
-                data_ranges[y].append(data[i])
-                # this should happen twice for every entry except 
-                # the very oldest and the very newest
-
-    # TODO if data is a pandas df
     return data_ranges
 
 
+""" granting_schools:
+    input:  degree_grant: the degree_grant table (default: mgp_data.degree_grant)
+
+    output: degree_grant[['degree', 'school']], keeping only the first row 
+            for a degree granted by more than one school.
+"""
+def granting_schools(degree_grant=None):
+    degree_grant = mgp_data.degree_grant if degree_grant is None else degree_grant
+    return degree_grant[['degree', 'school']].drop_duplicates('degree', keep='first')
+
+
+""" locate_degrees:
+    input:  degree_ids: list-like of degree ids
+            degree_grant: the degree_grant table (default: mgp_data.degree_grant)
+
+    output: a pd.DataFrame with columns 'degree' and 'school', one row per 
+            entry of degree_ids that has a degree_grant row (the first one, 
+            if a degree was granted by more than one school), in the same order.
+"""
+def locate_degrees(degree_ids, degree_grant=None):
+    degrees = pd.DataFrame({'degree': np.asarray(degree_ids)})
+    return degrees.merge(granting_schools(degree_grant), on='degree', how='inner', sort=False)
+
+
+""" bin_schools_table:
+    input:  binned_degrees is the output of put_data_under_year_ranges
+            on the degree ids (values may be lists, np.arrays, pd.Series, 
+            or pd.DataFrames with a 'degree_id' column).
+            degree_grant, school: the tables (default: mgp_data's)
+
+    output: (binned_table, error_count, total_degrees), where binned_table 
+            is a pd.DataFrame with one row per (year range, school):
+                'year_start', 'year_end', 'school', 'name', 'lat', 'lng', 'count'
+            in the order of binned_degrees, and schools in order of appearance;
+            error_count is the number of binned degrees without a school 
+            (no degree_grant row, or a school missing from the school table),
+            out of total_degrees binned degrees.
+
+    note: this is one merge and one groupby over all binned degrees at once.
+"""
+@instrument('bin')
+def bin_schools_table(binned_degrees, degree_grant=None, school=None):
+    
+    year_ranges = list(binned_degrees.keys())
+    degree_lists = []
+    for v in binned_degrees.values():
+        if isinstance(v, pd.DataFrame):
+            v = v['degree_id']
+        degree_lists.append(np.asarray(v, dtype=np.int64))
+    bin_sizes = np.array([len(v) for v in degree_lists], dtype=np.int64)
+    total_degrees = int(bin_sizes.sum())
+
+    # one long (bin, degree) table for every placement in every year range
+    placements = pd.DataFrame({
+        'bin': np.repeat(np.arange(len(year_ranges)), bin_sizes),
+        'degree': np.concatenate(degree_lists) if len(degree_lists) > 0 \
+                  else np.zeros(0, dtype=np.int64) })
+    placements = placements.merge(granting_schools(degree_grant), on='degree', how='inner', sort=False)
+
+    counts = placements.groupby(['bin', 'school'], sort=False).size().reset_index(name='count')
+    school = mgp_data.school if school is None else school
+    school_info = school[['school_id', 'school_name', 'lat', 'lng']]\
+                    .drop_duplicates('school_id', keep='first')\
+                    .rename(columns={'school_id': 'school', 'school_name': 'name'})
+    binned_table = counts.merge(school_info, on='school', how='inner', sort=False)
+    error_count = total_degrees - int(binned_table['count'].sum())
+
+    bounds = np.asarray(year_ranges, dtype=np.int64).reshape(-1, 2)
+    binned_table['year_start'] = bounds[binned_table['bin'].values, 0]
+    binned_table['year_end']   = bounds[binned_table['bin'].values, 1]
+    binned_table = binned_table[['bin', 'year_start', 'year_end', 'school', 
+                                 'name', 'lat', 'lng', 'count']]
+    note(rows=total_degrees, errors=error_count)
+    return binned_table, error_count, total_degrees
+
+
 """ bin_schools_by_time_frame:
     input:  binned_degrees is the output of put_data_under_year_ranges
             for the degree_grant and school dataframes.
-    required structure: Requires globals: degree_grant, school.
+            degree_grant, school: the tables (default: mgp_data's)
     
     output: binned_schools, a dict of 
         { key = year_range key from binned_degrees
@@ -129,44 +259,25 @@ def put_data_under_year_ranges(data, years, year_ranges):
     
     NOTE: this function outputs to std out to display errors.
     NOTE: binned_schools is pickled if you don't feel like running this again.
+    NOTE: the work is done by bin_schools_table; this only rebuilds the dicts.
 """
-def bin_schools_by_time_frame(binned_degrees):
+def bin_schools_by_time_frame(binned_degrees, degree_grant=None, school=None):
     
     # binned_degree now contains degree_ids binned by year.
     # we want these converted to counts per school, 
     # so they can be plotted on a world map.
-
-    binned_schools = {}  # empty dict
-    total_degrees, error_count = 0, 0 
-    # will be roughly double on each, since overlap doubles up almost everyone
-    for k, v in tqdm(binned_degrees.items()):
-    #    print(f"years: {k}")
-        binned_schools[k] = dict()
-        for d in v: # for degree in this year range's list
-            total_degrees += 1
-            # find this degree in the degree_grant df, and take its school
-            l = degree_grant.index[degree_grant['degree']==d].tolist()
-            if len(l) > 0:
-                i = l[0]
-                s = degree_grant['school'].iloc[i]
-    #            print(f"{s}: placing school: ", end="")
-                # add this school to the binned_schools[k] dict
-                if s in binned_schools[k]: # if s is in there, increment the count
-                    binned_schools[k][s]['count'] = binned_schools[k][s]['count'] + 1
-    #                print(f"total count now {binned_schools[k][s]['count']}.")
-                else: # add the lat, long, and a count of 1
-                    s_idx = school.index[school['school_id']==s].tolist()[0] 
-                    # index in school table
-                    school_name = school['school_name'].iloc[s_idx] # school name!                
-                    binned_schools[k][s] = { 'lat': school['lat'].iloc[s_idx], 
-                                             'lng': school['lng'].iloc[s_idx],
-                                             'count': 1,
-                                             'name': school_name }
-    #                print(f"added {school_name} at ({binned_schools[k][s]['lat']}, \
-    # {binned_schools[k][s]['lng']}).")
-            else:
-    #            print(f"{d}: degree_id does not have degree_grant index!")
-                error_count += 1
+    binned_table, error_count, total_degrees = bin_schools_table(binned_degrees, degree_grant, school)
+
+    year_ranges = list(binned_degrees.keys())
+    binned_schools = {k: dict() for k in year_ranges}
+    for b, s, name, lat, lng, count in zip(binned_table['bin'].values, 
+                                           binned_table['school'].values,
+                                           binned_table['name'].values,
+                                           binned_table['lat'].values,
+                                           binned_table['lng'].values,
+                                           binned_table['count'].values):
+        binned_schools[year_ranges[b]][s] = { 'lat': lat, 'lng': lng,
+                                              'count': int(count), 'name': name }
     print(f"total number of errors: {error_count} out of {total_degrees} placed.")
     return binned_schools
 
@@ -202,78 +313,176 @@ def restructure_schools_for_map(binned_schools):
             max_size: max for colormap (min is hard-coded to 0)
             lllon, lllat, urlon, urlat: lower-left, upper-right corners 
                     long/lat for BaseMap to restrict map to
+            processes: number of worker processes rendering frames 
+                    (None: one per core)
+            movie: if given, the movie file to stream the frames into 
+                    through ffmpeg, instead of writing map images 
+                    (or any encoder backend with write_frame and close)
+            framerate: frames per second of movie
+            resolution: (width, height) of the frames in pixels 
+                    (None: 20x10 inches at the matplotlib dpi)
                     
-    output: 
+    output: list of the map image files written, one per year range,
+            or [movie] when streaming to a movie.
+    
+    note: the static map is drawn once per worker and reused (see mgp_render).
 """
+@instrument('render')
 def generate_mgp_map(school_freq_dict,
                      folder="mgp_img/", fileprefix="all_mgp_year", 
                      title_prefix="All MGP dissertations: ",
                      max_size=100,
-                     lllon=-180,lllat=-90,urlon=180,urlat=90):
-
-    fig, ax  = plt.subplots()
-
-    for k, v in tqdm(school_freq_dict.items()):
-        x = [a[0] for a in list(v.keys())]
-        y = [a[1] for a in list(v.keys())]
-        c = list(v.values())
-        # only bad points will be (0.0, 0.0)
-        fig = plt.figure(figsize=(20,10)) # inches, at 72dpi
-        ax  = Basemap(projection='cyl', #lat_0 = 0, lon_0 = 0,
-                     llcrnrlon=lllon,llcrnrlat=lllat,
-                     urcrnrlon=urlon,urcrnrlat=urlat)
-        ax.drawcountries()
-        ax.drawmapboundary()
-        ax.drawcoastlines()
-        ax.drawmeridians(np.arange(-180, 180, 30))
-        ax.drawparallels(np.arange(-90, 90, 30))
-
-        # normalize colorbar so it doesn't bounce range through the centuries
-        norm = mpl.colors.Normalize(vmin=0,vmax=max_size)
-
-#        x, y = map(x, y)
-        ax.scatter(x, y, marker='D', c=c, norm=norm, cmap='plasma') 
-        # use brighter colors?
+                     lllon=-180,lllat=-90,urlon=180,urlat=90,
+                     processes=None, movie=None, framerate=3, resolution=None):
+    # matplotlib and Basemap load only when a map is drawn
+    from mgp_render import frame_points, render_frames, render_frame_to_file, \
+                           stream_frames, FFmpegWriter
+    from mgp_spatial import in_bbox
+
+    bbox = (lllon, lllat, urlon, urlat)
+    figsize, dpi = (20, 10), None
+    if resolution is not None:
+        dpi = 100
+        figsize = (resolution[0] / dpi, resolution[1] / dpi)
+
+    frames = []
+    for k, v in school_freq_dict.items():
+        x, y, c = frame_points(v)
+        if bbox != (-180, -90, 180, 90):
+            # only the points in view go to the renderer
+            inside = in_bbox(x, y, bbox)
+            x, y, c = x[inside], y[inside], c[inside]
         # TODO: add a paramter to switch this to ax.plot for chrono w/ line?
-        plt.colorbar()
-        plt.title(f"{title_prefix} {k}")
-        plt.savefig(f"{folder}{fileprefix}_{k[0]}_{k[1]}.png", format="png")
+        frames.append((x, y, c, f"{title_prefix} {k}", bbox, max_size, figsize, dpi))
+    note(rows=len(frames), points=int(sum(len(frame[0]) for frame in frames)))
 
-    return None
+    if movie is not None:
+        # no intermediate files: frames go straight into the encoder
+        writer = FFmpegWriter(movie, framerate=framerate) if isinstance(movie, str) else movie
+        stream_frames(frames, writer, processes=processes)
+        return [movie]
+
+    jobs = [(f"{folder}{fileprefix}_{k[0]}_{k[1]}.png",) + frame 
+            for k, frame in zip(school_freq_dict.keys(), frames)]
+    return render_frames(jobs, render_frame_to_file, processes=processes)
 
 
 """ LINEAGE FUNCTIONS """
 
 
 
+""" get_academic_degree_info:
+    input:  list_of_academics: list of academic ids
+    output: a df of the rows of the degree table for these academics,
+            from one indexed lookup in the degree store (see mgp_store).
+"""
 def get_academic_degree_info(list_of_academics):
-    # simple. go into the degree_grant table and pull all that info out.
+    from mgp_store import find_degrees
+    # simple. go into the degree table and pull all that info out.
     assert isinstance(list_of_academics, list)
-    info_dict = {}
     if len(list_of_academics) == 0:
-        results = pd.DataFrame()
-    elif len(list_of_academics) == 1:
-        results = ps.sqldf(f"select * from degree where academic = {list_of_academics[0]}")
-    else:
-        results = ps.sqldf(f"select * from degree where academic in {tuple(list_of_academics)}")
-    return results
+        return pd.DataFrame()
+    return find_degrees(academic_ids=list_of_academics)
+
+
+
+""" build_advice_index:
+    input:  advises: dataframe with (at least) columns 'advisor', 'advisee'
+    
+    output: a dict of np.arrays, CSR-style, over positions 0..n-1 of the 
+            academic ids appearing in advises:
+        { 'ids':          sorted academic ids (position -> academic_id)
+          'advisees_ptr', 'advisees': students of ids[p] are 
+                          ids[advisees[advisees_ptr[p]:advisees_ptr[p+1]]]
+          'advisors_ptr', 'advisors': advisors of ids[p] are 
+                          ids[advisors[advisors_ptr[p]:advisors_ptr[p+1]]] }
+            
+    note: duplicate advises rows are collapsed to a single edge.
+"""
+def build_advice_index(advises):
+    advisor = advises['advisor'].to_numpy(dtype=np.int64)
+    advisee = advises['advisee'].to_numpy(dtype=np.int64)
+    ids = np.unique(np.concatenate([advisor, advisee]))
+    n = len(ids)
+
+    edges = np.unique(np.stack([np.searchsorted(ids, advisor), 
+                                np.searchsorted(ids, advisee)], axis=1), axis=0)
+    src, dst = edges[:, 0], edges[:, 1]
+
+    def csr(rows, cols):
+        order = np.lexsort((cols, rows))
+        ptr = np.zeros(n + 1, dtype=np.int64)
+        ptr[1:] = np.cumsum(np.bincount(rows, minlength=n))
+        return ptr, cols[order]
+
+    advisees_ptr, advisees = csr(src, dst)
+    advisors_ptr, advisors = csr(dst, src)
+    return { 'ids': ids, 
+             'advisees_ptr': advisees_ptr, 'advisees': advisees,
+             'advisors_ptr': advisors_ptr, 'advisors': advisors }
+
+
+""" get_advice_index:
+    required structure: Requires global: advises (from mgp_data).
+    output: the advice index of advises (see build_advice_index), 
+            built on the first call and kept in the mgp_data cache.
+"""
+def get_advice_index():
+    return mgp_data.cached('advice_index', lambda: build_advice_index(mgp_data.advises))
+
 
+""" traverse_advice:
+    input:  academic_id: int
+            get_advisors: boolean: if True, get all ancestors (back in time);
+                                if False, get all descendants (forward in time).
+            index: output of build_advice_index (default: get_advice_index())
+    output: sorted np.array of the academic_ids reachable from academic_id,
+            each one once, not including academic_id itself.
+            
+    note: breadth-first, one generation at a time, with a visited mask, 
+          so shared ancestors are expanded once and there is no recursion.
+"""
+def traverse_advice(academic_id, get_advisors=True, index=None):
+    if index is None:
+        index = get_advice_index()
+    ids = index['ids']
+    which = 'advisors' if get_advisors else 'advisees'
+    ptr, neighbors = index[f"{which}_ptr"], index[which]
+
+    p = np.searchsorted(ids, academic_id)
+    if p == len(ids) or ids[p] != academic_id:
+        return np.zeros(0, dtype=ids.dtype)  # not in advises: no lineage
+
+    visited = np.zeros(len(ids), dtype=bool)
+    visited[p] = True
+    frontier = np.array([p])
+    while len(frontier) > 0:
+        # gather all neighbors of the whole generation at once
+        starts, lengths = ptr[frontier], ptr[frontier + 1] - ptr[frontier]
+        offsets = np.arange(lengths.sum()) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        nxt = np.unique(neighbors[offsets])
+        frontier = nxt[~visited[nxt]]
+        visited[frontier] = True
+    visited[p] = False
+    return ids[visited]
 
 
 """ get_immediate_advice:
     input:  academic_id: int
             get_advisors: boolean: if True, get advisors (back in time);
                                 if False, get advisees (forward in time).
-        required: advises dataframe
-    output: dict of advisors/advisees one generation back:
-        { key = academic_id
-          value = list of dict: [
-                  { 'degree', 'year', 'school', 'lng', 'lat' } ] }
+        required: advises dataframe (through get_advice_index)
+    output: list of academic_ids of advisors/advisees one generation away.
 """
 def get_immediate_advice(academic_id, get_advisors=True):
-    who,whom = ('advisee','advisor') if get_advisors else ('advisor','advisee')
-    people = advises[advises[who]==academic_id]
-    return list(people[whom])
+    index = get_advice_index()
+    ids = index['ids']
+    which = 'advisors' if get_advisors else 'advisees'
+    ptr, neighbors = index[f"{which}_ptr"], index[which]
+    p = np.searchsorted(ids, academic_id)
+    if p == len(ids) or ids[p] != academic_id:
+        return []
+    return ids[neighbors[ptr[p]:ptr[p + 1]]].tolist()
 
 
 
@@ -281,19 +490,13 @@ def build_lineage_academic_list(academic_id, get_advisors=True):
     # The first part to the large function below.
     # Make this easy: get all the academic_ids of the lineage.
     
-    # First, get all of this academic's line (in the direction of get_advisors).
-    line_exists = True
+    # Get all of this academic's line (in the direction of get_advisors),
+    # each academic once.
+    academic_id_lineage = traverse_advice(academic_id, get_advisors).tolist()
     # only count self on way back
-    academic_id_lineage = [academic_id] if get_advisors else [] 
-    while line_exists:
-        immediate = get_immediate_advice(academic_id, get_advisors)
-#        print(f"{academic_id}: immediate {immediate}")
-        if len(immediate) > 0:
-            for a in immediate:
-                academic_id_lineage.extend(build_lineage_academic_list(a, get_advisors))
-        line_exists = False
-#        print(f" {academic_id}: finished a branch.")
-    return list(set(academic_id_lineage))
+    if get_advisors:
+        academic_id_lineage.append(academic_id)
+    return academic_id_lineage
 
 
 """ build_lineage:
@@ -332,6 +535,21 @@ def build_lineage(academic_id):
     return lineage_df
 
 
+
+""" __getattr__:
+    module-level attribute access to the MGP tables, 
+    so that mgp_functions.school, etc. load lazily from mgp_data.
+"""
+def __getattr__(name):
+    if name in mgp_table_names:
+        return mgp_data.get(name)
+    raise AttributeError(f"module {__name__} has no attribute {name}")
+
+
+# everything public except the tables, so that 
+# "from mgp_functions import *" does not load any of them
+__all__ = [name for name in list(globals()) if not name.startswith('_')]
+
     
 # ----------------------------
 #   END  FUNCTION DEFINITIONS 
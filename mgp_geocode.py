@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 15:40:00 2026
+
+@mcarlisle
+
+# Geocoding of school names (notebook 1), as an asyncio service:
+# bounded concurrency, token-bucket rate limiting, retry with backoff,
+# and an on-disk cache keyed by normalized school name that stores only
+# the answers (status, lat, lng, address, country) -- OK or ZERO_RESULTS --
+# never the full JSON, and never a failure.
+# Only names missing from the cache, or cached without a location, are queried;
+# a run stops at the first REQUEST_DENIED (a bad or expired API key).
+# FakeGeocoder is a local stand-in for the Google Geocode API,
+# so the whole path runs without network access:
+#     python mgp_geocode.py --fake
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+import asyncio
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import pandas as pd
+import random
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import urllib.error
+import urllib.parse
+import urllib.request
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+google_geocode_url = "https://maps.googleapis.com/maps/api/geocode/json"
+geocode_cache_file = "geocode_cache.sqlite"
+
+# API statuses worth another try after a pause
+retry_statuses = {"OVER_QUERY_LIMIT", "UNKNOWN_ERROR"}
+
+# API statuses that answer the question, and are kept in the cache
+cached_statuses = {"OK", "ZERO_RESULTS"}
+
+# API statuses that no retry will fix: the run stops
+fatal_statuses = {"REQUEST_DENIED"}
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" normalize_school_name:
+    input:  name: str
+    output: the cache key for name: accents removed, lowercase,
+            punctuation dropped, whitespace collapsed.
+"""
+def normalize_school_name(name):
+    name = unicodedata.normalize('NFKD', str(name))
+    name = "".join(ch for ch in name if not unicodedata.combining(ch)).lower()
+    name = re.sub(r"[^\w\s]", " ", name)
+    return " ".join(name.split())
+
+
+""" open_geocode_cache:
+    input:  cache_file: path of the SQLite cache
+    output: an open sqlite3 connection, with the geocode table created.
+"""
+def open_geocode_cache(cache_file=geocode_cache_file):
+    conn = sqlite3.connect(cache_file)
+    conn.execute("create table if not exists geocode ("
+                 "key text primary key, name text, status text, "
+                 "lat real, lng real, address text, fetched_at real, country text)")
+    columns = [row[1] for row in conn.execute("pragma table_info(geocode)")]
+    if 'country' not in columns:  # a cache from before countries were kept
+        conn.execute("alter table geocode add column country text")
+    return conn
+
+
+""" read_geocode_cache:
+    input:  conn: output of open_geocode_cache
+            keys: list of normalized names
+    output: dict { key: (status, lat, lng, address, country) } for the cached keys.
+"""
+def read_geocode_cache(conn, keys):
+    cached = dict()
+    keys = list(keys)
+    for i in range(0, len(keys), 500):  # stay under SQLite's parameter limit
+        batch = keys[i:i + 500]
+        query = f"select key, status, lat, lng, address, country from geocode " \
+                f"where key in ({','.join('?' * len(batch))})"
+        for key, status, lat, lng, address, country in conn.execute(query, batch):
+            cached[key] = (status, lat, lng, address, country)
+    return cached
+
+
+""" parse_geocode_json:
+    input:  data: a Geocode API JSON response, as a dict
+    output: (status, lat, lng, address, country): the first result's
+            location, and the ISO 3166 alpha-2 code of its 'country'
+            address component (None if it has none),
+            or (status, None, None, None, None) if there is no result.
+"""
+def parse_geocode_json(data):
+    status = data.get('status', 'UNKNOWN_ERROR')
+    try:
+        first = data['results'][0]
+        location = first['geometry']['location']
+        country = None
+        for component in first.get('address_components', []):
+            if 'country' in component.get('types', []):
+                country = component.get('short_name')
+                break
+        return status, location['lat'], location['lng'], first.get('formatted_address'), country
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return status, None, None, None, None
+
+
+""" fetch_geocode:
+    input:  name: school name to look up
+            url: Geocode API endpoint
+            key: API key (None to send none, e.g. for FakeGeocoder)
+            timeout: seconds
+    output: the JSON response as a dict (blocking; run in a thread).
+"""
+def fetch_geocode(name, url, key, timeout=10):
+    params = {'address': name}
+    if key is not None:
+        params['key'] = key
+    with urllib.request.urlopen(f"{url}?{urllib.parse.urlencode(params)}",
+                                timeout=timeout) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+
+""" geocode_one:
+    input:  name: school name
+            url, key: as in fetch_geocode
+            bucket: a TokenBucket shared by all requests
+            semaphore: an asyncio.Semaphore bounding requests in flight
+            retries: number of extra attempts after a failure
+            backoff: seconds before the first retry, doubled each time
+    output: (status, lat, lng, address, country); status is 'REQUEST_FAILED'
+            if every attempt failed on the network or the server.
+            A status of fatal_statuses raises a RuntimeError.
+"""
+async def geocode_one(name, url, key, bucket, semaphore, retries=4, backoff=0.5):
+    for attempt in range(retries + 1):
+        async with semaphore:
+            await bucket.acquire()
+            try:
+                data = await asyncio.to_thread(fetch_geocode, name, url, key)
+                result = parse_geocode_json(data)
+            except (urllib.error.URLError, OSError, ValueError):
+                result = ('REQUEST_FAILED', None, None, None, None)
+        if result[0] in fatal_statuses:
+            raise RuntimeError(f"geocode_one: the geocoder answered {result[0]} "
+                               f"for {name!r}; check the API key")
+        if result[0] not in retry_statuses and result[0] != 'REQUEST_FAILED':
+            return result
+        if attempt < retries:
+            await asyncio.sleep(backoff * 2 ** attempt * (1 + random.random()))
+    return result
+
+
+""" geocode_names_async:
+    input:  names: list of school names
+            url: Geocode API endpoint (default: Google)
+            key: API key (default: google_api_key.key, as in notebook 1)
+            cache_file: path of the SQLite cache
+            concurrency: maximum number of requests in flight
+            rate: maximum requests per second
+            retries, backoff: as in geocode_one
+    output: a pd.DataFrame, one row per name:
+            'name', 'key', 'status', 'lat', 'lng', 'address', 'country', 'cached'.
+            Only answers (cached_statuses) are written to the cache; a
+            REQUEST_DENIED stops the run with a RuntimeError, writing nothing.
+"""
+async def geocode_names_async(names, url=google_geocode_url, key=None,
+                              cache_file=geocode_cache_file,
+                              concurrency=10, rate=40, retries=4, backoff=0.5):
+    if key is None and url == google_geocode_url:
+        import google_api_key  # you need the file in this folder
+        key = google_api_key.key
+
+    conn = open_geocode_cache(cache_file)
+    keys = {name: normalize_school_name(name) for name in names}
+    cached = read_geocode_cache(conn, set(keys.values()))
+
+    # one request per distinct normalized name that is not known yet
+    to_query = dict()
+    for name, k in keys.items():
+        if k not in to_query and cached.get(k, ('ZERO_RESULTS',))[0] != 'OK':
+            to_query[k] = name
+
+    bucket = TokenBucket(rate=rate, capacity=max(1, concurrency))
+    semaphore = asyncio.Semaphore(concurrency)
+    found = await asyncio.gather(*[geocode_one(name, url, key, bucket, semaphore,
+                                               retries, backoff)
+                                   for name in to_query.values()])
+
+    now = time.time()
+    for (k, name), result in zip(to_query.items(), found):
+        if result[0] not in cached_statuses:
+            continue  # not an answer (REQUEST_FAILED, INVALID_REQUEST, ...): ask again next run
+        status, lat, lng, address, country = result
+        conn.execute("insert or replace into geocode (key, name, status, lat, lng, "
+                     "address, fetched_at, country) values (?, ?, ?, ?, ?, ?, ?, ?)",
+                     (k, name, status, lat, lng, address, now, country))
+    conn.commit()
+    conn.close()
+
+    fresh = dict(zip(to_query.keys(), found))
+    rows = []
+    for name in names:
+        k = keys[name]
+        status, lat, lng, address, country = fresh[k] if k in fresh else cached[k]
+        rows.append((name, k, status, lat, lng, address, country, k not in fresh))
+    return pd.DataFrame(rows, columns=['name', 'key', 'status', 'lat', 'lng',
+                                       'address', 'country', 'cached'])
+
+
+""" geocode_names:
+    input:  as geocode_names_async
+    output: as geocode_names_async (runs the event loop; for scripts).
+"""
+def geocode_names(names, **kwargs):
+    return asyncio.run(geocode_names_async(list(names), **kwargs))
+
+
+""" geocode_schools:
+    input:  school: the school pd.DataFrame (with 'school_name')
+            kwargs: passed on to geocode_names_async
+    output: a copy of school with 'lat', 'lng', 'country_code' (ISO 3166
+            alpha-2, from the geocoder's country component; see
+            mgp_spatial.school_countries) and 'geocode_status' filled in.
+            As before, schools without a location get (0.0, 0.0) -- but now
+            'geocode_status' says why (ZERO_RESULTS, REQUEST_FAILED, ...).
+"""
+def geocode_schools(school, **kwargs):
+    results = geocode_names(list(school['school_name']), **kwargs)
+    school = school.copy()
+    school['lat'] = results['lat'].fillna(0.0).to_numpy()
+    school['lng'] = results['lng'].fillna(0.0).to_numpy()
+    school['country_code'] = results['country'].to_numpy()
+    school['geocode_status'] = results['status'].to_numpy()
+    return school
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ----------------------------
+#  START CLASS DEFINITIONS
+# ----------------------------
+""" TokenBucket:
+    input:  rate: tokens added per second
+            capacity: the most tokens held at once (the burst size)
+
+    await acquire() takes one token, waiting for the bucket to refill if needed.
+"""
+class TokenBucket:
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity,
+                                  self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+""" FakeGeocoder:
+    input:  zero_results: collection of names (normalized or not) that
+                          the fake answers with ZERO_RESULTS
+            places: dict { name: (lat, lng, country code) } of names the
+                    fake answers with a known place (e.g. for border tests)
+            failure_rate: fraction of requests answered with an HTTP 500
+                          or OVER_QUERY_LIMIT, to exercise the retries
+            seed: random seed for the failures
+            status: if given, the status of every answer (e.g. REQUEST_DENIED,
+                    as for a bad API key), with no results
+
+    A local HTTP server answering Geocode API requests in Google's format,
+    with a made-up location derived from a hash of the normalized name.
+    Use as a context manager; .url is the endpoint; .requests counts hits.
+"""
+class FakeGeocoder:
+
+    def __init__(self, zero_results=(), failure_rate=0.0, seed=0, places=None, status=None):
+        self.zero_results = {normalize_school_name(n) for n in zero_results}
+        self.places = {normalize_school_name(n): p for n, p in (places or dict()).items()}
+        self.failure_rate = failure_rate
+        self.status = status
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.server = None
+        self.thread = None
+        self.url = None
+
+    def answer(self, address):
+        self.requests += 1
+        if self.status is not None:
+            return 200, {'results': [], 'status': self.status,
+                         'error_message': f"FakeGeocoder: {self.status}"}
+        if self.random.random() < self.failure_rate:
+            if self.random.random() < 0.5:
+                return 500, {}
+            return 200, {'results': [], 'status': 'OVER_QUERY_LIMIT'}
+        k = normalize_school_name(address)
+        if k in self.zero_results or k == "":
+            return 200, {'results': [], 'status': 'ZERO_RESULTS'}
+        if k in self.places:
+            lat, lng, country = self.places[k]
+        else:
+            digest = hashlib.sha1(k.encode('utf-8')).digest()
+            lat = int.from_bytes(digest[:4], 'big') / 2**32 * 140 - 60
+            lng = int.from_bytes(digest[4:8], 'big') / 2**32 * 360 - 180
+            country = None
+        result = {'formatted_address': address.title(),
+                  'geometry': {'location': {'lat': lat, 'lng': lng}}}
+        if country is not None:
+            result['address_components'] = [{'long_name': country, 'short_name': country,
+                                              'types': ['country', 'political']}]
+        return 200, {'results': [result], 'status': 'OK'}
+
+    def __enter__(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                code, body = fake.answer(query.get('address', [""])[0])
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/maps/api/geocode/json"
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
+
+# ----------------------------
+#   END  CLASS DEFINITIONS
+# ----------------------------
+
+
+# ------------
+#  BEGIN MAIN
+# ------------
+
+if __name__ == "__main__":
+
+    import os, sys, tempfile
+    if "--fake" in sys.argv:
+        # the whole path, offline: two runs against the fake geocoder
+        names = ["Universität Göttingen", "Universitat Gottingen",
+                 "Massachusetts Institute of Technology", "Stanford University",
+                 "Collegium Maius (lost)"]
+        cache_file = os.path.join(tempfile.mkdtemp(), "geocode_cache.sqlite")
+        with FakeGeocoder(zero_results=["Collegium Maius (lost)"], failure_rate=0.3) as fake:
+            first = geocode_names(names, url=fake.url, cache_file=cache_file, backoff=0.01)
+            print(first[['name', 'status', 'lat', 'lng', 'cached']])
+            print(f"requests: {fake.requests}")
+            second = geocode_names(names, url=fake.url, cache_file=cache_file, backoff=0.01)
+            print(second[['name', 'status', 'cached']])
+            print(f"requests: {fake.requests} (only the ZERO_RESULTS name again)")
+
+# ------------
+#   END  MAIN
+# ------------
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 15:00:00 2026
+
+@mcarlisle
+
+# Ingestion of a raw MGP dump (geneal_YYYYMMDD/*.tsv, degree.csv) in one command:
+#     python mgp_ingest.py ./MGP_official/geneal_20190711 [out_folder] [--columnar]
+# The degree table is streamed in chunks of lines through a process pool,
+# which applies the repairs worked out by hand in notebook 0
+# (three-quote fix, dual-degree split, missing-quote detection).
+# Rows that cannot be repaired go to degree_quarantine.tsv, not the tables.
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+import argparse
+import csv
+import multiprocessing
+import numpy as np
+import os
+import pandas as pd
+import pickle
+import re
+from mgp_columnar import columnar_folder, export_table
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+# the tables of a dump that load cleanly as tab-separated files
+plain_tables = ["academic", "advises", "country", "degree_grant", "school"]
+
+degree_columns = ["degree_id", "academic", "thesis", "year", "msc", "degree_type"]
+
+# repair rules from notebook 0 ("0-EDA, cleaning, preparing.ipynb")
+# a stray quoted piece inside the title: 1,2,"Title"rest", -> 1,2,"Titlerest",
+three_quotes_regex = r"([0-9]+),([0-9]+),\"([^\"]+)\"([^\"]*)\","
+three_quotes_fix   = r'\1,\2,"\3\4",'
+three_quotes = re.compile(three_quotes_regex)
+# two dissertations and two degree types in one entry
+regex_old_dual_degree = r"([0-9]+),([0-9]+),\"([^\"]+)(;|,)([^\"]+)\",([0-9]*),([0-9]*),([^,]+),([^,]+)$"
+old_dual_degree = re.compile(regex_old_dual_degree)
+# a title that was never quoted
+missing_quote_regex = r"([0-9]+),([0-9]+),[A-Z]"
+missing_quote = re.compile(missing_quote_regex)
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" split_degree_id:
+    input:  degree_id: id (or np.array of ids) of a dual degree entry
+    output: the id of the second degree split off it: -degree_id. MGP ids
+            are positive, so it is new, and the same in every dump.
+"""
+def split_degree_id(degree_id):
+    return -degree_id
+
+
+""" valid_degree_fields:
+    input:  fields: list of str, one degree row split into fields
+    output: the row as [degree_id, academic, thesis, year, msc, degree_type]
+            with ints for ids, year and msc (-1 where empty),
+            or None if the fields do not make a degree row.
+"""
+def valid_degree_fields(fields):
+    if len(fields) != len(degree_columns):
+        return None
+    degree_id, academic, thesis, year, msc, degree_type = [f.strip() for f in fields]
+    if not (degree_id.isdigit() and academic.isdigit()):
+        return None
+    if not (year == "" or year.isdigit()) or not (msc == "" or msc.isdigit()):
+        return None
+    return [int(degree_id), int(academic), thesis,
+            int(year) if year != "" else -1, int(msc) if msc != "" else -1,
+            degree_type]
+
+
+""" well_quoted:
+    input:  line: one line of degree.csv, without its newline
+    output: True if every quote in line is a field delimiter or a doubled
+            (escaped) quote inside a quoted field, as csv writes them.
+"""
+def well_quoted(line):
+    inside, i = False, 0
+    while i < len(line):
+        if line[i] == '"':
+            if not inside:
+                if i > 0 and line[i - 1] != ',':
+                    return False
+                inside = True
+            elif i + 1 < len(line) and line[i + 1] == '"':
+                i += 1  # an escaped quote
+            elif i + 1 < len(line) and line[i + 1] != ',':
+                return False
+            else:
+                inside = False
+        i += 1
+    return not inside
+
+
+""" repair_degree_line:
+    input:  line: one line of degree.csv, without its newline
+    output: (rows, reason): rows is a list of repaired degree rows
+            (see valid_degree_fields) -- two for a dual degree, the second
+            with the id split_degree_id gives it -- and reason names
+            the repair applied ('clean', 'three_quotes', 'dual_degree',
+            'missing_quote'), or why the line was quarantined (rows == []).
+"""
+def repair_degree_line(line):
+    row = valid_degree_fields(next(csv.reader([line])))
+    if row is not None and (line.count('"') in (0, 2) or well_quoted(line)):
+        return [row], 'clean'
+
+    if line.count('"') == 3:
+        fixed = three_quotes.sub(three_quotes_fix, line, count=1)
+        row = valid_degree_fields(next(csv.reader([fixed])))
+        if row is not None:
+            return [row], 'three_quotes'
+
+    m = old_dual_degree.match(line)
+    if m is not None:
+        degree_id, academic, first, _, second, year, msc, type1, type2 = m.groups()
+        first_row = valid_degree_fields([degree_id, academic, first, year, msc, type1])
+        second_row = valid_degree_fields([degree_id, academic, second, year, msc, type2])
+        if first_row is not None and second_row is not None:
+            second_row[0] = split_degree_id(first_row[0])
+            return [first_row, second_row], 'dual_degree'
+
+    if missing_quote.match(line) and line.count('"') == 0:
+        head = line.rsplit(',', 3)
+        if len(head) == 4:
+            degree_id, academic, thesis = (head[0].split(',', 2) + ["", ""])[:3]
+            row = valid_degree_fields([degree_id, academic, thesis] + head[1:])
+            if row is not None:
+                return [row], 'missing_quote'
+
+    if line.strip() == "":
+        return [], 'empty'
+    return [], f"unrepairable ({line.count(',')} commas, {line.count(chr(34))} quotes)"
+
+
+""" repair_degree_chunk:
+    input:  chunk: (first_line_number, list of lines)
+    output: (rows, repairs, quarantine): the repaired rows in order;
+            a dict { repair reason: count }; and a list of
+            (line_number, reason, line) for the lines that were not repaired.
+"""
+def repair_degree_chunk(chunk):
+    first_line_number, lines = chunk
+    rows, repairs, quarantine = [], dict(), []
+    for n, line in enumerate(lines, start=first_line_number):
+        line = line.rstrip('\r\n')
+        fixed, reason = repair_degree_line(line)
+        if len(fixed) == 0:
+            if reason != 'empty':
+                quarantine.append((n, reason, line))
+            continue
+        repairs[reason] = repairs.get(reason, 0) + 1
+        rows.extend(fixed)
+    return rows, repairs, quarantine
+
+
+""" read_line_chunks:
+    input:  filename: a text file
+            chunk_lines: number of lines per chunk
+            skip_header: boolean: if True, drop the first line
+    output: a generator of (first_line_number, list of lines), streaming
+            the file without ever holding all of it; line numbers start at 1.
+"""
+def read_line_chunks(filename, chunk_lines=50000, skip_header=True):
+    with open(filename, "r", encoding="utf-8", errors="replace") as f:
+        if skip_header:
+            f.readline()
+        first = 2 if skip_header else 1
+        chunk = []
+        for line in f:
+            chunk.append(line)
+            if len(chunk) == chunk_lines:
+                yield first, chunk
+                first += len(chunk)
+                chunk = []
+        if len(chunk) > 0:
+            yield first, chunk
+
+
+""" read_plain_table:
+    input:  filename: a tab-separated table of the dump
+            chunk_rows: number of rows read at a time
+    output: the table as a pd.DataFrame.
+
+    note: the chunks are copied into columns sized by a first pass counting
+          lines, and dropped as they go: at most one chunk is held besides
+          the table (a column is promoted, e.g. int to float, if a later
+          chunk needs it).
+"""
+def read_plain_table(filename, chunk_rows=100000):
+    with open(filename, "rb") as f:
+        capacity = sum(block.count(b"\n") for block in iter(lambda: f.read(1 << 20), b"")) + 1
+    columns, rows = dict(), 0
+    for chunk in pd.read_csv(filename, sep='\t', chunksize=chunk_rows):
+        for c in chunk.columns:
+            values = chunk[c].to_numpy()
+            if c not in columns:
+                columns[c] = np.empty(capacity, dtype=values.dtype)
+            elif np.result_type(columns[c], values) != columns[c].dtype:
+                columns[c] = columns[c].astype(np.result_type(columns[c], values))
+            columns[c][rows:rows + len(chunk)] = values
+        rows += len(chunk)
+    if len(columns) == 0:
+        return pd.read_csv(filename, sep='\t')
+    return pd.DataFrame({c: values[:rows] for c, values in columns.items()}, copy=False)
+
+
+""" copy_split_grants:
+    input:  degree_grant: the degree_grant table of the dump
+            degree: the clean degree table (see ingest_degree)
+    output: degree_grant, with a copy of the grants of every split dual
+            degree for its second degree (see split_degree_id).
+"""
+def copy_split_grants(degree_grant, degree):
+    ids = degree['degree_id'].to_numpy()
+    split = ids[ids < 0]
+    copies = degree_grant[degree_grant['degree'].isin(split_degree_id(split))].copy()
+    copies['degree'] = split_degree_id(copies['degree'])
+    return pd.concat([degree_grant, copies], ignore_index=True)
+
+
+""" ingest_degree:
+    input:  filename: degree.csv of the dump
+            pool: a multiprocessing.Pool, or None to work in this process
+            chunk_lines: number of lines per chunk sent to a worker
+    output: (degree, repairs, quarantine): the clean degree pd.DataFrame
+            (msc/year -1 where missing, thesis/degree_type "" where missing,
+            as in notebook 0), a dict of repair counts, and the quarantined
+            lines as a pd.DataFrame (line, reason, text).
+
+    note: the second half of a split dual degree gets the degree_id
+          split_degree_id derives from the entry's id (see copy_split_grants
+          for its degree_grant rows).
+"""
+def ingest_degree(filename, pool=None, chunk_lines=50000):
+    chunks = read_line_chunks(filename, chunk_lines)
+    results = pool.imap(repair_degree_chunk, chunks) if pool is not None \
+              else map(repair_degree_chunk, chunks)
+
+    rows, repairs, quarantine = [], dict(), []
+    for chunk_rows, chunk_repairs, chunk_quarantine in results:
+        rows.extend(chunk_rows)
+        quarantine.extend(chunk_quarantine)
+        for reason, count in chunk_repairs.items():
+            repairs[reason] = repairs.get(reason, 0) + count
+
+    degree = pd.DataFrame(rows, columns=degree_columns)
+    for c in ['degree_id', 'academic', 'year', 'msc']:
+        degree[c] = degree[c].astype('int64')
+    for c in ['thesis', 'degree_type']:
+        degree[c] = degree[c].fillna("")
+
+    quarantine = pd.DataFrame(quarantine, columns=['line', 'reason', 'text'])
+    return degree, repairs, quarantine
+
+
+""" ingest_dump:
+    input:  dump_folder: a raw MGP dump, e.g. './MGP_official/geneal_20190711'
+            out_folder: where to write the clean tables
+            processes: number of worker processes (None: one per core)
+            columnar: boolean: if True, also write the tables in the
+                      columnar format of mgp_columnar (out_folder/columnar_folder)
+            chunk_lines: number of degree.csv lines per chunk
+    output: a dict { table name: pd.DataFrame } of the clean tables, which are
+            also written as out_folder/<table>.pickle; the unrepaired degree
+            lines are written to out_folder/degree_quarantine.tsv. A split
+            dual degree has the degree_grant rows of its entry.
+"""
+def ingest_dump(dump_folder, out_folder=".", processes=None, columnar=False,
+                chunk_lines=50000):
+    os.makedirs(out_folder, exist_ok=True)
+    tables = dict()
+    with multiprocessing.Pool(processes) as pool:
+        # the plain tables load in the background while degree is repaired
+        pending = dict()
+        for name in plain_tables:
+            filename = os.path.join(dump_folder, f"{name}.tsv")
+            if os.path.exists(filename):
+                pending[name] = pool.apply_async(read_plain_table, (filename,))
+            else:
+                print(f"ingest_dump: no {filename}, skipping.")
+
+        degree_file = os.path.join(dump_folder, "degree.csv")
+        if os.path.exists(degree_file):
+            degree, repairs, quarantine = ingest_degree(degree_file, pool, chunk_lines)
+            tables['degree'] = degree
+            quarantine.to_csv(os.path.join(out_folder, "degree_quarantine.tsv"),
+                              sep='\t', index=False)
+            print(f"ingest_dump: degree: {len(degree)} rows, repairs {repairs}, "
+                  f"{len(quarantine)} lines quarantined.")
+        else:
+            print(f"ingest_dump: no {degree_file}, skipping.")
+
+        for name, result in pending.items():
+            tables[name] = result.get()
+            print(f"ingest_dump: {name}: {len(tables[name])} rows.")
+
+    if 'degree' in tables and 'degree_grant' in tables:
+        tables['degree_grant'] = copy_split_grants(tables['degree_grant'], tables['degree'])
+
+    for name, df in tables.items():
+        with open(os.path.join(out_folder, f"{name}.pickle"), "wb") as f:
+            pickle.dump(df, f)
+        if columnar:
+            export_table(df, name, os.path.join(out_folder, columnar_folder))
+    return tables
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ------------
+#  BEGIN MAIN
+# ------------
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Ingest a raw MGP dump.")
+    parser.add_argument("dump_folder", help="e.g. ./MGP_official/geneal_20190711")
+    parser.add_argument("out_folder", nargs="?", default=".")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--columnar", action="store_true",
+                        help="also write the memory-mappable columnar tables")
+    args = parser.parse_args()
+    ingest_dump(args.dump_folder, args.out_folder, args.processes, args.columnar)
+
+# ------------
+#   END  MAIN
+# ------------
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 12:10:00 2026
+
+@mcarlisle
+
+# Whole-genealogy lineage statistics: for every academic,
+# the number of direct students, descendants and ancestors,
+# and the generation depth, computed in one pass over the advises DAG
+# instead of one build_lineage_academic_list call per academic.
+# Self-loops are dropped and advising cycles condensed to one node each
+# (strongly connected components), so the graph the counts run on is a DAG.
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+import os
+from scipy.sparse.csgraph import connected_components
+from mgp_functions import *
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+# cached in the data folder, next to academic.pickle, and rebuilt when
+# the tables change (or with load_lineage_stats(rebuild=True))
+lineage_stats_file = "academic_lineage_stats.pickle"
+
+# the tables the stats are computed from
+lineage_tables = ["academic", "advises"]
+
+# number of set bits in each byte value
+POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" gather_neighbors:
+    input:  ptr, neighbors: one direction of the advice index
+                            (see build_advice_index)
+            nodes: np.array of positions
+    output: (lengths, flat): lengths[i] is the number of neighbors of nodes[i],
+            and flat is all of their neighbors, concatenated in order of nodes.
+"""
+def gather_neighbors(ptr, neighbors, nodes):
+    starts, lengths = ptr[nodes], ptr[nodes + 1] - ptr[nodes]
+    offsets = np.arange(lengths.sum()) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return lengths, neighbors[offsets]
+
+
+""" condense_advice_index:
+    input:  index: output of build_advice_index
+    output: (dag, component): dag is an advice index over the strongly
+            connected components of index (positions 0..k-1, 'ids' their
+            component numbers), with an edge between two components when
+            any of their members have one; component[p] is the component
+            of position p. Self-loops and the edges inside a cycle are dropped.
+"""
+def condense_advice_index(index):
+    n = len(index['ids'])
+    src = np.repeat(np.arange(n), np.diff(index['advisees_ptr']))
+    dst = index['advisees']
+    graph = sp.csr_matrix((np.ones(len(dst), dtype=np.int8), (src, dst)), shape=(n, n))
+    k, component = connected_components(graph, directed=True, connection='strong')
+    between = component[src] != component[dst]
+    edges = np.unique(np.stack([component[src[between]], component[dst[between]]], axis=1), axis=0)
+
+    def csr(rows, cols):
+        order = np.lexsort((cols, rows))
+        ptr = np.zeros(k + 1, dtype=np.int64)
+        ptr[1:] = np.cumsum(np.bincount(rows, minlength=k))
+        return ptr, cols[order]
+
+    advisees_ptr, advisees = csr(edges[:, 0], edges[:, 1])
+    advisors_ptr, advisors = csr(edges[:, 1], edges[:, 0])
+    dag = { 'ids': np.arange(k),
+            'advisees_ptr': advisees_ptr, 'advisees': advisees,
+            'advisors_ptr': advisors_ptr, 'advisors': advisors }
+    return dag, component.astype(np.int64)
+
+
+""" advice_levels:
+    input:  index: output of build_advice_index
+            get_advisors: boolean: if True, the generation depth: the longest
+                                chain of advisors back to someone without one;
+                            if False, the height: the longest chain of
+                                students forward to someone without one.
+    output: np.array of levels by position in index['ids'];
+            -1 for anyone on (or behind) a cycle in advises.
+
+    note: Kahn's algorithm, one whole level at a time, so that every
+          academic is placed after all of their advisors (resp. students).
+"""
+def advice_levels(index, get_advisors=True):
+    before, after = ('advisors', 'advisees') if get_advisors else ('advisees', 'advisors')
+    n = len(index['ids'])
+    pending = np.diff(index[f"{before}_ptr"])  # unplaced advisors (resp. students)
+    levels = np.full(n, -1, dtype=np.int64)
+
+    level = 0
+    frontier = np.flatnonzero(pending == 0)
+    while len(frontier) > 0:
+        levels[frontier] = level
+        _, nxt = gather_neighbors(index[f"{after}_ptr"], index[after], frontier)
+        pending = pending - np.bincount(nxt, minlength=n)
+        nxt = np.unique(nxt)
+        frontier = nxt[pending[nxt] == 0]
+        level += 1
+    return levels
+
+
+""" popcount_rows:
+    input:  bits: 2-D np.array of np.uint64
+    output: np.array of the number of set bits in each row of bits.
+"""
+def popcount_rows(bits):
+    if hasattr(np, 'bitwise_count'):  # NumPy >= 2.0
+        return np.bitwise_count(bits).sum(axis=1, dtype=np.int64)
+    return POPCOUNT_TABLE[bits.view(np.uint8)].sum(axis=1)
+
+
+""" count_reachable:
+    input:  index: output of build_advice_index
+            get_advisors: boolean: if True, count ancestors;
+                                   if False, count descendants.
+            block_words: number of 64-bit words per bitset block
+    output: np.array of counts by position in index['ids']
+            (not counting the academic themself; the other members of
+            their advising cycle, if any, do count).
+
+    note: the counts run on the condensed index (condense_advice_index),
+          whose academics are split into blocks of 64 * block_words.
+          For each block, every component carries a bitset of which block
+          members it reaches (starting with its own), built in topological
+          order as the OR of its advisors' (resp. students') bitsets, then
+          popcounted. Memory is the number of components * block_words * 8
+          bytes, whatever the lineage sizes.
+"""
+def count_reachable(index, get_advisors=True, block_words=32):
+    which = 'advisors' if get_advisors else 'advisees'
+    n = len(index['ids'])
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    dag, component = condense_advice_index(index)
+    ptr, neighbors = dag[f"{which}_ptr"], dag[which]
+    k = len(dag['ids'])
+
+    # every component's neighbors in that direction sit on a strictly lower level
+    levels = advice_levels(dag, get_advisors=get_advisors)
+    order = np.argsort(levels, kind='stable')
+    bounds = np.searchsorted(levels[order], np.arange(levels.max() + 2))
+    by_level = [order[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+    by_level = [(nodes,) + gather_neighbors(ptr, neighbors, nodes) for nodes in by_level]
+    by_level = [(nodes[lengths > 0], lengths[lengths > 0], flat)
+                for nodes, lengths, flat in by_level if len(flat) > 0]
+
+    counts = np.zeros(n, dtype=np.int64)
+    block_size = 64 * block_words
+    for first in range(0, n, block_size):
+        members = np.arange(first, min(first + block_size, n))
+        bits = np.zeros((k, block_words), dtype=np.uint64)
+        np.bitwise_or.at(bits, (component[members], (members - first) // 64),
+                         np.left_shift(np.uint64(1), ((members - first) % 64).astype(np.uint64)))
+
+        for nodes, lengths, flat in by_level:
+            segments = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+            bits[nodes] |= np.bitwise_or.reduceat(bits[flat], segments, axis=0)
+
+        counts += popcount_rows(bits)[component]
+    return counts - 1
+
+
+""" compute_lineage_stats:
+    input:  index: output of build_advice_index (default: get_advice_index())
+            academic_ids: list-like of all academic ids to report
+                          (default: mgp_data.academic['academic_id'])
+    output: a pd.DataFrame, one row per academic_id:
+        { 'academic_id', 'students' (direct, not counting themself),
+          'descendants', 'ancestors', 'generation' (0 = no recorded
+          advisor; the academics of an advising cycle share one) }
+"""
+def compute_lineage_stats(index=None, academic_ids=None):
+    if index is None:
+        index = get_advice_index()
+    if academic_ids is None:
+        academic_ids = mgp_data.academic['academic_id']
+
+    n = len(index['ids'])
+    dag, component = condense_advice_index(index)
+    advisor = np.repeat(np.arange(n), np.diff(index['advisees_ptr']))
+    self_loops = np.bincount(advisor[advisor == index['advisees']], minlength=n)
+    stats = pd.DataFrame({ 'academic_id': index['ids'],
+                           'students':    np.diff(index['advisees_ptr']) - self_loops,
+                           'descendants': count_reachable(index, get_advisors=False),
+                           'ancestors':   count_reachable(index, get_advisors=True),
+                           'generation':  advice_levels(dag, get_advisors=True)[component] })
+    cycles = (np.bincount(component, minlength=len(dag['ids'])) > 1)[component].sum()
+    if cycles > 0:
+        print(f"{cycles} academics are in advising cycles; each cycle counts as one academic.")
+
+    # academics that never show up in advises have no lineage at all
+    everyone = pd.DataFrame({'academic_id': np.asarray(academic_ids, dtype=np.int64)})
+    stats = everyone.merge(stats, on='academic_id', how='left')
+    stats = stats.fillna(0).astype('int64')
+    return stats
+
+
+""" load_lineage_stats:
+    input:  filename: pickle of the output of compute_lineage_stats
+                      (default: lineage_stats_file in the data folder)
+            rebuild: boolean: if True, recompute and overwrite filename.
+    output: the lineage stats pd.DataFrame (see compute_lineage_stats).
+
+    note: the pickle keeps the fingerprint of the advises and academic
+          tables it was computed from (see MGPData.fingerprint); it is
+          recomputed when they no longer match, e.g. after a new dump.
+"""
+def load_lineage_stats(filename=None, rebuild=False):
+    if filename is None:
+        filename = os.path.join(mgp_data.folder, lineage_stats_file)
+    fingerprint = mgp_data.fingerprint(lineage_tables)
+    if not rebuild and os.path.exists(filename):
+        with open(filename, "rb") as f:
+            saved = pickle.load(f)
+        if isinstance(saved, dict) and saved.get('fingerprint') == fingerprint:
+            return saved['stats']
+        print(f"load_lineage_stats: {filename} is out of date, recomputing.")
+    stats = compute_lineage_stats()
+    with open(filename, "wb") as f:
+        pickle.dump({'fingerprint': fingerprint, 'stats': stats}, f)
+    return stats
+
+
+""" lineage_leaderboard:
+    input:  stats: output of compute_lineage_stats
+            by: column of stats to rank on
+            n: number of academics to keep
+    output: the top n rows of stats by the column by,
+            joined with the academic table.
+"""
+def lineage_leaderboard(stats, by='descendants', n=50):
+    top = stats.nlargest(n, by)
+    return top.merge(mgp_data.academic, on='academic_id', how='left')
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ------------
+#  BEGIN MAIN
+# ------------
+
+if __name__ == "__main__":
+
+    stats = load_lineage_stats(rebuild=True)
+    print(lineage_leaderboard(stats, n=25))
+
+# ------------
+#   END  MAIN
+# ------------
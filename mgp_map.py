@@ -14,7 +14,8 @@ Created: Sat Jul 27 16:44:41 2019
 # https://gist.github.com/graydon/11198540
 from country_bounding_boxes import country_bounding_boxes
 from mgp_functions import *
-import pickle
+from mgp_spatial import schools_in_region
+from mgp_metrics import instrument, note
 # -------------------------
 #   END  IMPORT STATEMENTS
 # -------------------------
@@ -23,17 +24,9 @@ import pickle
 # ------------------------
 #  START GLOBAL VARIABLES 
 # ------------------------
-degree_file = "degree.pickle"
-with open(degree_file, "rb") as f:
-    degree = pickle.load(f)
-degree_grant_file = "degree_grant.pickle"
-with open(degree_grant_file, "rb") as f:
-    degree_grant = pickle.load(f)
-school_file = "school.pickle"
-with open(school_file, "rb") as f:
-    school = pickle.load(f)
-    
-degree_with_year = degree[degree['year']>-1].copy()
+# degree, degree_grant, school and degree_with_year (degree[degree['year']>-1])
+# are loaded on first use from the shared data context mgp_data (see mgp_data.py);
+# mgp_map.degree, mgp_map.degree_with_year, etc. work through __getattr__ below.
 
 """ box coordinates for Basemap to isolate portions of the globe 
     corresponding to (lllon,lllat,urlon,urlat) in generate_mgp_map
@@ -42,14 +35,14 @@ world  = (-180, -90, 180, 90)
 # to get all of Europe, we use th lower left corner of Portugal 
 # and the upper right corner of Finland
 Europe = (-9.52657060387, 36.838268541, 31.5160921567, 70.1641930203)
+USA    = (-171.791110603, 18.91619, -66.96466, 71.3577635769)
 
 
 """ 
 """
 ten_year_ranges_agg = build_year_ranges(first=1290, last=2019, inc=9, over=10)
-binned_degrees_agg  = put_data_under_year_ranges(list(degree_with_year['degree_id']), 
-                                                 list(degree_with_year['year']), 
-                                                 ten_year_ranges_agg)
+# binned_degrees_agg (degree_with_year binned under ten_year_ranges_agg) 
+# is computed on first access, through __getattr__ below.
 # ------------------------
 #   END  GLOBAL VARIABLES 
 # ------------------------
@@ -60,38 +53,71 @@ binned_degrees_agg  = put_data_under_year_ranges(list(degree_with_year['degree_i
 # ----------------------------
 
 """ aggs:
-    input:  
+    input:  degree_with_year: degree rows with a year (degree['year']>-1)
+            f, l, i, o: first, last, inc(rement), over(lap), 
+                        as for build_year_ranges
+            region: None for the whole world, or a region to restrict 
+                    the counts to (a bbox, a name in mgp_spatial.regions 
+                    or a country code); only its schools are counted
+            degree_grant, school: the tables (default: mgp_data's)
         
-    output: 
+    output: a dict, as for restructure_schools_for_map, of 
+        { key = year_range
+          value = a dict:
+              { key = (lng, lat)
+                value = number of degrees granted there 
+                        from year f up to the end of year_range } }
+        ready for generate_mgp_map.
+
+    note: the year ranges are cut into non-overlapping base bins (between 
+          consecutive range starts/ends), degrees are counted once into a 
+          sparse bins x locations matrix, and the running total along the 
+          bins is read off at each range's end. Overlapping ranges (o < i) 
+          are therefore not double-counted, and years in gaps between 
+          ranges (o > i) are not dropped.
 """
-def aggs(degree_with_year, f=1290, l=2019, i=9, o=10):
+@instrument('aggregate')
+def aggs(degree_with_year, f=1290, l=2019, i=9, o=10, region=None,
+         degree_grant=None, school=None):
 
     year_ranges_agg = build_year_ranges(first=f, last=l, inc=i, over=o)
-    binned_degrees_agg  = put_data_under_year_ranges(list(degree_with_year['degree_id']), 
-                                                     list(degree_with_year['year']), 
-                                                     year_ranges_agg)
-    
-    binned_schools_agg = bin_schools_by_time_frame(binned_degrees_agg)
-    # NOTE: this dictionary does NOT have aggregated counts!
-    # We need to do that now.
-    
+    starts, ends = year_range_bounds(year_ranges_agg)
+    edges = np.unique(np.concatenate([starts, ends]))
+
+    # place every degree at its school's location
+    degrees = degree_with_year[['degree_id', 'year']].rename(columns={'degree_id': 'degree'})
+    degrees = degrees[(degrees['year'] >= edges[0]) & (degrees['year'] < edges[-1])]
+    school = mgp_data.school if school is None else school
+    school_info = school[['school_id', 'lat', 'lng']]\
+                    .drop_duplicates('school_id', keep='first')\
+                    .rename(columns={'school_id': 'school'})
+    placed = degrees.merge(granting_schools(degree_grant), on='degree', how='inner')\
+                    .merge(school_info, on='school', how='inner')
+    print(f"total number of errors: {len(degrees) - len(placed)} out of {len(degrees)} placed.")
+    note(rows=len(degrees), errors=len(degrees) - len(placed))
+    if region is not None:
+        placed = placed[placed['school'].isin(schools_in_region(region, school))]
+
+    # degree counts per (base bin, location)
+    location, locations = pd.factorize(pd.MultiIndex.from_arrays([placed['lng'], placed['lat']]))
+    base_bin = np.searchsorted(edges, placed['year'].to_numpy(), side='right') - 1
+    counts = sp.coo_matrix((np.ones(len(placed), dtype=np.int64), (base_bin, location)),
+                           shape=(len(edges) - 1, len(locations))).tocsr()
+
+    # running totals, read off at the end of each year range
+    ends_at = np.searchsorted(edges, ends)
+    running = np.zeros(len(locations), dtype=np.int64)
+    totals_at = dict()
+    done = 0
+    for e in np.unique(ends_at):
+        running += np.asarray(counts[done:e].sum(axis=0)).ravel()
+        totals_at[e] = running.copy()
+        done = e
+
     binned_schools_map_all_agg = {}
-    aggregates = {}
-
-    # TODO check to see if this agrees with restructure_schools_for_map()
-    # with modifications
-    for k, v in binned_schools_agg.items():
-    #    print(k)
-        binned_schools_map_all_agg[k] = {}
-        # NOTE: this assumes our iterations are IN CHRONOLOGICAL ORDER
-        for s, w in v.items():  
-    #        print(s)
-            # build the sums for EVERY school up to this time period
-            # NOTE: This ONLY makes sense for overlap = 0!! otherwise, you're double-counting.
-            aggregates[(w['lng'], w['lat'])] = aggregates.get((w['lng'], w['lat']), 0) + w['count']
-    
-        for loc, count in aggregates.items():
-            binned_schools_map_all_agg[k][loc] = count
+    for k, e in zip(year_ranges_agg, ends_at):
+        nonzero = np.flatnonzero(totals_at[e])
+        binned_schools_map_all_agg[k] = { locations[j]: int(totals_at[e][j]) for j in nonzero }
 
     return binned_schools_map_all_agg
 
@@ -107,7 +133,7 @@ def generate_aggregate_world(degree_with_year):
 
 def generate_aggregate_USA(degree_with_year):
     
-    binned_schools_map_all_agg = aggs(degree_with_year)
+    binned_schools_map_all_agg = aggs(degree_with_year, region=USA)
     generate_mgp_map(school_freq_dict=binned_schools_map_all_agg,
                      folder="mgp_img/", fileprefix="all_mgp_year_agg_USA", 
                      title_prefix="All MGP dissertations (aggregate, USA): ", 
@@ -121,7 +147,7 @@ def generate_aggregate_Europe(degree_with_year):
     # Let's zoom in on Europe in the aggregate map and watch the evolution over all time.
     # lower-left: 'PT': ('Portugal', (-9.52657060387, 36.838268541, -6.3890876937, 42.280468655)),
     # upper-right: 'FI': ('Finland', (20.6455928891, 59.846373196, 31.5160921567, 70.1641930203)),
-    binned_schools_map_all_agg = aggs(degree_with_year)
+    binned_schools_map_all_agg = aggs(degree_with_year, region=Europe)
     generate_mgp_map(school_freq_dict=binned_schools_map_all_agg,
                      folder="mgp_img/", fileprefix="all_mgp_year_agg_Europe", 
                      title_prefix="All MGP dissertations (aggregate, Europe): ", 
@@ -130,6 +156,27 @@ def generate_aggregate_Europe(degree_with_year):
                      urlon=31.5160921567,urlat=70.1641930203)   # Europe
     return None
 
+
+""" __getattr__:
+    module-level attribute access to the tables in mgp_data 
+    (mgp_map.degree, mgp_map.degree_with_year, ...) and to binned_degrees_agg,
+    all computed on first access and kept in mgp_data.
+"""
+def __getattr__(name):
+    if name in mgp_table_names or name == 'degree_with_year':
+        return mgp_data.get(name)
+    if name == 'binned_degrees_agg':
+        degree_with_year = mgp_data.degree_with_year
+        return mgp_data.cached('binned_degrees_agg', lambda: \
+            put_data_under_year_ranges(list(degree_with_year['degree_id']), 
+                                       list(degree_with_year['year']), 
+                                       ten_year_ranges_agg))
+    raise AttributeError(f"module {__name__} has no attribute {name}")
+
+
+# "from mgp_map import *" also brings degree (only), as the notebooks expect
+__all__ = [name for name in list(globals()) if not name.startswith('_')] + ['degree']
+
 # ----------------------------
 #   END  FUNCTION DEFINITIONS 
 # ----------------------------
@@ -141,6 +188,8 @@ def generate_aggregate_Europe(degree_with_year):
 
 if __name__ == "__main__":
 
+    degree_with_year = mgp_data.degree_with_year
+
     # Let's map everyone in ten-year increments with five-year overlap
     ten_year_ranges = build_year_ranges(first=1290, last=2019, inc=10, over=5)
     binned_degrees  = put_data_under_year_ranges(list(degree_with_year['degree_id']), 
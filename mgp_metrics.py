@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 22:10:00 2026
+
+@mcarlisle
+
+# Light instrumentation of the pipeline stages (load, bin, aggregate,
+# render, classify), and the progress bars of long loops.
+# Every stage run records its wall and CPU time, the rows it processed,
+# the process's peak RSS, and the hits and misses of the registered caches
+# (mgp_data.cached, the frame templates, the MSC classifier) while it ran:
+#     with stage('render') as s:            @instrument('aggregate')
+#         ...                               def aggs(...):
+#         s['rows'] = len(frames)               ...; note(rows=len(placed))
+# Records go to the shared report, metrics, one JSON line each to the
+# "mgp_metrics" logger (and log_file, if set); the report keeps the last
+# max_records of them and running totals per stage: metrics.save() writes
+# the JSON report, metrics.summary() the totals per stage.
+# A stage can also be profiled: with cProfile, or by sampling the stack
+# of its thread every few milliseconds.
+# progress() is the progress bar of the pipeline: on the terminal, in a
+# notebook, or none, as set by configure(progress=...) or the MGP_PROGRESS
+# environment variable (default 'auto': notebook in Jupyter, else terminal).
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+from collections import Counter, deque
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+try:
+    import resource  # not on Windows: no peak RSS there
+except ImportError:
+    resource = None
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+progress_modes = ["auto", "terminal", "notebook", "none"]
+progress_mode = os.environ.get("MGP_PROGRESS", "auto")
+
+# name -> function returning {'hits': int, 'misses': int}, see register_cache
+cache_sources = dict()
+
+# seconds between two stack samples of a sampled stage
+sample_interval = 0.005
+
+# lines of the profile kept in a stage's record
+profile_lines = 25
+
+# stage records kept by a MetricsReport (the oldest are dropped first;
+# the totals of summary() still count them)
+max_records = 10000
+
+logger = logging.getLogger("mgp_metrics")
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" configure:
+    input:  progress: one of progress_modes (None: unchanged)
+            log_file: file to append each stage record to, as a JSON line
+                      (None: unchanged; "" for none)
+            profile_folder: folder to write the profiles of profiled stages
+                      to (None: unchanged; "" for none)
+    output: None.
+"""
+def configure(progress=None, log_file=None, profile_folder=None):
+    global progress_mode
+    if progress is not None:
+        assert progress in progress_modes, f"configure: progress is one of {progress_modes}"
+        progress_mode = progress
+    if log_file is not None:
+        metrics.log_file = log_file or None
+    if profile_folder is not None:
+        metrics.profile_folder = profile_folder or None
+
+
+""" in_notebook:
+    input:  None
+    output: True when running in a Jupyter (IPython kernel) session.
+"""
+def in_notebook():
+    shell = sys.modules.get("IPython")
+    if shell is None:
+        return False
+    ipython = shell.get_ipython()
+    return ipython is not None and "IPKernelApp" in getattr(ipython, "config", {})
+
+
+""" progress:
+    input:  iterable: the loop to show progress of
+            total: its length, if it has none (e.g. pool.imap)
+            desc: label of the bar
+            mode: one of progress_modes (default: progress_mode)
+    output: iterable, wrapped in a tqdm bar for the terminal or the notebook,
+            or as it is for 'none'. A notebook bar that cannot be shown
+            (no ipywidgets) falls back to the terminal one.
+"""
+def progress(iterable, total=None, desc=None, mode=None):
+    mode = progress_mode if mode is None else mode
+    if mode == "auto":
+        mode = "notebook" if in_notebook() else "terminal"
+    if mode == "none":
+        return iterable
+    if mode == "notebook":
+        try:
+            import ipywidgets  # tqdm's notebook bar is an ipywidgets widget
+            from tqdm.notebook import tqdm as notebook_tqdm
+            return notebook_tqdm(iterable, total=total, desc=desc)
+        except ImportError:
+            pass
+    from tqdm import tqdm
+    return tqdm(iterable, total=total, desc=desc, file=sys.stderr)
+
+
+""" register_cache:
+    input:  name: name of a cache, as it appears in stage records
+            stats: function returning a dict with (at least) 'hits' and
+                   'misses' so far
+    output: None. Stages record the hits and misses of the cache while they run.
+"""
+def register_cache(name, stats):
+    cache_sources[name] = stats
+
+
+""" cache_counts:
+    input:  None
+    output: dict of { cache name: (hits, misses) } of the registered caches.
+"""
+def cache_counts():
+    counts = dict()
+    for name, stats in list(cache_sources.items()):
+        try:
+            s = stats()
+        except Exception:
+            continue
+        if s is not None:
+            counts[name] = (int(s['hits']), int(s['misses']))
+    return counts
+
+
+""" peak_rss:
+    input:  None
+    output: the peak resident set size of this process so far, in bytes
+            (None where the resource module is missing).
+"""
+def peak_rss():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(peak) if sys.platform == "darwin" else int(peak) * 1024  # kB on Linux
+
+
+""" stage:
+    input:  name: the stage (load, bin, aggregate, render, classify, ...)
+            profile: None, 'cprofile' or 'sample'
+            fields: more fields of the record (e.g. table='degree')
+    output: a context manager recording the stage in the shared report,
+            metrics (see MetricsReport.stage).
+"""
+def stage(name, profile=None, **fields):
+    return metrics.stage(name, profile, **fields)
+
+
+""" note:
+    input:  fields: fields to set in the record of the innermost running
+                    stage of this thread (e.g. rows=len(data), errors=3)
+    output: None (nothing happens outside a stage).
+"""
+def note(**fields):
+    running = metrics.running()
+    if running is not None:
+        running.update(fields)
+
+
+""" instrument:
+    input:  name: the stage of the decorated function
+            profile: as for stage
+    output: a decorator running the function as a stage of the shared
+            report; the record's 'function' is the function's name, and
+            the function may note() its rows.
+"""
+def instrument(name, profile=None):
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with metrics.stage(name, profile, function=function.__name__):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ----------------------------
+#  START CLASS DEFINITIONS
+# ----------------------------
+""" StackSampler:
+    input:  thread_id: the thread to sample (default: the calling thread)
+            interval: seconds between samples
+
+    A sampling profiler: while running (start/stop, or as a context
+    manager), a background thread reads the stack of thread_id every
+    interval seconds. stacks counts the samples per collapsed stack
+    ("file:function;file:function;...", outermost first: the input of
+    flame graph tools); top(n) counts them per innermost function.
+"""
+class StackSampler:
+
+    def __init__(self, thread_id=None, interval=sample_interval):
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.running = threading.Event()
+        self.thread = None
+
+    def sample(self):
+        while self.running.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if len(names) > 0:
+                self.stacks[";".join(reversed(names))] += 1
+            time.sleep(self.interval)
+
+    def start(self):
+        self.running.set()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running.clear()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def top(self, n=profile_lines):
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(n)
+
+
+""" MetricsReport:
+    input:  log_file: file to append each record to, as a JSON line (or None)
+            profile_folder: folder for the profiles of profiled stages (or None)
+            max_records: number of records kept (see max_records)
+
+    stage(name, profile, **fields) is a context manager yielding the
+    stage's record, a dict, which the stage may fill in (rows, errors, ...);
+    on exit the record gets 'seconds', 'cpu_seconds', 'peak_rss_bytes'
+    (and how much it grew), 'caches' (hits, misses and hit_rate of each
+    registered cache during the stage) and, if profiled, 'profile' (the top
+    lines); it is then logged, kept in records (the last max_records)
+    and added to the totals of its stage. Stages nest.
+    save(filename) writes the JSON report; summary() gives the totals per stage.
+"""
+class MetricsReport:
+
+    def __init__(self, log_file=None, profile_folder=None, max_records=max_records):
+        self.log_file = log_file
+        self.profile_folder = profile_folder
+        self.records = deque(maxlen=max_records)
+        self.totals = dict()
+        self.added = 0
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.created = time.time()
+
+    def running(self):
+        stack = getattr(self.local, 'stack', [])
+        return stack[-1] if len(stack) > 0 else None
+
+    @contextlib.contextmanager
+    def stage(self, name, profile=None, **fields):
+        assert profile in (None, 'cprofile', 'sample'), \
+               "stage: profile is None, 'cprofile' or 'sample'"
+        record = {'stage': name, 'rows': None}
+        record.update(fields)
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        self.local.stack.append(record)
+        caches, rss = cache_counts(), peak_rss()
+        profiler = cProfile.Profile() if profile == 'cprofile' else \
+                   StackSampler() if profile == 'sample' else None
+        record['started'] = time.time()
+        start, cpu = time.perf_counter(), time.process_time()
+        if profile == 'cprofile':
+            profiler.enable()
+        elif profile == 'sample':
+            profiler.start()
+        try:
+            yield record
+        except BaseException as error:
+            record['error'] = f"{type(error).__name__}: {error}"
+            raise
+        finally:
+            if profile == 'cprofile':
+                profiler.disable()
+            elif profile == 'sample':
+                profiler.stop()
+            record['seconds'] = time.perf_counter() - start
+            record['cpu_seconds'] = time.process_time() - cpu
+            if record['rows'] is not None and record['seconds'] > 0:
+                record['rows_per_second'] = record['rows'] / record['seconds']
+            after = peak_rss()
+            record['peak_rss_bytes'] = after
+            record['peak_rss_growth_bytes'] = None if after is None else after - rss
+            record['caches'] = self.cache_deltas(caches, cache_counts())
+            if profiler is not None:
+                record['profile'] = self.profile_lines(profiler, name)
+            self.local.stack.pop()
+            self.add(record)
+
+    def cache_deltas(self, before, after):
+        deltas = dict()
+        for name, (hits, misses) in after.items():
+            hits -= before.get(name, (0, 0))[0]
+            misses -= before.get(name, (0, 0))[1]
+            if hits + misses > 0:
+                deltas[name] = {'hits': hits, 'misses': misses,
+                                'hit_rate': hits / (hits + misses)}
+        return deltas
+
+    def profile_lines(self, profiler, name):
+        path = None
+        if self.profile_folder is not None:
+            os.makedirs(self.profile_folder, exist_ok=True)
+            path = os.path.join(self.profile_folder, f"{name}_{self.added}")
+        if isinstance(profiler, StackSampler):
+            if path is not None:
+                with open(path + ".stacks", "w") as f:
+                    f.writelines(f"{s} {c}\n" for s, c in profiler.stacks.items())
+            return [f"{count:6d} {leaf}" for leaf, count in profiler.top()]
+        if path is not None:
+            profiler.dump_stats(path + ".prof")
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(profile_lines)
+        return [line for line in text.getvalue().splitlines() if line.strip()]
+
+    def add(self, record):
+        line = json.dumps(record, default=str)
+        with self.lock:
+            self.records.append(record)
+            self.added += 1
+            totals = self.totals.setdefault(record['stage'], {
+                'calls': 0, 'seconds': 0.0, 'cpu_seconds': 0.0, 'rows': 0,
+                'peak_rss_bytes': None})
+            totals['calls'] += 1
+            totals['seconds'] += record.get('seconds') or 0.0
+            totals['cpu_seconds'] += record.get('cpu_seconds') or 0.0
+            totals['rows'] += record.get('rows') or 0
+            if record.get('peak_rss_bytes') is not None:
+                totals['peak_rss_bytes'] = max(totals['peak_rss_bytes'] or 0,
+                                               record['peak_rss_bytes'])
+            if self.log_file is not None:
+                with open(self.log_file, "a") as f:
+                    f.write(line + "\n")
+        logger.info(line)
+
+    def summary(self):
+        import pandas as pd
+        columns = ['stage', 'calls', 'seconds', 'cpu_seconds', 'rows', 'rows_per_second',
+                   'peak_rss_bytes']
+        with self.lock:
+            table = pd.DataFrame([dict(stage=name, **totals)
+                                  for name, totals in self.totals.items()],
+                                 columns=[c for c in columns if c != 'rows_per_second'])
+        table['rows_per_second'] = table['rows'] / table['seconds'].where(table['seconds'] > 0)
+        return table[columns]
+
+    def to_dict(self):
+        with self.lock:
+            records = list(self.records)
+        return {'created': self.created, 'pid': os.getpid(),
+                'peak_rss_bytes': peak_rss(), 'stages_recorded': self.added,
+                'caches': {name: {'hits': h, 'misses': m}
+                           for name, (h, m) in cache_counts().items()},
+                'stages': records}
+
+    def save(self, filename):
+        with open(filename, "w") as f:
+            json.dump(self.to_dict(), f, indent=1, default=str)
+
+    def reset(self):
+        with self.lock:
+            self.records.clear()
+            self.totals = dict()
+            self.added = 0
+        self.created = time.time()
+
+# ----------------------------
+#   END  CLASS DEFINITIONS
+# ----------------------------
+
+
+# ------------------------
+#  START SHARED REPORT
+# ------------------------
+
+# the report every instrumented stage of this process records to
+metrics = MetricsReport()
+
+# ------------------------
+#   END  SHARED REPORT
+# ------------------------
@@ -0,0 +1,788 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 22:45:00 2026
+
+@mcarlisle
+
+# The derived artifacts of the project (binned_schools, the aggregate map
+# frames and movies, the degree cube and its msc_per_* frames, the lineage
+# stats, the topic model and its t-SNE map) as one DAG of stages, rebuilt
+# from a new MGP dump with as little work as possible:
+#     python mgp_pipeline.py ./MGP_official/geneal_20191013 [--targets ...]
+#     python mgp_pipeline.py . --export .     (clean tables; write the pickles)
+# Every stage output is kept in a content-addressed artifact store, under a
+# key hashing the stage's name and parameters (e.g. the build_year_ranges
+# arguments, the Basemap bbox) and the keys of its inputs; the key of an
+# MGP table hashes its rows. A stage whose key is in the store is not run.
+# When a table only gained rows since the stage last ran (new degrees, new
+# advises edges, ...), a stage with a delta function updates its previous
+# output with just those rows instead of rebuilding; anything else
+# (a changed or removed row, new parameters) rebuilds it from scratch.
+# Map frames are cached one by one, so a new dump re-renders only the
+# frames whose points changed.
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+import argparse
+import hashlib
+import json
+import numpy as np
+import os
+import pandas as pd
+import pickle
+import shutil
+import tempfile
+import time
+from mgp_data import MGPData, mgp_data, mgp_table_names
+from mgp_metrics import stage
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+artifact_folder = "mgp_artifacts"
+
+# the year ranges of binned_schools (notebook 2), and of the aggregate maps (mgp_map)
+binned_year_ranges = dict(first=1290, last=2019, inc=10, over=5)
+aggregate_year_ranges = dict(f=1290, l=2019, i=9, o=10)
+
+# Basemap bounding boxes (lllon, lllat, urlon, urlat), as in mgp_map
+world = (-180, -90, 180, 90)
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" hash_value:
+    input:  value: parameters (anything json can write, or repr) or np.array
+    output: the SHA-256 hex digest of value's canonical form
+            (dicts in key order, tuples as lists).
+"""
+def hash_value(value):
+    digest = hashlib.sha256()
+    if isinstance(value, np.ndarray):
+        digest.update(f"{value.dtype.str}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        digest.update(json.dumps(value, sort_keys=True, default=repr).encode())
+    return digest.hexdigest()
+
+
+""" hash_path:
+    input:  path: a file, or a folder (every file under it, with its
+                   relative name, in name order)
+    output: the SHA-256 hex digest of the contents.
+"""
+def hash_path(path):
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        files = sorted(os.path.relpath(os.path.join(root, name), path)
+                       for root, _, names in os.walk(path) for name in names)
+    else:
+        files, path = [os.path.basename(path)], os.path.dirname(path)
+    for name in files:
+        digest.update(name.encode() + b"\0")
+        with open(os.path.join(path, name), "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+""" row_hashes:
+    input:  table: pd.DataFrame
+    output: np.array of np.uint64, one hash per row of its values
+            (not its index), as pd.util.hash_pandas_object makes them.
+"""
+def row_hashes(table):
+    return pd.util.hash_pandas_object(table, index=False).to_numpy(dtype=np.uint64)
+
+
+""" table_key:
+    input:  table: pd.DataFrame
+            hashes: its row_hashes (computed if None)
+    output: the key of the table: a hash of its columns, dtypes and rows,
+            in order.
+"""
+def table_key(table, hashes=None):
+    hashes = row_hashes(table) if hashes is None else hashes
+    columns = [[str(c), str(t)] for c, t in table.dtypes.items()]
+    digest = hashlib.sha256(json.dumps(columns).encode())
+    digest.update(hashes.tobytes())
+    return digest.hexdigest()
+
+
+""" added_rows:
+    input:  old_hashes: row_hashes of a table as it was
+            table: the table as it is
+            hashes: row_hashes(table) (computed if None)
+    output: the rows of table that are not in the old table, or None if
+            some old row is gone (removed or changed): then the table did
+            not just grow, and no delta applies.
+"""
+def added_rows(old_hashes, table, hashes=None):
+    hashes = row_hashes(table) if hashes is None else hashes
+    if not np.isin(old_hashes, hashes).all():
+        return None
+    return table[~np.isin(hashes, old_hashes)]
+
+
+""" load_dump:
+    input:  dump: None for the tables of mgp_data; a folder of clean tables
+                  (<name>.pickle or mgp_columnar, see MGPData); or a raw MGP
+                  dump folder (geneal_YYYYMMDD, holding degree.csv), which is
+                  ingested once (see mgp_ingest) and kept in store
+            store: the ArtifactStore
+            processes: worker processes of the ingestion
+    output: dict { table name: pd.DataFrame } of mgp_table_names.
+"""
+def load_dump(dump=None, store=None, processes=None):
+    if dump is None:
+        return {name: mgp_data.get(name) for name in mgp_table_names}
+    if not os.path.exists(os.path.join(dump, "degree.csv")):
+        data = MGPData(dump)
+        return {name: data.get(name) for name in mgp_table_names}
+
+    key = hash_path(dump)
+    if store is not None and store.has(key):
+        print(f"load_dump: {dump} was ingested before.")
+        return store.load(key)
+    from mgp_ingest import ingest_dump
+    with tempfile.TemporaryDirectory() as out_folder:
+        tables = ingest_dump(dump, out_folder, processes)
+    tables = {name: tables[name] for name in mgp_table_names}
+    if store is not None:
+        store.save(key, tables)
+    return tables
+
+
+""" delta_degrees:
+    input:  added: dict { table name: rows added } (see Pipeline.run)
+            degree_grant, school: the tables as they are now
+    output: np.array of the degree ids whose placement is new: the added
+            degrees, the degrees whose first grants were all added, and
+            the degrees first granted by an added school (placed now that
+            the school has a row).
+            None if an added row changes a placement made before (a new
+            grant of a degree that had one, a second row for a school id),
+            or if a table other than these three changed.
+"""
+def delta_degrees(added, degree_grant, school):
+    if not set(added) <= {'degree', 'degree_grant', 'school'}:
+        return None
+    if 'school' in added:
+        old_schools = school['school_id'][~school.index.isin(added['school'].index)]
+        if added['school']['school_id'].isin(old_schools).any():
+            return None
+    degree_ids = np.zeros(0, dtype=np.int64)
+    if 'degree' in added:
+        degree_ids = added['degree']['degree_id'].to_numpy(dtype=np.int64)
+    if 'degree_grant' in added:
+        new_grants = added['degree_grant']['degree']
+        old_grants = degree_grant['degree'][~degree_grant.index.isin(new_grants.index)]
+        if new_grants.isin(old_grants).any():
+            return None
+        degree_ids = np.union1d(degree_ids, new_grants.to_numpy(dtype=np.int64))
+    if 'school' in added:
+        grants = degree_grant.drop_duplicates('degree', keep='first')
+        placed = grants.loc[grants['school'].isin(added['school']['school_id']), 'degree']
+        degree_ids = np.union1d(degree_ids, placed.to_numpy(dtype=np.int64))
+    return np.unique(degree_ids)
+
+
+""" bin_degrees:
+    input:  degree: the degree table
+            year_ranges: arguments of build_year_ranges
+    output: the degree ids (with a year) binned by year range, as np.arrays
+            (see put_data_under_year_ranges).
+"""
+def bin_degrees(degree, year_ranges=binned_year_ranges):
+    from mgp_functions import build_year_ranges, put_data_under_year_ranges
+    dated = degree[degree['year'] > -1]
+    return put_data_under_year_ranges(dated['degree_id'].to_numpy(dtype=np.int64),
+                                      dated['year'].to_numpy(), build_year_ranges(**year_ranges))
+
+
+def bin_degrees_delta(previous, added, degree, year_ranges=binned_year_ranges):
+    if set(added) != {'degree'}:
+        return None
+    new = bin_degrees(added['degree'], year_ranges)
+    return {k: np.concatenate([previous[k], new[k]]) for k in previous}
+
+
+""" bin_schools:
+    input:  binned_degrees: output of bin_degrees
+            degree_grant, school: the tables
+    output: binned_schools, as bin_schools_by_time_frame makes it.
+"""
+def bin_schools(binned_degrees, degree_grant, school):
+    from mgp_functions import bin_schools_by_time_frame
+    return bin_schools_by_time_frame(binned_degrees, degree_grant, school)
+
+
+def bin_schools_delta(previous, added, binned_degrees, degree_grant, school):
+    from mgp_functions import bin_schools_by_time_frame
+    degree_ids = delta_degrees(added, degree_grant, school)
+    if degree_ids is None:
+        return None
+    new = bin_schools_by_time_frame({k: v[np.isin(v, degree_ids)]
+                                     for k, v in binned_degrees.items()}, degree_grant, school)
+    for k, schools in new.items():
+        for s, w in schools.items():
+            if s in previous[k]:
+                previous[k][s]['count'] += w['count']
+            else:
+                previous[k][s] = w
+    return previous
+
+
+""" aggregate:
+    input:  degree, degree_grant, school: the tables
+            f, l, i, o, region: as for mgp_map.aggs
+    output: aggs(degree with a year, ...): running totals by location.
+"""
+def aggregate(degree, degree_grant, school, region=None, **year_ranges):
+    from mgp_map import aggs
+    return aggs(degree[degree['year'] > -1], region=region,
+                degree_grant=degree_grant, school=school, **year_ranges)
+
+
+def aggregate_delta(previous, added, degree, degree_grant, school, region=None, **year_ranges):
+    from mgp_map import aggs
+    degree_ids = delta_degrees(added, degree_grant, school)
+    if degree_ids is None:
+        return None
+    dated = degree[(degree['year'] > -1) & degree['degree_id'].isin(degree_ids)]
+    for k, points in aggs(dated, region=region, degree_grant=degree_grant, school=school,
+                          **year_ranges).items():
+        for point, count in points.items():
+            previous[k][point] = previous[k].get(point, 0) + count
+    return previous
+
+
+""" cube_cells:
+    input:  degree, degree_grant, school: the tables
+    output: build_cube_cells of them (see mgp_cube).
+"""
+def cube_cells(degree, degree_grant, school):
+    from mgp_cube import build_cube_cells
+    from mgp_spatial import school_countries
+    return build_cube_cells(degree, degree_grant, school_countries(school))
+
+
+def cube_cells_delta(previous, added, degree, degree_grant, school):
+    from mgp_cube import build_cube_cells, cube_dimensions
+    from mgp_spatial import school_countries
+    degree_ids = delta_degrees(added, degree_grant, school)
+    # the cube counts every degree, placed or not: a degree granted late
+    # moves out of school -1, which only a rebuild gets right
+    if degree_ids is None or 'degree' not in added or \
+       not np.isin(degree_ids, added['degree']['degree_id']).all():
+        return None
+    new = build_cube_cells(degree[degree['degree_id'].isin(degree_ids)], degree_grant,
+                           school_countries(school))
+    cells = pd.concat([previous, new], ignore_index=True)
+    return cells.groupby(cube_dimensions, sort=True)['count'].sum().reset_index()
+
+
+""" cube_recipe:
+    input:  name: a key of mgp_cube.cube_recipes
+    output: the stage function making that frame from the cube cells
+            and the school table (for the school names).
+"""
+def cube_recipe(name):
+    def build(cells, school):
+        from mgp_cube import DegreeCube, cube_recipes
+        return cube_recipes[name](DegreeCube(cells, school))
+    return build
+
+
+""" lineage_stats:
+    input:  advice_index: output of build_advice_index
+            academic: the academic table
+    output: compute_lineage_stats (see mgp_lineage_stats). A new advises
+            edge changes the counts of every ancestor, so there is no delta.
+"""
+def lineage_stats(advice_index, academic):
+    from mgp_lineage_stats import compute_lineage_stats
+    return compute_lineage_stats(advice_index, academic['academic_id'])
+
+
+def advice_index(advises):
+    from mgp_functions import build_advice_index
+    return build_advice_index(advises)
+
+
+""" topic_model:
+    input:  degree: the degree table
+            n_components, passes: as for msc_topics.OnlineTopicModel and its fit_degrees
+    output: the OnlineTopicModel of the thesis titles; the delta folds the
+            added titles in (OnlineTopicModel.fold_in_degrees).
+"""
+def topic_model(degree, n_components=10, passes=1):
+    from msc_topics import OnlineTopicModel
+    return OnlineTopicModel(n_components=n_components).fit_degrees(degree, passes)
+
+
+def topic_model_delta(previous, added, degree, n_components=10, passes=1):
+    if set(added) != {'degree'}:
+        return None
+    previous.fold_in_degrees(degree)
+    return previous
+
+
+""" topic_embedding:
+    input:  model: the OnlineTopicModel
+            degree: the degree table
+            max_layout: as for msc_embedding.layout
+    output: the FrozenEmbedding of the topic mixtures of the titled degrees
+            (the t-SNE map of notebook 5), with their .degree_ids; the delta
+            places the added titles on it without moving the others.
+"""
+def topic_embedding(model, degree, max_layout=50000):
+    from msc_embedding import layout
+    from msc_topics import titled_degrees
+    degree_ids, titles = titled_degrees(degree)
+    embedding = layout(model.transform(titles), max_layout=max_layout)
+    embedding.degree_ids = degree_ids
+    embedding.index = None
+    return embedding
+
+
+def topic_embedding_delta(previous, added, model, degree, max_layout=50000):
+    from msc_topics import titled_degrees
+    if set(added) != {'degree'}:
+        return None
+    degree_ids, titles = titled_degrees(degree)
+    new = ~np.isin(degree_ids, previous.degree_ids)
+    if new.any():
+        previous.add(model.transform([t for t, n in zip(titles, new) if n]))
+        previous.degree_ids = np.concatenate([previous.degree_ids, degree_ids[new]])
+    previous.index = None
+    return previous
+
+
+""" render_map_frames:
+    input:  school_freq_dict: output of restructure_schools_for_map or aggs
+            store: the ArtifactStore keeping the frames
+            folder, fileprefix, title_prefix, max_size, processes:
+                    as for generate_mgp_map
+            bbox: (lllon, lllat, urlon, urlat)
+    output: list of (filename, key): the map image of each year range, in
+            folder, and the key it is stored under. A frame's key hashes
+            what it draws; only frames not in store are rendered.
+"""
+def render_map_frames(school_freq_dict, store, folder="mgp_img/", fileprefix="all_mgp_year",
+                      title_prefix="All MGP dissertations: ", max_size=100, bbox=world,
+                      processes=None):
+    from mgp_functions import generate_mgp_map
+    from mgp_render import frame_points
+    os.makedirs(folder, exist_ok=True)
+    frames, missing = [], dict()
+    for k, v in school_freq_dict.items():
+        x, y, c = frame_points(v)
+        key = hash_value(np.concatenate([x, y, c]) if len(c) > 0 else c)
+        key = hash_value(['map_frame', key, f"{title_prefix} {k}", list(bbox), max_size])
+        filename = f"{folder}{fileprefix}_{k[0]}_{k[1]}.png"
+        frames.append((filename, key))
+        if not store.has(key, ".blob"):
+            missing[k] = v
+        elif not os.path.exists(filename):
+            store.get_file(key, filename)
+    if len(missing) > 0:
+        generate_mgp_map(missing, folder=folder, fileprefix=fileprefix,
+                         title_prefix=title_prefix, max_size=max_size,
+                         lllon=bbox[0], lllat=bbox[1], urlon=bbox[2], urlat=bbox[3],
+                         processes=processes)
+        for filename, key in frames:
+            if not store.has(key, ".blob"):
+                store.put_file(filename, key)
+    print(f"render_map_frames: {len(missing)} of {len(frames)} frames rendered.")
+    return frames
+
+
+""" encode_movie:
+    input:  frames: the map image files, in order
+            movie: the movie file
+            framerate: frames per second
+    output: [movie], once the frames are encoded into it (mgp_render.FFmpegWriter).
+"""
+def encode_movie(frames, movie, framerate=3):
+    import matplotlib.pyplot as plt
+    from mgp_render import FFmpegWriter
+    with FFmpegWriter(movie, framerate=framerate) as writer:
+        for filename in frames:
+            rgb = plt.imread(filename)[:, :, :3]
+            writer.write_frame((rgb * 255).round().astype(np.uint8))
+    return [movie]
+
+
+""" mgp_pipeline:
+    input:  store: an ArtifactStore, or its folder
+            processes: worker processes of the map rendering
+    output: the Pipeline of the project's artifacts:
+            binned_degrees, binned_schools, aggregate, degree_cube and the
+            frames of mgp_cube.cube_recipes (msc_per_year_df, ...),
+            advice_index, lineage_stats, topic_model, topic_embedding,
+            and the frames and movie of the two world maps
+            (all_mgp_year.mp4, all_mgp_year_agg.mp4).
+"""
+def mgp_pipeline(store=artifact_folder, processes=None):
+    from mgp_cube import cube_recipes
+    from mgp_functions import restructure_schools_for_map
+    pipeline = Pipeline(store)
+    tables = ['degree', 'degree_grant', 'school']
+    pipeline.add('binned_degrees', bin_degrees, ['degree'],
+                 dict(year_ranges=binned_year_ranges), bin_degrees_delta)
+    pipeline.add('binned_schools', bin_schools, ['binned_degrees', 'degree_grant', 'school'],
+                 delta=bin_schools_delta)
+    pipeline.add('aggregate', aggregate, tables, dict(region=None, **aggregate_year_ranges),
+                 aggregate_delta)
+    pipeline.add('degree_cube', cube_cells, tables, delta=cube_cells_delta)
+    for name in cube_recipes:
+        pipeline.add(name, cube_recipe(name), ['degree_cube', 'school'])
+    pipeline.add('advice_index', advice_index, ['advises'])
+    pipeline.add('lineage_stats', lineage_stats, ['advice_index', 'academic'])
+    pipeline.add('topic_model', topic_model, ['degree'], dict(n_components=10, passes=1),
+                 topic_model_delta)
+    pipeline.add('topic_embedding', topic_embedding, ['topic_model', 'degree'],
+                 dict(max_layout=50000), topic_embedding_delta)
+
+    def frames(restructure=None):
+        def build(freq, **params):
+            freq = restructure(freq) if restructure is not None else freq
+            return render_map_frames(freq, pipeline.store, processes=processes, **params)
+        return build
+
+    pipeline.add('year_frames', frames(restructure_schools_for_map),
+                 ['binned_schools'],
+                 dict(folder="mgp_img/", fileprefix="all_mgp_year",
+                      title_prefix="All MGP dissertations: ", max_size=100, bbox=world),
+                 files=True)
+    pipeline.add('year_movie', encode_movie, ['year_frames'],
+                 dict(movie="all_mgp_year.mp4", framerate=3), files=True)
+    pipeline.add('aggregate_frames', frames(), ['aggregate'],
+                 dict(folder="mgp_img/", fileprefix="all_mgp_year_agg",
+                      title_prefix="All MGP dissertations (aggregate): ",
+                      max_size=3000, bbox=world),
+                 files=True)
+    pipeline.add('aggregate_movie', encode_movie, ['aggregate_frames'],
+                 dict(movie="all_mgp_year_agg.mp4", framerate=3), files=True)
+    return pipeline
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ----------------------------
+#  START CLASS DEFINITIONS
+# ----------------------------
+""" ArtifactStore:
+    input:  folder: where the artifacts are kept
+
+    Artifacts are files folder/objects/<key[:2]>/<key><suffix>, written
+    once under the hash of what made them: pickles (save, load), np.arrays
+    (save_array, load_array) and copies of output files (put_file,
+    get_file, suffix ".blob"). refs (folder/refs.json) records, for each
+    stage, what it last built from; prune(keep) deletes every other key.
+"""
+class ArtifactStore:
+
+    def __init__(self, folder=artifact_folder):
+        self.folder = folder
+        self.refs_file = os.path.join(folder, "refs.json")
+        self.refs = dict()
+        if os.path.exists(self.refs_file):
+            with open(self.refs_file, "r") as f:
+                self.refs = json.load(f)
+
+    def path(self, key, suffix=".pickle"):
+        return os.path.join(self.folder, "objects", key[:2], key + suffix)
+
+    def has(self, key, suffix=".pickle"):
+        return os.path.exists(self.path(key, suffix))
+
+    def write(self, key, suffix, write):
+        path = self.path(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            write(f)
+        os.replace(path + ".tmp", path)
+
+    def save(self, key, value):
+        self.write(key, ".pickle", lambda f: pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def load(self, key):
+        with open(self.path(key), "rb") as f:
+            return pickle.load(f)
+
+    def save_array(self, key, array):
+        self.write(key, ".npy", lambda f: np.save(f, array))
+
+    def load_array(self, key):
+        return np.load(self.path(key, ".npy"))
+
+    def put_file(self, filename, key=None):
+        key = hash_path(filename) if key is None else key
+        if not self.has(key, ".blob"):
+            with open(filename, "rb") as source:
+                self.write(key, ".blob", lambda f: shutil.copyfileobj(source, f))
+        return key
+
+    def get_file(self, key, filename):
+        if os.path.dirname(filename) != "":
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+        shutil.copyfile(self.path(key, ".blob"), filename)
+        return filename
+
+    def save_refs(self):
+        os.makedirs(self.folder, exist_ok=True)
+        with open(self.refs_file + ".tmp", "w") as f:
+            json.dump(self.refs, f, indent=1)
+        os.replace(self.refs_file + ".tmp", self.refs_file)
+
+    def prune(self, keep):
+        removed = 0
+        objects = os.path.join(self.folder, "objects")
+        for root, _, names in os.walk(objects):
+            for name in names:
+                if name.split(".")[0] not in keep:
+                    os.remove(os.path.join(root, name))
+                    removed += 1
+        return removed
+
+
+""" Stage:
+    input:  name: the stage's name (its output's name in the pipeline)
+            build: function(*inputs, **params) making the output
+            inputs: names of MGP tables (mgp_table_names) or other stages
+            params: dict of keyword arguments of build (part of the key)
+            delta: None, or function(previous, added, *inputs, **params)
+                   updating the previous output with the rows added to the
+                   tables (dict { table name: rows }), or returning None
+                   when it cannot; previous may be changed in place
+            version: bump it when build changes, to invalidate old outputs
+            files: build returns files (names, or (name, key) pairs of files
+                   already in the store), which are kept in the store and
+                   written back where they were if they go missing
+"""
+class Stage:
+
+    def __init__(self, name, build, inputs=(), params=None, delta=None, version=1, files=False):
+        self.name = name
+        self.build = build
+        self.inputs = list(inputs)
+        self.params = dict() if params is None else dict(params)
+        self.delta = delta
+        self.version = version
+        self.files = files
+
+    def params_key(self):
+        return hash_value([self.name, self.version, self.params])
+
+    def key(self, input_keys):
+        return hash_value([self.params_key(), [input_keys[name] for name in self.inputs]])
+
+
+""" Pipeline:
+    input:  store: an ArtifactStore, or its folder
+
+    add(name, build, inputs, params, delta, ...) adds a Stage; the MGP
+    tables are the sources of the DAG. run(tables, targets) brings the
+    targets (default: every stage) up to date for the tables and returns
+    their outputs; each stage is 'cached' (its key is in the store),
+    'delta' (its previous output, updated with the added rows) or 'built',
+    and each run is a 'pipeline' stage of mgp_metrics. report() lists the
+    last run; export(folder) writes the outputs as <name>.pickle.
+    A stage sees the tables only through its inputs (run does not put
+    them in mgp_data), so its key covers everything it reads.
+"""
+class Pipeline:
+
+    def __init__(self, store=artifact_folder):
+        self.store = ArtifactStore(store) if isinstance(store, str) else store
+        self.stages = dict()
+        self.last_run = []
+
+    def add(self, name, build, inputs=(), params=None, delta=None, version=1, files=False):
+        assert name not in self.stages and name not in mgp_table_names, \
+               f"Pipeline: {name} is already defined"
+        for name_in in inputs:
+            assert name_in in self.stages or name_in in mgp_table_names, \
+                   f"Pipeline: {name} needs {name_in}, which is not defined"
+        self.stages[name] = Stage(name, build, inputs, params, delta, version, files)
+        return self.stages[name]
+
+    def order(self, targets=None):
+        # stages are added after their inputs, so the order of stages is topological
+        needed = set(self.stages if targets is None else targets)
+        for name in reversed(list(self.stages)):
+            if name in needed:
+                needed.update(i for i in self.stages[name].inputs if i in self.stages)
+        return [name for name in self.stages if name in needed]
+
+    def sources(self, name):
+        if name in mgp_table_names:
+            return {name}
+        return set().union(*[self.sources(i) for i in self.stages[name].inputs])
+
+    def table_keys(self, tables):
+        keys, hashes = dict(), dict()
+        for name, table in tables.items():
+            hashes[name] = row_hashes(table)
+            keys[name] = table_key(table, hashes[name])
+            if not self.store.has(keys[name], ".npy"):
+                self.store.save_array(keys[name], hashes[name])
+        return keys, hashes
+
+    def run(self, tables=None, targets=None, force=()):
+        tables = load_dump(None) if tables is None else tables
+        keys, hashes = self.table_keys(tables)
+        order = self.order(targets)
+        for name in order:
+            keys[name] = self.stages[name].key(keys)
+
+        outputs = dict(tables)
+        added_cache = dict()
+
+        def added_since(name):
+            # rows added to each source of stage name since its last build, or None
+            # if that is not all that changed: its params, or an input stage
+            # rebuilt from scratch
+            ref = self.store.refs.get(name)
+            if ref is None or ref['params'] != self.stages[name].params_key() or \
+               not self.store.has(ref['key']):
+                return None
+            for i in self.stages[name].inputs:
+                if i in self.stages and ref['inputs'].get(i) != keys[i] and actions[i] != 'delta':
+                    return None
+            added = dict()
+            for t in self.sources(name):
+                old = ref['tables'].get(t)
+                if old == keys[t]:
+                    continue
+                if (t, old) not in added_cache:
+                    added_cache[(t, old)] = None if old is None or not self.store.has(old, ".npy") \
+                        else added_rows(self.store.load_array(old), tables[t], hashes[t])
+                if added_cache[(t, old)] is None:
+                    return None
+                added[t] = added_cache[(t, old)]
+            return added if len(added) > 0 else None
+
+        def get(name):
+            if name not in outputs:
+                outputs[name] = self.restore(name, self.store.load(keys[name]))
+            return outputs[name]
+
+        self.last_run = []
+        actions = dict()
+        for name in order:
+            s = self.stages[name]
+            start = time.perf_counter()
+            with stage('pipeline', step=name) as record:
+                action = 'cached'
+                if name in force or not self.store.has(keys[name]):
+                    added = None if name in force or s.delta is None else added_since(name)
+                    inputs = [get(i) for i in s.inputs]
+                    output = None
+                    if added is not None:
+                        output = s.delta(self.store.load(self.store.refs[name]['key']),
+                                         added, *inputs, **s.params)
+                    action = 'built' if output is None else 'delta'
+                    if output is None:
+                        output = s.build(*inputs, **s.params)
+                    if s.files:
+                        output = [f if isinstance(f, tuple) else (f, self.store.put_file(f))
+                                  for f in output]
+                    self.store.save(keys[name], output)
+                    outputs[name] = self.restore(name, output)
+                elif s.files:
+                    get(name)
+                self.store.refs[name] = {'key': keys[name], 'params': s.params_key(),
+                                         'inputs': {i: keys[i] for i in s.inputs},
+                                         'tables': {t: keys[t] for t in self.sources(name)}}
+                self.store.save_refs()
+                record['action'] = action
+            actions[name] = action
+            seconds = time.perf_counter() - start
+            self.last_run.append({'stage': name, 'action': action, 'seconds': seconds})
+            print(f"Pipeline: {name}: {action} in {seconds:.2f}s.")
+        targets = order if targets is None else targets
+        return {name: get(name) for name in targets}
+
+    def restore(self, name, output):
+        # a files stage outputs its file names, put back from the store if they are missing
+        if not self.stages[name].files:
+            return output
+        for filename, key in output:
+            if not os.path.exists(filename):
+                self.store.get_file(key, filename)
+        return [filename for filename, _ in output]
+
+    def report(self):
+        return pd.DataFrame(self.last_run, columns=['stage', 'action', 'seconds'])
+
+    def export(self, outputs, folder="."):
+        for name, output in outputs.items():
+            if name in mgp_table_names or self.stages[name].files:
+                continue
+            with open(os.path.join(folder, f"{name}.pickle") + ".tmp", "wb") as f:
+                pickle.dump(output, f)
+            os.replace(os.path.join(folder, f"{name}.pickle") + ".tmp",
+                       os.path.join(folder, f"{name}.pickle"))
+
+    def prune(self):
+        # keep what the last builds of every stage need: outputs, row hashes, files
+        keep = set()
+        for name, ref in self.store.refs.items():
+            keep.add(ref['key'])
+            keep.update(ref['tables'].values())
+            if name in self.stages and self.stages[name].files and self.store.has(ref['key']):
+                keep.update(key for _, key in self.store.load(ref['key']))
+        return self.store.prune(keep)
+
+# ----------------------------
+#   END  CLASS DEFINITIONS
+# ----------------------------
+
+
+# ------------
+#  BEGIN MAIN
+# ------------
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Bring the MGP artifacts up to date with a dump.")
+    parser.add_argument("dump", help="a raw dump (e.g. ./MGP_official/geneal_20191013), "
+                                     "or a folder of clean tables")
+    parser.add_argument("--targets", nargs="+", default=None)
+    parser.add_argument("--force", nargs="+", default=[])
+    parser.add_argument("--store", default=artifact_folder)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--export", default=None, help="folder to write <stage>.pickle to")
+    parser.add_argument("--prune", action="store_true", help="drop artifacts no stage uses")
+    args = parser.parse_args()
+
+    pipeline = mgp_pipeline(args.store, args.processes)
+    tables = load_dump(args.dump, pipeline.store, args.processes)
+    outputs = pipeline.run(tables, args.targets, args.force)
+    print(pipeline.report().to_string(index=False))
+    if args.export is not None:
+        pipeline.export(outputs, args.export)
+    if args.prune:
+        print(f"mgp_pipeline: {pipeline.prune()} artifacts pruned.")
+
+# ------------
+#   END  MAIN
+# ------------
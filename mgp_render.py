@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 14:15:00 2026
+
+@mcarlisle
+
+# The rendering engine behind generate_mgp_map.
+# The static Basemap background (countries, coastlines, meridians, parallels)
+# is drawn once per bounding box, rasterized and cached; each frame then only
+# redraws the scatter layer and the title on one reused figure.
+# Frames are spread over a process pool, one cached figure per worker.
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+from mpl_toolkits.basemap import Basemap
+import multiprocessing
+import numpy as np
+import subprocess
+import tempfile
+from mgp_metrics import progress, register_cache
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+# per-process cache of frame templates, keyed by
+# (bbox, max_size, figsize, dpi): see get_frame_template
+frame_templates = dict()
+frame_template_stats = {'hits': 0, 'misses': 0}
+register_cache('frame_templates', lambda: frame_template_stats)
+
+# the ffmpeg executable used by FFmpegWriter
+ffmpeg_executable = "ffmpeg"
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" build_frame_template:
+    input:  bbox: (lllon, lllat, urlon, urlat) for Basemap
+            max_size: max for colormap (min is hard-coded to 0)
+            figsize: figure size in inches
+            dpi: figure resolution (None for the matplotlib default)
+    output: a dict { 'fig', 'ax', 'scatter', 'title' } for a figure laid out
+            as in generate_mgp_map, where the static map has been drawn once,
+            rasterized, and replaced by that image; the scatter starts empty.
+"""
+def build_frame_template(bbox, max_size, figsize=(20, 10), dpi=None):
+    lllon, lllat, urlon, urlat = bbox
+    fig = plt.figure(figsize=figsize, dpi=dpi)  # inches
+    ax = fig.add_subplot(111)
+    m = Basemap(projection='cyl', #lat_0 = 0, lon_0 = 0,
+                llcrnrlon=lllon, llcrnrlat=lllat,
+                urcrnrlon=urlon, urcrnrlat=urlat, ax=ax)
+    static = [m.drawcountries(), m.drawmapboundary(), m.drawcoastlines()]
+    for lines in list(m.drawmeridians(np.arange(-180, 180, 30)).values()) + \
+                 list(m.drawparallels(np.arange(-90, 90, 30)).values()):
+        static.extend(lines[0] + lines[1])
+
+    # normalize colorbar so it doesn't bounce range through the centuries
+    norm = mpl.colors.Normalize(vmin=0, vmax=max_size)
+    scatter = ax.scatter([], [], marker='D', c=[], norm=norm, cmap='plasma', zorder=3)
+    fig.colorbar(scatter, ax=ax)
+    title = ax.set_title("")
+
+    # rasterize the static layer exactly where it sits in the axes ...
+    fig.canvas.draw()
+    pixels = np.asarray(fig.canvas.buffer_rgba())
+    x0, y0, x1, y1 = np.round(ax.bbox.extents).astype(int)
+    height = pixels.shape[0]
+    background = pixels[height - y1:height - y0, x0:x1].copy()
+
+    # ... and stand the image in for it from now on
+    for artist in static:
+        artist.set_visible(False)
+    xlim, ylim, aspect = ax.get_xlim(), ax.get_ylim(), ax.get_aspect()
+    ax.imshow(background, extent=(xlim[0], xlim[1], ylim[0], ylim[1]),
+              interpolation='nearest', zorder=0)
+    ax.set_xlim(xlim)
+    ax.set_ylim(ylim)
+    ax.set_aspect(aspect)
+    return {'fig': fig, 'ax': ax, 'scatter': scatter, 'title': title}
+
+
+""" get_frame_template:
+    input:  as build_frame_template
+    output: the frame template for these arguments,
+            built once per process and cached in frame_templates.
+"""
+def get_frame_template(bbox, max_size, figsize=(20, 10), dpi=None):
+    key = (tuple(bbox), max_size, tuple(figsize), dpi)
+    if key not in frame_templates:
+        frame_template_stats['misses'] += 1
+        frame_templates[key] = build_frame_template(bbox, max_size, figsize, dpi)
+    else:
+        frame_template_stats['hits'] += 1
+    return frame_templates[key]
+
+
+""" draw_frame:
+    input:  template: output of get_frame_template
+            x, y, c: longitudes, latitudes and counts of the points
+            title: the frame's title
+    output: None. The template's figure now shows this frame.
+"""
+def draw_frame(template, x, y, c, title):
+    # only bad points will be (0.0, 0.0)
+    template['scatter'].set_offsets(np.column_stack([x, y]) if len(x) > 0 \
+                                    else np.zeros((0, 2)))
+    template['scatter'].set_array(np.asarray(c, dtype=float))
+    template['title'].set_text(title)
+
+
+""" frame_points:
+    input:  v: a dict { (lng, lat): count }, one value of the output
+               of restructure_schools_for_map
+    output: (x, y, c): np.arrays of longitudes, latitudes and counts.
+"""
+def frame_points(v):
+    keys = list(v.keys())
+    x = np.array([a[0] for a in keys], dtype=float)
+    y = np.array([a[1] for a in keys], dtype=float)
+    c = np.array(list(v.values()), dtype=float)
+    return x, y, c
+
+
+""" render_frame_to_file:
+    input:  job: (filename, x, y, c, title, bbox, max_size, figsize, dpi)
+    output: filename, once the frame has been saved there as a png.
+"""
+def render_frame_to_file(job):
+    filename, x, y, c, title, bbox, max_size, figsize, dpi = job
+    template = get_frame_template(bbox, max_size, figsize, dpi)
+    draw_frame(template, x, y, c, title)
+    template['fig'].savefig(filename, format="png")
+    return filename
+
+
+""" frame_rgb:
+    input:  template: output of get_frame_template, with a frame drawn
+    output: np.array (height, width, 3) of np.uint8: the frame's pixels.
+"""
+def frame_rgb(template):
+    canvas = template['fig'].canvas
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba())[:, :, :3].copy()
+
+
+""" render_frame_to_rgb:
+    input:  job: (x, y, c, title, bbox, max_size, figsize, dpi)
+    output: the frame's pixels (see frame_rgb); nothing is written to disk.
+"""
+def render_frame_to_rgb(job):
+    x, y, c, title, bbox, max_size, figsize, dpi = job
+    template = get_frame_template(bbox, max_size, figsize, dpi)
+    draw_frame(template, x, y, c, title)
+    return frame_rgb(template)
+
+
+""" render_frames:
+    input:  jobs: list of jobs for render_function
+            render_function: a top-level function of one job
+                             (e.g. render_frame_to_file)
+            processes: number of worker processes (1: render here, in order)
+            frames_per_worker: tasks a worker renders before it is replaced,
+                               to bound the memory of long runs
+    output: list of the results of render_function, in the order of jobs.
+"""
+def render_frames(jobs, render_function, processes=1, frames_per_worker=50):
+    if processes is None or processes > 1:
+        with multiprocessing.Pool(processes, maxtasksperchild=frames_per_worker) as pool:
+            return list(progress(pool.imap(render_function, jobs), total=len(jobs)))
+    return [render_function(job) for job in progress(jobs)]
+
+
+""" stream_frames:
+    input:  jobs: list of jobs for render_function
+            writer: an encoder backend: any object with write_frame(rgb)
+                    and close() (e.g. FFmpegWriter)
+            render_function: a top-level function of one job returning
+                             the frame's pixels (e.g. render_frame_to_rgb)
+            processes: number of worker processes (1: render here, in order)
+            frames_per_worker: as in render_frames
+    output: the number of frames written.
+
+    note: frames are handed to writer, in order, as soon as they are
+          rendered, so encoding overlaps with rendering; writer is closed
+          at the end, even if rendering fails.
+"""
+def stream_frames(jobs, writer, render_function=render_frame_to_rgb,
+                  processes=1, frames_per_worker=50):
+    written = 0
+    try:
+        if processes is None or processes > 1:
+            with multiprocessing.Pool(processes, maxtasksperchild=frames_per_worker) as pool:
+                for rgb in progress(pool.imap(render_function, jobs), total=len(jobs)):
+                    writer.write_frame(rgb)
+                    written += 1
+        else:
+            for job in progress(jobs):
+                writer.write_frame(render_function(job))
+                written += 1
+    finally:
+        writer.close()
+    return written
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ----------------------------
+#  START CLASS DEFINITIONS
+# ----------------------------
+""" FFmpegWriter:
+    input:  filename: the movie to write (e.g. "all_mgp_year.mp4")
+            framerate: frames per second
+            codec: ffmpeg video codec
+            extra_args: list of further ffmpeg output options
+
+    An encoder backend for stream_frames: raw RGB frames are piped
+    into one ffmpeg subprocess, started at the first frame (which fixes
+    the resolution); no image files are written along the way.
+    Frames are cropped to even dimensions, as yuv420p requires.
+    If ffmpeg fails (or exits early, breaking the pipe), write_frame or
+    close raises a RuntimeError with what ffmpeg wrote to stderr.
+"""
+class FFmpegWriter:
+
+    def __init__(self, filename, framerate=3, codec="libx264", extra_args=()):
+        self.filename = filename
+        self.framerate = framerate
+        self.codec = codec
+        self.extra_args = list(extra_args)
+        self.process = None
+        self.errors = None
+        self.size = None
+
+    def start(self, width, height):
+        self.size = (width, height)
+        command = [ffmpeg_executable, "-y", "-loglevel", "error",
+                   "-f", "rawvideo", "-pix_fmt", "rgb24",
+                   "-s", f"{width}x{height}", "-framerate", str(self.framerate),
+                   "-i", "-",
+                   "-c:v", self.codec, "-pix_fmt", "yuv420p"] + \
+                  self.extra_args + [self.filename]
+        # stderr goes to a file: a pipe nobody reads could fill and stall ffmpeg
+        self.errors = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=self.errors)
+
+    def write_frame(self, rgb):
+        height, width = rgb.shape[0] // 2 * 2, rgb.shape[1] // 2 * 2
+        if self.process is None:
+            self.start(width, height)
+        assert (width, height) == self.size, \
+            f"FFmpegWriter: frame is {width}x{height}, movie is {self.size[0]}x{self.size[1]}"
+        try:
+            self.process.stdin.write(np.ascontiguousarray(rgb[:height, :width]).tobytes())
+        except BrokenPipeError:
+            returncode, stderr = self.finish()
+            raise RuntimeError(f"FFmpegWriter: ffmpeg stopped reading frames "
+                               f"(exit {returncode}) on {self.filename}: {stderr}") from None
+
+    def finish(self):
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = self.process.wait()
+        self.process = None
+        self.errors.seek(0)
+        stderr = self.errors.read().decode('utf-8', errors='replace').strip()
+        self.errors.close()
+        self.errors = None
+        return returncode, stderr
+
+    def close(self):
+        if self.process is None:
+            return
+        returncode, stderr = self.finish()
+        if returncode != 0:
+            raise RuntimeError(f"FFmpegWriter: ffmpeg exited with {returncode} "
+                               f"on {self.filename}: {stderr}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+# ----------------------------
+#   END  CLASS DEFINITIONS
+# ----------------------------
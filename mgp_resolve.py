@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 16:10:00 2026
+
+@mcarlisle
+
+# Resolution of school names the Geocode API could not place (notebook 1's
+# school_old_name, left at (0.0, 0.0)), and of duplicate school entries,
+# against the schools that were geocoded -- with no further API calls.
+# Names are compared as TF-IDF vectors of character trigrams; candidate
+# pairs come only from shared trigrams that are rare (blocking), so the
+# work grows with the number of plausible pairs, not with all pairs.
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from mgp_data import mgp_data
+from mgp_geocode import normalize_school_name
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+# length of the character n-grams names are compared on
+ngram_size = 3
+
+# n-grams in more than this fraction of names ("uni", "ver", "sit", ...),
+# and in more than min_block names, do not propose candidate pairs
+# (they still count in the scores)
+max_block_fraction = 0.01
+min_block = 50
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" school_degree_counts:
+    input:  school: the school pd.DataFrame
+            degree_grant: the degree_grant pd.DataFrame
+    output: np.array: the number of degrees granted by each row of school
+            (one pass over degree_grant, instead of one scan per school).
+"""
+def school_degree_counts(school, degree_grant):
+    counts = degree_grant['school'].value_counts()
+    return counts.reindex(school['school_id'].to_numpy(), fill_value=0).to_numpy()
+
+
+""" is_geocoded:
+    input:  school: the school pd.DataFrame
+    output: boolean np.array, True where the school has a location,
+            i.e. lat/lng present and not the (0.0, 0.0) of a failed lookup.
+"""
+def is_geocoded(school):
+    lat = school['lat'].to_numpy(dtype=float)
+    lng = school['lng'].to_numpy(dtype=float)
+    return np.isfinite(lat) & np.isfinite(lng) & ((lat != 0.0) | (lng != 0.0))
+
+
+""" name_ngrams:
+    input:  key: a normalized school name (see normalize_school_name)
+            n: n-gram length
+    output: list of the character n-grams of each word of key,
+            padded with a space at both ends of the word.
+"""
+def name_ngrams(key, n=ngram_size):
+    grams = []
+    for word in key.split():
+        word = f" {word} "
+        grams.extend(word[i:i + n] for i in range(max(1, len(word) - n + 1)))
+    return grams
+
+
+""" ngram_matrix:
+    input:  keys: list of normalized school names
+            n: n-gram length
+    output: (X, df): X is a CSR matrix (names x n-grams) of TF-IDF weights
+            with L2-normalized rows; df is the np.array of the number of
+            names each n-gram appears in.
+"""
+def ngram_matrix(keys, n=ngram_size):
+    vocabulary = dict()
+    rows, cols = [], []
+    for i, key in enumerate(keys):
+        for gram in name_ngrams(key, n):
+            cols.append(vocabulary.setdefault(gram, len(vocabulary)))
+            rows.append(i)
+    counts = sp.csr_matrix((np.ones(len(rows)), (rows, cols)),
+                           shape=(len(keys), len(vocabulary)))
+    counts.sum_duplicates()
+    df = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log((1 + len(keys)) / (1 + df)) + 1
+    X = counts.multiply(idf).tocsr()
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sp.diags(1 / norms) @ X, df
+
+
+""" best_matches:
+    input:  X: output of ngram_matrix
+            df: output of ngram_matrix
+            queries: np.array of the rows of X to find matches for
+            targets: np.array of the rows of X that can be matched to
+            max_block: n-grams in more than this many names are not used
+                       to propose candidates
+            chunk_size: queries compared at a time
+    output: (query_rows, target_rows, scores): for each query with any
+            candidate, the candidate of highest cosine similarity.
+"""
+def best_matches(X, df, queries, targets, max_block, chunk_size=5000):
+    blocking = sp.diags((df <= max_block).astype(float))
+    T = X[targets]
+    T_blocked = (T @ blocking).tocsr()
+    T_blocked.eliminate_zeros()
+    found_q, found_t, found_s = [], [], []
+    for start in range(0, len(queries), chunk_size):
+        chunk = queries[start:start + chunk_size]
+        Q = X[chunk]
+        Q_blocked = (Q @ blocking).tocsr()
+        Q_blocked.eliminate_zeros()
+        # candidates: pairs sharing at least one rare n-gram
+        pairs = (Q_blocked @ T_blocked.T).tocoo()
+        if pairs.nnz == 0:
+            continue
+        # ... scored on all their n-grams
+        scores = np.asarray(Q[pairs.row].multiply(T[pairs.col]).sum(axis=1)).ravel()
+        order = np.lexsort((-scores, pairs.row))
+        first = np.r_[True, pairs.row[order][1:] != pairs.row[order][:-1]]
+        best = order[first]
+        found_q.append(chunk[pairs.row[best]])
+        found_t.append(targets[pairs.col[best]])
+        found_s.append(scores[best])
+    if len(found_q) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+    return np.concatenate(found_q), np.concatenate(found_t), np.concatenate(found_s)
+
+
+""" resolve_schools:
+    input:  school: the school pd.DataFrame (default: mgp_data.school)
+            degree_grant: the degree_grant pd.DataFrame (default: mgp_data.degree_grant)
+            min_score: cosine similarity below which no match is proposed
+    output: a pd.DataFrame with one row per school that has no location or
+            shares its normalized name with another school:
+            'school_id', 'school_name', 'degrees' (granted), 'geocoded',
+            'match_school_id', 'match_name', 'score', 'lat', 'lng', and
+            'reason' ('duplicate': same normalized name as a geocoded school;
+            'fuzzy': best trigram match; 'unmatched': nothing above min_score).
+            Sorted by degrees, descending: the top rows matter most.
+"""
+def resolve_schools(school=None, degree_grant=None, min_score=0.6):
+    school = mgp_data.school if school is None else school
+    degree_grant = mgp_data.degree_grant if degree_grant is None else degree_grant
+
+    ids = school['school_id'].to_numpy()
+    names = school['school_name'].fillna("").astype(str).tolist()
+    keys = pd.Series([normalize_school_name(name) for name in names])
+    degrees = school_degree_counts(school, degree_grant)
+    geocoded = is_geocoded(school)
+
+    # the canonical row of each normalized name: geocoded first, then most degrees
+    canonical = pd.DataFrame({'key': keys, 'geocoded': geocoded, 'degrees': degrees,
+                              'row': np.arange(len(keys))})\
+                  .sort_values(['geocoded', 'degrees'], ascending=False, kind='stable')\
+                  .drop_duplicates('key', keep='first').set_index('key')['row']
+    canonical_row = canonical.reindex(keys).to_numpy()
+    duplicate = keys.duplicated(keep=False).to_numpy() & (canonical_row != np.arange(len(keys)))
+
+    match_row = np.full(len(keys), -1)
+    score = np.full(len(keys), np.nan)
+    reason = np.full(len(keys), 'unmatched', dtype=object)
+
+    same_name = duplicate & geocoded[canonical_row]
+    match_row[same_name] = canonical_row[same_name]
+    score[same_name] = 1.0
+    reason[same_name] = 'duplicate'
+
+    queries = np.flatnonzero(~geocoded & ~same_name)
+    targets = np.flatnonzero(geocoded)
+    if len(queries) > 0 and len(targets) > 0:
+        X, df = ngram_matrix(keys.tolist())
+        max_block = max(min_block, int(max_block_fraction * len(keys)))
+        q, t, s = best_matches(X, df, queries, targets, max_block)
+        keep = s >= min_score
+        match_row[q[keep]] = t[keep]
+        score[q[keep]] = s[keep]
+        reason[q[keep]] = 'fuzzy'
+
+    rows = np.flatnonzero(~geocoded | duplicate)
+    matched = match_row[rows] >= 0
+    target = np.where(matched, match_row[rows], 0)
+    resolved = pd.DataFrame({
+        'school_id': ids[rows],
+        'school_name': np.asarray(names, dtype=object)[rows],
+        'degrees': degrees[rows],
+        'geocoded': geocoded[rows],
+        'match_school_id': np.where(matched, ids[target], -1),
+        'match_name': np.where(matched, np.asarray(names, dtype=object)[target], None),
+        'score': score[rows],
+        'lat': np.where(matched, school['lat'].to_numpy(dtype=float)[target], np.nan),
+        'lng': np.where(matched, school['lng'].to_numpy(dtype=float)[target], np.nan),
+        'reason': reason[rows] })
+    return resolved.sort_values('degrees', ascending=False, kind='stable')\
+                   .reset_index(drop=True)
+
+
+""" apply_resolutions:
+    input:  school: the school pd.DataFrame
+            resolved: output of resolve_schools (possibly edited by hand)
+            min_score: matches scoring below this are not applied
+    output: a copy of school where every ungeocoded school with an accepted
+            match takes that match's lat/lng; 'resolved_to' holds the
+            school_id of the match (-1 where nothing was applied).
+            Use mgp_data.set('school', ...) to map with it.
+"""
+def apply_resolutions(school, resolved, min_score=0.6):
+    accepted = resolved[(resolved['match_school_id'] >= 0) & ~resolved['geocoded'] &
+                        (resolved['score'] >= min_score)]
+    school = school.copy()
+    position = pd.Index(school['school_id']).get_indexer(accepted['school_id'])
+    school['resolved_to'] = -1
+    school.iloc[position, school.columns.get_loc('lat')] = accepted['lat'].to_numpy()
+    school.iloc[position, school.columns.get_loc('lng')] = accepted['lng'].to_numpy()
+    school.iloc[position, school.columns.get_loc('resolved_to')] = \
+        accepted['match_school_id'].to_numpy()
+    return school
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ------------
+#  BEGIN MAIN
+# ------------
+
+if __name__ == "__main__":
+
+    resolved = resolve_schools()
+    total = resolved.loc[~resolved['geocoded'], 'degrees'].sum()
+    placed = resolved.loc[~resolved['geocoded'] & (resolved['match_school_id'] >= 0), 'degrees'].sum()
+    print(resolved.head(50).to_string())
+    print(f"resolve_schools: {placed} of {total} degrees at ungeocoded schools can be placed.")
+
+# ------------
+#   END  MAIN
+# ------------
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 16:40:00 2026
+
+@mcarlisle
+
+# A spatial index over school locations, in pure NumPy.
+# Points are bucketed into a regular lng/lat grid and sorted by cell,
+# so the points of one grid row between two columns are one contiguous
+# slice: a bounding-box query reads one slice per grid row it covers.
+# On top of it: named regions, the country of each school, and the
+# school lookups behind regional maps and per-country aggregates.
+# A school's country is the MGP's own (school['country'], an id in the
+# dump's country table), else the one the geocoder gave it (the 'country'
+# address component, see mgp_geocode); failing that, the country shape
+# (polygon) holding its location, if country shapes are at hand
+# (country_shapes_file), with the grid as a prefilter. Bounding boxes
+# overlap far too much to decide a country (Canada's reaches 41.7 N,
+# below Chicago), so they only ever serve as regions and prefilters.
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+# https://gist.github.com/graydon/11198540
+from country_bounding_boxes import country_bounding_boxes
+import numpy as np
+import os
+import pandas as pd
+import pickle
+from mgp_data import mgp_data
+from mgp_geocode import parse_geocode_json
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+""" named regions, as (lllon, lllat, urlon, urlat);
+    any ISO 3166 alpha-2 code of country_bounding_boxes works as well
+"""
+regions = {
+    'world':  (-180, -90, 180, 90),
+    # lower left corner of Portugal, upper right corner of Finland
+    'Europe': (-9.52657060387, 36.838268541, 31.5160921567, 70.1641930203),
+    'USA':    (-171.791110603, 18.91619, -66.96466, 71.3577635769),
+}
+
+# grid cell size in degrees
+default_cell_size = 1.0
+
+# country polygons, e.g. Natural Earth's admin 0 countries (not supplied
+# here), in the data folder; the ISO 3166 alpha-2 code of a shape is in
+# the first of country_shape_fields its record has (not "-99")
+country_shapes_file = "ne_10m_admin_0_countries.shp"
+country_shape_fields = ["ISO_A2_EH", "ISO_A2", "WB_A2"]
+
+# the MGP's own country table (country.tsv of the dump, pickled by
+# mgp_ingest: 'country_id', 'country_name') in the data folder
+country_table_file = "country.pickle"
+
+# ISO 3166 alpha-2 codes of the MGP country names (spaces removed, lower
+# case) that are not names of country_bounding_boxes; regions and joint
+# entries ("Catalonia", "Scotland", "Poland-Japan") are left to the geocoder
+mgp_country_codes = {'czechrepublic': 'CZ', 'southkorea': 'KR', 'hongkong': 'HK',
+                     'singapore': 'SG', 'bosniaherzegovina': 'BA', 'bosnia': 'BA',
+                     'democraticrepublicofthecongo': 'CD', "coted'ivoire": 'CI',
+                     'trinidadtobago': 'TT', 'macao': 'MO', 'mauritius': 'MU',
+                     'capeverde': 'CV', 'palestine': 'PS'}
+
+# points tested against one polygon at a time (bounds the edge x point matrix)
+polygon_chunk = 4000000
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" region_bbox:
+    input:  region: a name in regions, an ISO 3166 alpha-2 country code
+                    (see country_bounding_boxes), or a bbox tuple
+    output: the bbox (lllon, lllat, urlon, urlat) of region.
+"""
+def region_bbox(region):
+    if isinstance(region, str):
+        if region in regions:
+            return regions[region]
+        if region in country_bounding_boxes:
+            return country_bounding_boxes[region][1]
+        raise KeyError(f"region_bbox: unknown region {region}")
+    return tuple(region)
+
+
+""" in_bbox:
+    input:  x, y: np.arrays of longitudes and latitudes
+            bbox: (lllon, lllat, urlon, urlat); lllon > urlon wraps
+                  around the antimeridian
+    output: boolean np.array, True for the points inside bbox (edges included).
+"""
+def in_bbox(x, y, bbox):
+    lllon, lllat, urlon, urlat = bbox
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    inside_y = (y >= lllat) & (y <= urlat)
+    if lllon <= urlon:
+        return inside_y & (x >= lllon) & (x <= urlon)
+    return inside_y & ((x >= lllon) | (x <= urlon))
+
+
+""" points_in_polygon:
+    input:  x, y: np.arrays of longitudes and latitudes
+            rings: list of np.arrays (n, 2) of (lng, lat) vertices: the
+                   outer rings and holes of one shape (closed or not)
+    output: boolean np.array, True for the points inside the shape:
+            the even-odd rule over all rings, so holes are left out.
+"""
+def points_in_polygon(x, y, rings):
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    inside = np.zeros(len(x), dtype=bool)
+    for ring in rings:
+        ring = np.asarray(ring, dtype=float)
+        x0, y0 = ring[:, 0], ring[:, 1]
+        x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+        step = max(1, polygon_chunk // max(len(ring), 1))
+        for a in range(0, len(x), step):
+            px, py = x[a:a + step, np.newaxis], y[a:a + step, np.newaxis]
+            # edges straddling the point's latitude, crossed east of the point
+            straddle = (y0 > py) != (y1 > py)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cross = x0 + (py - y0) * (x1 - x0) / (y1 - y0)
+            inside[a:a + step] ^= (np.count_nonzero(straddle & (px < cross), axis=1) % 2) == 1
+    return inside
+
+
+""" load_country_shapes:
+    input:  filename: a shapefile of country polygons (default:
+                      country_shapes_file in the data folder)
+    output: dict { ISO 3166 alpha-2 code: list of rings (see
+            points_in_polygon) }, or None if the file (or pyshp, to read
+            it) is missing.
+"""
+def load_country_shapes(filename=None):
+    filename = os.path.join(mgp_data.folder, country_shapes_file) if filename is None else filename
+    try:
+        import shapefile  # pyshp
+    except ImportError:
+        return None
+    if not os.path.exists(filename):
+        return None
+    shapes = dict()
+    with shapefile.Reader(filename) as reader:
+        fields = [f[0] for f in reader.fields[1:]]
+        for record, shape in zip(reader.iterRecords(), reader.iterShapes()):
+            record = dict(zip(fields, record))
+            code = next((record[f] for f in country_shape_fields
+                         if record.get(f) not in (None, "", "-99")), None)
+            if code is None or len(shape.points) == 0:
+                continue
+            points = np.asarray(shape.points, dtype=float)
+            parts = list(shape.parts) + [len(points)]
+            shapes.setdefault(code, []).extend(points[a:b] for a, b in zip(parts[:-1], parts[1:]))
+    return shapes
+
+
+""" assign_countries:
+    input:  x, y: np.arrays of longitudes and latitudes
+            shapes: output of load_country_shapes
+            index: a GridIndex over (x, y) (None: built here)
+    output: np.array (dtype object) of the ISO 3166 alpha-2 code of the
+            country shape holding each point, None where none does.
+
+    note: the grid only prefilters: a shape is tested against the points
+          inside its bounding box, and each of those gets an exact
+          point-in-polygon test.
+"""
+def assign_countries(x, y, shapes, index=None):
+    index = GridIndex(x, y) if index is None else index
+    codes = np.full(index.size, None, dtype=object)
+    for code, rings in shapes.items():
+        vertices = np.concatenate(rings)
+        lllon, lllat = vertices.min(axis=0)
+        urlon, urlat = vertices.max(axis=0)
+        candidates = index.query((lllon, lllat, urlon, urlat))
+        candidates = candidates[pd.isna(codes[candidates])]
+        if len(candidates) > 0:
+            inside = points_in_polygon(index.x[candidates], index.y[candidates], rings)
+            codes[candidates[inside]] = code
+    return codes
+
+
+""" school_index:
+    input:  school: the school table (default: mgp_data.school)
+    output: a GridIndex over the geocoded schools of school
+            (lat/lng not (0.0, 0.0)), with .ids holding their school_id;
+            for mgp_data.school, built once and kept in mgp_data.
+"""
+def school_index(school=None):
+    def build(school):
+        school = school.drop_duplicates('school_id', keep='first')
+        lat = school['lat'].to_numpy(dtype=float)
+        lng = school['lng'].to_numpy(dtype=float)
+        located = np.isfinite(lat) & np.isfinite(lng) & ((lat != 0.0) | (lng != 0.0))
+        return GridIndex(lng[located], lat[located],
+                         ids=school['school_id'].to_numpy()[located])
+    if school is not None:
+        return build(school)
+    return mgp_data.cached('school_index', lambda: build(mgp_data.school))
+
+
+""" schools_in_region:
+    input:  region: as for region_bbox
+            school: the school table (default: mgp_data.school)
+    output: np.array of the school_id of the geocoded schools in region.
+"""
+def schools_in_region(region, school=None):
+    index = school_index(school)
+    return index.ids[index.query(region_bbox(region))]
+
+
+""" mgp_countries:
+    input:  school: a school pd.DataFrame
+            filename: the MGP's country table (default: country_table_file
+                      in the data folder)
+    output: np.array (dtype object) of the ISO 3166 alpha-2 code of the
+            MGP's own country of each school (its 'country' id, named in
+            the country table); None where unknown, or for every school if
+            there is no 'country' column or no country table.
+"""
+def mgp_countries(school, filename=None):
+    codes = np.full(len(school), None, dtype=object)
+    filename = os.path.join(mgp_data.folder, country_table_file) if filename is None else filename
+    if 'country' not in school or not os.path.exists(filename):
+        return codes
+    with open(filename, "rb") as f:
+        country = pickle.load(f)
+    by_name = {name.replace(" ", "").lower(): code
+               for code, (name, _) in country_bounding_boxes.items()}
+    by_name.update(mgp_country_codes)
+    code_of = pd.Series([by_name.get(str(name).replace(" ", "").lower())
+                         for name in country['country_name']],
+                        index=country['country_id'].to_numpy(), dtype=object)
+    code_of = code_of[~code_of.index.duplicated(keep='first')]
+    codes[:] = code_of.reindex(school['country'].to_numpy()).to_numpy(dtype=object)
+    codes[pd.isna(codes)] = None
+    return codes
+
+
+""" geocoded_countries:
+    input:  school: a school pd.DataFrame
+    output: np.array (dtype object) of the ISO 3166 alpha-2 code the
+            geocoder gave each school: its 'country_code' column (see
+            mgp_geocode.geocode_schools), else the country component of
+            its 'geocode_json' (notebook 1's responses); None where unknown.
+"""
+def geocoded_countries(school):
+    codes = np.full(len(school), None, dtype=object)
+    if 'geocode_json' in school:
+        for i, data in enumerate(school['geocode_json']):
+            if isinstance(data, dict):
+                codes[i] = parse_geocode_json(data)[4]
+    if 'country_code' in school:
+        given = school['country_code'].to_numpy(dtype=object)
+        known = pd.notna(given) & (given != "")
+        codes[known] = given[known]
+    return codes
+
+
+""" school_countries:
+    input:  school: the school table (default: mgp_data.school)
+    output: a pd.DataFrame of the schools: 'school_id', 'country' (ISO 3166
+            alpha-2 code, None if unknown) and 'country_name' (as in
+            country_bounding_boxes, else the code); for mgp_data.school,
+            kept in mgp_data.
+            The country is the MGP's own (mgp_countries), else the
+            geocoder's (geocoded_countries); schools with neither are
+            placed in the country shapes (assign_countries), if
+            load_country_shapes finds any.
+"""
+def school_countries(school=None):
+    def build(school):
+        school = school.drop_duplicates('school_id', keep='first')
+        codes = mgp_countries(school)
+        unknown = pd.isna(codes)
+        codes[unknown] = geocoded_countries(school)[unknown]
+        shapes = load_country_shapes()
+        if shapes is not None:
+            lat = school['lat'].to_numpy(dtype=float)
+            lng = school['lng'].to_numpy(dtype=float)
+            unknown = pd.isna(codes) & np.isfinite(lat) & np.isfinite(lng) & \
+                      ((lat != 0.0) | (lng != 0.0))
+            codes[unknown] = assign_countries(lng[unknown], lat[unknown], shapes)
+        names = np.array([None if c is None else
+                          country_bounding_boxes[c][0] if c in country_bounding_boxes else c
+                          for c in codes], dtype=object)
+        return pd.DataFrame({'school_id': school['school_id'].to_numpy(),
+                             'country': pd.Series(codes, dtype=object),
+                             'country_name': pd.Series(names, dtype=object)})
+    if school is not None:
+        return build(school)
+    return mgp_data.cached('school_countries', lambda: build(mgp_data.school))
+
+
+""" schools_in_country:
+    input:  code: ISO 3166 alpha-2 country code
+    output: np.array of the school_id of the schools in country code
+            (see school_countries).
+"""
+def schools_in_country(code):
+    countries = school_countries()
+    return countries['school_id'].to_numpy()[(countries['country'] == code).to_numpy()]
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ----------------------------
+#  START CLASS DEFINITIONS
+# ----------------------------
+""" GridIndex:
+    input:  x, y: np.arrays of longitudes and latitudes
+            ids: np.array of an id for each point (default: its position)
+            cell_size: grid cell size in degrees
+
+    query(bbox) gives the positions of the points inside bbox (sorted),
+    reading only the grid cells that bbox overlaps.
+"""
+class GridIndex:
+
+    def __init__(self, x, y, ids=None, cell_size=default_cell_size):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.size = len(self.x)
+        self.ids = np.arange(self.size) if ids is None else np.asarray(ids)
+        self.cell_size = cell_size
+        self.columns = int(np.ceil(360 / cell_size))
+        self.rows = int(np.ceil(180 / cell_size))
+
+        cell = self.cell_row(self.y) * self.columns + self.cell_column(self.x)
+        self.order = np.argsort(cell, kind='stable')
+        # points of cell k are order[cell_ptr[k]:cell_ptr[k + 1]]
+        self.cell_ptr = np.searchsorted(cell[self.order],
+                                        np.arange(self.rows * self.columns + 1))
+
+    def cell_column(self, x):
+        return np.clip(((np.asarray(x) + 180) // self.cell_size).astype(np.int64),
+                       0, self.columns - 1)
+
+    def cell_row(self, y):
+        return np.clip(((np.asarray(y) + 90) // self.cell_size).astype(np.int64),
+                       0, self.rows - 1)
+
+    def query(self, bbox):
+        lllon, lllat, urlon, urlat = bbox
+        if lllon > urlon:  # across the antimeridian
+            return np.union1d(self.query((lllon, lllat, 180, urlat)),
+                              self.query((-180, lllat, urlon, urlat)))
+        c0, c1 = self.cell_column(lllon), self.cell_column(urlon)
+        r0, r1 = self.cell_row(lllat), self.cell_row(urlat)
+        starts = self.cell_ptr[np.arange(r0, r1 + 1) * self.columns + c0]
+        ends = self.cell_ptr[np.arange(r0, r1 + 1) * self.columns + c1 + 1]
+        if len(starts) == 0 or (ends - starts).sum() == 0:
+            return np.zeros(0, dtype=np.int64)
+        candidates = self.order[np.concatenate([np.arange(a, b) for a, b in zip(starts, ends)])]
+        keep = in_bbox(self.x[candidates], self.y[candidates], bbox)
+        return np.sort(candidates[keep])
+
+# ----------------------------
+#   END  CLASS DEFINITIONS
+# ----------------------------
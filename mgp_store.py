@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 12:40:00 2026
+
+@mcarlisle
+
+# An indexed SQLite store of the MGP degree, degree_grant, school
+# and academic tables, built once from the pickles, for bulk lookups
+# by academic, school, year range and MSC.
+# The store records a fingerprint of the table files it was built from
+# (see MGPData.fingerprint), and is rebuilt when the tables of mgp_data no
+# longer match it (a new dump, synthetic tables set with mgp_data.set(), ...);
+# checking it does not load the tables.
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+import contextlib
+import itertools
+import numpy as np
+import os
+import pandas as pd
+import sqlite3
+from mgp_data import MGPData, mgp_data
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+store_file = "mgp_store.sqlite"
+store_tables = ["academic", "degree", "degree_grant", "school"]
+
+# (table, column) pairs to index in the store
+store_indexes = [("academic",     "academic_id"),
+                 ("degree",       "degree_id"),
+                 ("degree",       "academic"),
+                 ("degree",       "year"),
+                 ("degree",       "msc"),
+                 ("degree_grant", "degree"),
+                 ("degree_grant", "school"),
+                 ("school",       "school_id")]
+
+# the store get_store opens when given no path (see use_store)
+store_path = store_file
+
+# open connections, by path, made on first use by get_store, and the
+# fingerprint of the tables each one was last checked against
+store_connections = dict()
+store_checked = dict()
+
+# numbers the temporary id tables, so that lookups sharing a connection
+# (check_same_thread=False) never write to each other's tables
+id_table_numbers = itertools.count()
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" storable_columns:
+    input:  df: a pd.DataFrame
+    output: the columns of df holding scalars (numbers, strings),
+            i.e. everything but columns like school['geocode_json'].
+"""
+def storable_columns(df):
+    columns = []
+    for c in df.columns:
+        values = df[c].dropna()
+        if values.dtype != object or \
+                values.map(lambda x: isinstance(x, (str, int, float))).all():
+            columns.append(c)
+    return columns
+
+
+""" source_fingerprint:
+    input:  data: an MGPData (default: the shared mgp_data)
+    output: data.fingerprint() of store_tables: the sizes and modification
+            times of their files (or the contents of tables set in memory),
+            so the store is checked without loading the tables.
+"""
+def source_fingerprint(data=None):
+    data = mgp_data if data is None else data
+    return data.fingerprint(store_tables)
+
+
+""" store_fingerprint:
+    input:  conn: sqlite3 connection to a store
+    output: the fingerprint build_store recorded in it, or None.
+"""
+def store_fingerprint(conn):
+    try:
+        row = conn.execute("select fingerprint from store_info").fetchone()
+    except sqlite3.DatabaseError:
+        return None
+    return None if row is None else row[0]
+
+
+""" close_store:
+    input:  db_file: path of a SQLite store
+    output: None. The connection get_store keeps to db_file, if any, is closed.
+"""
+def close_store(db_file=store_file):
+    conn = store_connections.pop(db_file, None)
+    store_checked.pop(db_file, None)
+    if conn is not None:
+        conn.close()
+
+
+""" build_store:
+    input:  tables: dict of { table name: pd.DataFrame } for store_tables
+            db_file: path of the SQLite file to (re)build
+            fingerprint: the fingerprint of the source of tables
+                         (see source_fingerprint), or None
+    output: None. db_file holds one table per entry of tables,
+            with the indexes in store_indexes, and fingerprint in
+            store_info. Other tables of an existing db_file
+            (e.g. msc_backfill's predictions) are kept.
+"""
+def build_store(tables, db_file=store_file, fingerprint=None):
+    close_store(db_file)
+    with sqlite3.connect(db_file) as conn:
+        conn.execute("drop table if exists store_info")
+        for name, df in tables.items():
+            conn.execute(f"drop table if exists {name}")
+            df[storable_columns(df)].to_sql(name, conn, index=False)
+        for table, column in store_indexes:
+            if table in tables:
+                conn.execute(f"create index {table}_{column} on {table} ({column})")
+        conn.execute("create table store_info (fingerprint text)")
+        conn.execute("insert into store_info (fingerprint) values (?)",
+                     (fingerprint,))
+        conn.execute("analyze")
+    conn.close()
+
+
+""" build_store_from_pickles:
+    input:  folder: folder holding <table>.pickle for each of store_tables
+                    (default: the tables of the shared mgp_data context)
+            db_file: path of the SQLite file to (re)build
+    output: None (see build_store).
+"""
+def build_store_from_pickles(folder=None, db_file=store_file):
+    data = mgp_data if folder is None else MGPData(folder)
+    build_store({name: data.get(name) for name in store_tables}, db_file,
+                source_fingerprint(data))
+
+
+""" get_store:
+    input:  db_file: path of the SQLite store (default: store_path)
+    output: an open sqlite3 connection to db_file, shared by later calls
+            for the same path; the store is (re)built from the tables of
+            mgp_data if db_file does not exist yet, or was built from
+            other tables (see source_fingerprint); the tables are only
+            loaded to rebuild it.
+"""
+def get_store(db_file=None):
+    db_file = store_path if db_file is None else db_file
+    fingerprint = source_fingerprint()
+    conn = store_connections.get(db_file)
+    if conn is not None and store_checked.get(db_file) == fingerprint:
+        return conn
+    if conn is None and os.path.exists(db_file):
+        conn = sqlite3.connect(db_file, check_same_thread=False)
+    if conn is None or store_fingerprint(conn) != fingerprint:
+        if conn is not None:
+            conn.close()
+        print(f"building {db_file} from the MGP tables (they changed, or it is new).")
+        build_store_from_pickles(db_file=db_file)
+        conn = sqlite3.connect(db_file, check_same_thread=False)
+    store_connections[db_file] = conn
+    store_checked[db_file] = fingerprint
+    return conn
+
+
+""" use_store:
+    input:  db_file: path of a SQLite store
+    output: a context manager in which get_store() (and so find_degrees and
+            find_schools_of_degrees) uses db_file; on exit the connection
+            to db_file is closed and the previous default comes back.
+"""
+@contextlib.contextmanager
+def use_store(db_file):
+    global store_path
+    previous, store_path = store_path, db_file
+    try:
+        yield get_store(db_file)
+    finally:
+        store_path = previous
+        close_store(db_file)
+
+
+""" load_id_table:
+    input:  conn: sqlite3 connection
+            name: prefix of the name of a temporary table of ids
+            ids:  list-like of ints
+    output: the name of the new table: temp.<name> holds the distinct ids,
+            as an integer primary key, ready to be joined against in a
+            single indexed query. The name is unique to this call; drop the
+            table with drop_id_tables.
+"""
+def load_id_table(conn, name, ids):
+    name = f"{name}_{next(id_table_numbers)}"
+    conn.execute(f"create temp table {name} (id integer primary key)")
+    ids = np.unique(np.asarray(ids, dtype=np.int64))
+    conn.executemany(f"insert into temp.{name} (id) values (?)",
+                     ((int(i),) for i in ids))
+    return name
+
+
+""" drop_id_tables:
+    input:  conn: sqlite3 connection
+            names: outputs of load_id_table
+    output: None. The temporary tables are dropped.
+"""
+def drop_id_tables(conn, names):
+    for name in names:
+        conn.execute(f"drop table if exists temp.{name}")
+
+
+""" find_degrees:
+    input:  academic_ids: list-like of academic ids, or None for all
+            school_ids:   list-like of school ids, or None for all
+            year_range:   (first, last) for first <= year < last, or None for all
+            msc:          list-like of MSC codes, or None for all
+            conn:         sqlite3 connection (default: get_store())
+    output: a pd.DataFrame of the matching rows of the degree table.
+
+    note: id lists of any length go through temporary tables and joins,
+          so every lookup is a single parameterized, indexed query.
+"""
+def find_degrees(academic_ids=None, school_ids=None, year_range=None, msc=None,
+                 conn=None):
+    if conn is None:
+        conn = get_store()
+
+    joins, wheres, params, tables = [], [], [], []
+    try:
+        if academic_ids is not None:
+            tables.append(load_id_table(conn, "find_academic", academic_ids))
+            joins.append(f"join temp.{tables[-1]} a on a.id = d.academic")
+        if school_ids is not None:
+            tables.append(load_id_table(conn, "find_school", school_ids))
+            wheres.append("d.degree_id in (select g.degree from degree_grant g "
+                          f"join temp.{tables[-1]} s on s.id = g.school)")
+        if year_range is not None:
+            wheres.append("d.year >= ? and d.year < ?")
+            params.extend([int(year_range[0]), int(year_range[1])])
+        if msc is not None:
+            tables.append(load_id_table(conn, "find_msc", msc))
+            joins.append(f"join temp.{tables[-1]} m on m.id = d.msc")
+
+        query = " ".join(["select d.* from degree d"] + joins)
+        if len(wheres) > 0:
+            query = query + " where " + " and ".join(wheres)
+        return pd.read_sql_query(query, conn, params=params)
+    finally:
+        drop_id_tables(conn, tables)
+
+
+""" find_schools_of_degrees:
+    input:  degree_ids: list-like of degree ids
+            conn:       sqlite3 connection (default: get_store())
+    output: a pd.DataFrame with columns 'degree', 'school', 'school_name',
+            'lat', 'lng' for each degree granted by a school in the store.
+"""
+def find_schools_of_degrees(degree_ids, conn=None):
+    if conn is None:
+        conn = get_store()
+    table = load_id_table(conn, "find_degree", degree_ids)
+    try:
+        query = "select g.degree, g.school, s.school_name, s.lat, s.lng " \
+                f"from degree_grant g join temp.{table} i on i.id = g.degree " \
+                "join school s on s.school_id = g.school"
+        return pd.read_sql_query(query, conn)
+    finally:
+        drop_id_tables(conn, [table])
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ------------
+#  BEGIN MAIN
+# ------------
+
+if __name__ == "__main__":
+
+    # (re)build the store from the pickles in this folder
+    build_store_from_pickles()
+
+# ------------
+#   END  MAIN
+# ------------
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 21:15:00 2026
+
+@mcarlisle
+
+# Synthetic MGP tables (academic, advises, degree, degree_grant, school)
+# of any size, for benchmarks and tests without the real data:
+#     python mgp_synthetic.py 100000 [folder]     (writes <table>.pickle)
+# Their shape follows the real tables:
+# - years skew to the 20th century (a long tail back to the 1300s),
+#   and a few are missing (-1);
+# - schools sit in clusters around the big academic centers, with a
+#   Zipf-like popularity, and a few are not geocoded (lat = lng = 0,
+#   no country_code);
+# - advises is a DAG: every advisor got their degree 20 to 55 years before
+#   their student, mostly in the same cluster, and the number of students
+#   per advisor is heavy-tailed (a few advisors have a hundred or more);
+# - some academics have two degrees, some degrees two schools, and titles
+#   are drawn from a vocabulary per MSC code, some missing.
+# Everything is vectorized: 5M degrees take a minute or two.
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+import numpy as np
+import os
+import pandas as pd
+import pickle
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+# academic centers (lng, lat, weight): schools are placed around them
+geo_centers = [(-71.1, 42.4, 6), (-74.0, 40.7, 6), (-77.0, 38.9, 3), (-87.6, 41.9, 4),
+               (-122.2, 37.6, 5), (-118.2, 34.1, 3), (-79.4, 43.7, 2), (-97.7, 30.3, 2),
+               (-0.1, 51.5, 5), (2.3, 48.9, 5), (13.4, 52.5, 4), (11.6, 48.1, 3),
+               (8.5, 47.4, 2), (12.5, 41.9, 2), (37.6, 55.8, 4), (30.3, 59.9, 2),
+               (21.0, 52.2, 2), (19.0, 47.5, 1), (139.7, 35.7, 3), (116.4, 39.9, 3),
+               (121.5, 31.2, 2), (126.9, 37.6, 1), (77.2, 28.6, 1), (151.2, -33.9, 1),
+               (-46.6, -23.5, 1), (-58.4, -34.6, 1), (34.8, 32.1, 1), (18.4, -33.9, 1)]
+
+# the country of each center (ISO 3166 alpha-2), which the geocoder
+# gives its schools (see mgp_geocode.geocode_schools)
+geo_countries = ["US", "US", "US", "US", "US", "US", "CA", "US",
+                 "GB", "FR", "DE", "DE", "CH", "IT", "RU", "RU",
+                 "PL", "HU", "JP", "CN", "CN", "KR", "IN", "AU",
+                 "BR", "AR", "IL", "ZA"]
+
+# the two-digit MSC 2010 codes
+msc_codes = [0, 1, 3, 5, 6, 8, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 22, 26, 28,
+             30, 31, 32, 33, 34, 35, 37, 39, 40, 41, 42, 43, 44, 45, 46, 47, 49,
+             51, 52, 53, 54, 55, 57, 58, 60, 62, 65, 68, 70, 74, 76, 78, 80, 81,
+             82, 83, 85, 86, 90, 91, 92, 93, 94, 97]
+
+degree_types = ["Ph.D.", "Dr. rer. nat.", "D.Phil.", "Dr. sc.", "Ph.D.", "Ph.D."]
+
+syllables = ["al", "an", "ar", "co", "di", "el", "en", "fi", "ge", "ho", "in", "ka",
+             "li", "ma", "mo", "ne", "no", "or", "pa", "po", "ra", "ri", "se", "ta",
+             "te", "ti", "to", "un", "va", "ze"]
+title_words = ["on", "the", "theory", "of", "some", "problems", "in", "and",
+               "applications", "a", "study", "for", "with", "methods", "analysis"]
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" sorted_ids:
+    input:  rng: np.random.Generator
+            n: number of ids
+    output: n increasing ids, with gaps (as the MGP's).
+"""
+def sorted_ids(rng, n):
+    return np.cumsum(rng.integers(1, 4, n)).astype(np.int64)
+
+
+""" synthetic_years:
+    input:  rng, n
+    output: n years: most in the 20th century, fewer further back,
+            none after 2019.
+"""
+def synthetic_years(rng, n):
+    years = 2019 - rng.gamma(2.0, 22.0, n)
+    old = rng.random(n) < 0.08
+    years[old] = rng.uniform(1300, 1900, old.sum())
+    return np.clip(np.round(years), 1300, 2019).astype(np.int64)
+
+
+""" zipf_weights:
+    input:  rng, n, exponent
+    output: n weights summing to 1, in random order: the k-th largest
+            is proportional to 1 / k**exponent.
+"""
+def zipf_weights(rng, n, exponent=1.0):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return rng.permutation(weights / weights.sum())
+
+
+""" weighted_pick:
+    input:  rng
+            cumulative: cumulative weights of the candidates, in their order
+                        (with a leading 0)
+            lo, hi: for each draw, the candidates lo <= p < hi to pick from
+    output: one candidate position per draw, picked with probability
+            proportional to its weight, -1 where lo == hi.
+"""
+def weighted_pick(rng, cumulative, lo, hi):
+    empty = hi <= lo
+    u = cumulative[lo] + rng.random(len(lo)) * (cumulative[hi] - cumulative[lo])
+    picked = np.searchsorted(cumulative, u, side='right') - 1
+    picked = np.clip(picked, lo, np.maximum(hi - 1, lo))
+    return np.where(empty, -1, picked)
+
+
+""" synthetic_schools:
+    input:  rng, n_schools
+    output: (school, cluster, popularity): the school table, the geo center
+            of each school, and its popularity (weights summing to 1).
+"""
+def synthetic_schools(rng, n_schools):
+    centers = np.array(geo_centers, dtype=np.float64)
+    cluster = rng.choice(len(centers), n_schools, p=centers[:, 2] / centers[:, 2].sum())
+    lng = centers[cluster, 0] + rng.normal(0.0, 2.0, n_schools)
+    lat = np.clip(centers[cluster, 1] + rng.normal(0.0, 1.5, n_schools), -89.0, 89.0)
+    ungeocoded = rng.random(n_schools) < 0.03
+    lat[ungeocoded], lng[ungeocoded] = 0.0, 0.0
+    country_code = np.array(geo_countries, dtype=object)[cluster]
+    country_code[ungeocoded] = None
+    school_id = sorted_ids(rng, n_schools)
+    school = pd.DataFrame({'school_id': school_id,
+                           'school_name': [f"University {i} of Center {c}"
+                                           for i, c in zip(school_id, cluster)],
+                           'lat': lat, 'lng': lng, 'country_code': country_code})
+    return school, cluster, zipf_weights(rng, n_schools, 1.0)
+
+
+""" synthetic_advises:
+    input:  rng
+            years: year of each academic (no missing ones)
+            cluster: geo cluster of each academic's school
+            local: fraction of advisors from the student's cluster
+            two_advisors, no_advisor: fractions of students with two / none
+    output: (advisor, advisee) positions into the academics: a DAG,
+            every advisor 20 to 55 years older (by degree) than the student,
+            advisors picked with a heavy-tailed (capped Pareto) preference.
+"""
+def synthetic_advises(rng, years, cluster, local=0.7, two_advisors=0.1, no_advisor=0.04):
+    n = len(years)
+    # Pareto preferences, capped: the busiest advisors have a hundred or so students
+    fertility = np.minimum(rng.pareto(1.5, n) + 1.0, 100.0)
+
+    # candidates sorted by (cluster, year) for local advisors, by year for any
+    by_year = np.argsort(years, kind='stable')
+    local_key = cluster.astype(np.int64) * 10000 + years
+    by_local = np.argsort(local_key, kind='stable')
+    cumulative_year = np.concatenate([[0.0], np.cumsum(fertility[by_year])])
+    cumulative_local = np.concatenate([[0.0], np.cumsum(fertility[by_local])])
+    sorted_years, sorted_local = years[by_year], local_key[by_local]
+
+    def pick(students):
+        first, last = years[students] - 55, years[students] - 20
+        lo = np.searchsorted(sorted_years, first)
+        hi = np.searchsorted(sorted_years, last, side='right')
+        advisor = weighted_pick(rng, cumulative_year, lo, hi)
+        advisor = np.where(advisor >= 0, by_year[np.maximum(advisor, 0)], -1)
+        key = cluster[students].astype(np.int64) * 10000
+        lo = np.searchsorted(sorted_local, key + first)
+        hi = np.searchsorted(sorted_local, key + last, side='right')
+        local_advisor = weighted_pick(rng, cumulative_local, lo, hi)
+        use_local = (local_advisor >= 0) & (rng.random(len(students)) < local)
+        return np.where(use_local, by_local[np.maximum(local_advisor, 0)], advisor)
+
+    students = np.flatnonzero(rng.random(n) >= no_advisor)
+    students = np.concatenate([students, students[rng.random(len(students)) < two_advisors]])
+    advisors = pick(students)
+    edges = np.unique(np.stack([advisors, students], axis=1)[advisors >= 0], axis=0)
+    return edges[:, 0], edges[:, 1]
+
+
+""" synthetic_titles:
+    input:  rng
+            msc: the MSC code of each title (-1 for none)
+    output: list of titles: a few words of the code's own vocabulary
+            (a general one for -1) between common title words.
+"""
+def synthetic_titles(rng, msc):
+    n = len(msc)
+    words_per_code = 40
+    vocabulary = np.array(["".join(rng.choice(syllables, rng.integers(2, 5)))
+                           for _ in range((len(msc_codes) + 1) * words_per_code)], dtype=object)
+    code_index = np.searchsorted(msc_codes, msc)
+    code_index[msc < 0] = len(msc_codes)
+    picks = code_index[:, np.newaxis] * words_per_code + \
+            rng.integers(0, words_per_code, (n, 4))
+    lengths = rng.integers(1, 5, n)
+    leads = rng.choice(title_words, (n, 2))
+    topic = vocabulary[picks]
+    return [" ".join(list(lead[:k % 3]) + list(t[:k]))
+            for lead, t, k in zip(leads, topic, lengths)]
+
+
+""" generate_mgp_tables:
+    input:  n_degrees: about how many degrees to make
+            seed: random seed (the same seed gives the same tables)
+            n_schools: number of schools (default: one per 100 degrees, at least 50)
+    output: dict of { table name: pd.DataFrame } for academic, advises,
+            degree, degree_grant and school, with the columns of the MGP
+            tables, ready for mgp_data.set(name, table).
+"""
+def generate_mgp_tables(n_degrees, seed=0, n_schools=None):
+    rng = np.random.default_rng(seed)
+    n_schools = max(50, n_degrees // 100) if n_schools is None else n_schools
+    school, school_cluster, popularity = synthetic_schools(rng, n_schools)
+
+    # academics, each at one school, most with one degree
+    n_academics = max(1, int(round(n_degrees / 1.03)))
+    academic_id = sorted_ids(rng, n_academics)
+    academic_school = rng.choice(n_schools, n_academics, p=popularity)
+    years = synthetic_years(rng, n_academics)
+    academic = pd.DataFrame({'academic_id': academic_id,
+                             'given_name': rng.choice(syllables, n_academics),
+                             'family_name': [f"Family{i}" for i in academic_id]})
+
+    advisor, advisee = synthetic_advises(rng, years, school_cluster[academic_school])
+    advises = pd.DataFrame({'advisor': academic_id[advisor], 'advisee': academic_id[advisee]})
+
+    # degrees: one per academic, a second one (a few years later) for some
+    second = np.flatnonzero(rng.random(n_academics) < 0.03)
+    owner = np.sort(np.concatenate([np.arange(n_academics), second]))
+    is_second = np.concatenate([[False], owner[1:] == owner[:-1]])
+    n = len(owner)
+    year = np.minimum(years[owner] + is_second * rng.integers(2, 9, n), 2019)
+    year[rng.random(n) < 0.06] = -1
+    msc = np.asarray(msc_codes)[rng.choice(len(msc_codes), n, p=zipf_weights(rng, len(msc_codes), 0.8))]
+    msc[rng.random(n) < 0.35] = -1
+    thesis = np.array(synthetic_titles(rng, msc), dtype=object)
+    thesis[rng.random(n) < 0.12] = ""
+    degree = pd.DataFrame({'degree_id': sorted_ids(rng, n),
+                           'academic': academic_id[owner],
+                           'thesis': thesis,
+                           'year': year,
+                           'msc': msc,
+                           'degree_type': rng.choice(degree_types, n)})
+
+    # the academic's school grants the degree; a few degrees have two schools
+    granted = school['school_id'].to_numpy()[academic_school[owner]]
+    granted[is_second] = school['school_id'].to_numpy()[
+        rng.choice(n_schools, is_second.sum(), p=popularity)]
+    has_grant = rng.random(n) >= 0.01
+    joint = np.flatnonzero(has_grant & (rng.random(n) < 0.015))
+    degree_grant = pd.DataFrame({
+        'degree': np.concatenate([degree['degree_id'].to_numpy()[has_grant],
+                                  degree['degree_id'].to_numpy()[joint]]),
+        'school': np.concatenate([granted[has_grant],
+                                  school['school_id'].to_numpy()[
+                                      rng.choice(n_schools, len(joint), p=popularity)]])})
+    degree_grant = degree_grant.sort_values('degree', kind='stable', ignore_index=True)
+
+    return {'academic': academic, 'advises': advises, 'degree': degree,
+            'degree_grant': degree_grant, 'school': school}
+
+
+""" set_mgp_tables:
+    input:  tables: output of generate_mgp_tables
+            data: the data context (default: the shared mgp_data)
+    output: None. The tables replace the MGP tables of data.
+"""
+def set_mgp_tables(tables, data=None):
+    if data is None:
+        from mgp_data import mgp_data
+        data = mgp_data
+    for name, table in tables.items():
+        data.set(name, table)
+
+
+""" save_mgp_tables:
+    input:  tables: output of generate_mgp_tables
+            folder: where to write <table>.pickle
+    output: None.
+"""
+def save_mgp_tables(tables, folder="."):
+    os.makedirs(folder, exist_ok=True)
+    for name, table in tables.items():
+        with open(os.path.join(folder, f"{name}.pickle"), "wb") as f:
+            pickle.dump(table, f)
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ------------
+#  BEGIN MAIN
+# ------------
+
+if __name__ == "__main__":
+
+    import sys
+    n_degrees = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    folder = sys.argv[2] if len(sys.argv) > 2 else "."
+    tables = generate_mgp_tables(n_degrees)
+    save_mgp_tables(tables, folder)
+    print("mgp_synthetic: " + ", ".join(f"{name} {len(table)}" for name, table in tables.items())
+          + f" written to {folder}.")
+
+# ------------
+#   END  MAIN
+# ------------
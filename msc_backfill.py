@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 18:20:00 2026
+
+@mcarlisle
+
+# Backfill of the MSC code of the titled but unclassified theses
+# (notebook 3's thesis_msc_titled_unfilled), into the degree store:
+#     python msc_backfill.py [model_file] [--processes N]
+# Degrees are streamed from the store in chunks through a process pool;
+# the model is converted once per version to a compact folder (msc_compact),
+# whose arrays every worker memory-maps, so they share its pages. Predictions go to their own table, msc_predicted, tagged with the
+# model version (a hash of the model file) -- degree.msc is never touched.
+# Each chunk is committed as it comes back, so an interrupted run resumes
+# where it stopped, and a run with a new model only redoes older predictions.
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+import argparse
+import hashlib
+import multiprocessing
+import numpy as np
+import os
+import pandas as pd
+import shutil
+import sqlite3
+import time
+from mgp_store import drop_id_tables, get_store, load_id_table, store_file
+from msc_compact import CompactModel, export_compact_model, load_model
+from msc_service import model_file
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+# compact copies of the models (see msc_compact), one per model version
+shared_model_folder = "msc_models"
+
+# the model of a backfill worker process, loaded by init_worker
+worker_model = None
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" model_version:
+    input:  filename: a model file, or a compact model folder
+    output: str: the first 16 hex digits of the SHA-256 of the file
+            (of its files, in name order), which changes whenever the model does.
+"""
+def model_version(filename):
+    digest = hashlib.sha256()
+    files = [filename] if not os.path.isdir(filename) else \
+            [os.path.join(filename, name) for name in sorted(os.listdir(filename))]
+    for path in files:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+""" share_model:
+    input:  filename: the pickled sklearn pipeline, or a compact model
+                      folder (see msc_compact)
+            folder: where to keep the compact copies of pickled models
+    output: (path, version): the compact model folder the workers load
+            (a pickle is exported to folder/<version> once per version,
+            and checked against the pipeline on titles of its own terms);
+            a compact model folder is used as it is.
+
+    note: a joblib copy loaded with mmap_mode='r' would not be shared:
+          sklearn copies every tree's nodes on unpickling, and the
+          vectorizer's vocabulary is a dict.
+"""
+def share_model(filename=model_file, folder=shared_model_folder):
+    version = model_version(filename)
+    if os.path.isdir(filename):
+        return filename, version
+    path = os.path.join(folder, version)
+    if not os.path.exists(path):
+        pipe = load_model(filename)
+        shutil.rmtree(path + ".tmp", ignore_errors=True)
+        terms = sorted(pipe.steps[0][1].vocabulary_)[:2000]
+        export_compact_model(pipe, path + ".tmp",
+                             verify_texts=terms + [" ".join(terms[:50]), ""])
+        os.replace(path + ".tmp", path)
+    return path, version
+
+
+""" init_worker:
+    input:  path: a compact model folder (see share_model)
+    output: None. The worker's model is loaded, its arrays memory-mapped.
+"""
+def init_worker(path):
+    global worker_model
+    worker_model = CompactModel(path)
+
+
+""" classify_chunk:
+    input:  chunk: (degree_ids, titles)
+    output: (degree_ids, codes, confidences): the predicted MSC code of each
+            title and its probability under the forest.
+"""
+def classify_chunk(chunk):
+    degree_ids, titles = chunk
+    proba = worker_model.predict_proba(titles)
+    best = np.argmax(proba, axis=1)
+    codes = worker_model.classes_[best]
+    return degree_ids, codes, proba[np.arange(len(best)), best]
+
+
+""" create_prediction_table:
+    input:  conn: connection to the degree store
+    output: None. The store holds the table msc_predicted
+            (degree_id, msc, confidence, model_version, source, predicted_at).
+"""
+def create_prediction_table(conn):
+    conn.execute("create table if not exists msc_predicted ("
+                 "degree_id integer primary key, msc integer, confidence real, "
+                 "model_version text, source text, predicted_at real)")
+    conn.execute("create index if not exists msc_predicted_model_version "
+                 "on msc_predicted (model_version)")
+    conn.commit()
+
+
+""" pending_chunks:
+    input:  db_file: path of the degree store
+            version: the model version of this run
+            chunk_size: degrees per chunk
+    output: a generator of (degree_ids, titles) for the titled degrees without
+            an MSC code (msc = -1) that have no prediction of this version,
+            in degree_id order, read one chunk at a time on its own connection
+            (the pool's task thread reads it; an interrupted run closes it
+            from another thread).
+"""
+def pending_chunks(db_file, version, chunk_size=5000):
+    conn = sqlite3.connect(db_file, check_same_thread=False)
+    last = -1
+    query = "select d.degree_id, d.thesis from degree d " \
+            "left join msc_predicted p on p.degree_id = d.degree_id " \
+            "where d.msc = -1 and d.thesis != '' and d.degree_id > ? " \
+            "and (p.model_version is null or p.model_version != ?) " \
+            "order by d.degree_id limit ?"
+    try:
+        while True:
+            rows = conn.execute(query, (last, version, chunk_size)).fetchall()
+            if len(rows) == 0:
+                return
+            last = rows[-1][0]
+            yield [r[0] for r in rows], [r[1] for r in rows]
+    finally:
+        conn.close()
+
+
+""" backfill_msc:
+    input:  model: the pickled sklearn pipeline (default: msc_service.model_file),
+                   or a compact model folder
+            db_file: path of the degree store (built from the pickles if missing)
+            processes: number of worker processes (None: one per core)
+            chunk_size: degrees per chunk
+    output: dict with the model 'version', the number of degrees 'classified'
+            by this run and the 'seconds' it took.
+
+    note: safe to interrupt and re-run: every chunk is committed on arrival,
+          and only degrees without a prediction of this version are read.
+"""
+def backfill_msc(model=model_file, db_file=store_file, processes=None, chunk_size=5000):
+    start = time.perf_counter()
+    get_store(db_file)
+    conn = sqlite3.connect(db_file)
+    create_prediction_table(conn)
+    path, version = share_model(model)
+    source = f"backfill:{os.path.basename(model)}"
+
+    classified = 0
+    with multiprocessing.Pool(processes, initializer=init_worker, initargs=(path,)) as pool:
+        chunks = pending_chunks(db_file, version, chunk_size)
+        for degree_ids, codes, confidences in pool.imap_unordered(classify_chunk, chunks):
+            now = time.time()
+            conn.executemany("insert or replace into msc_predicted values (?, ?, ?, ?, ?, ?)",
+                             [(int(d), int(c), float(p), version, source, now)
+                              for d, c, p in zip(degree_ids, codes, confidences)])
+            conn.commit()  # the checkpoint
+            classified += len(degree_ids)
+            print(f"backfill_msc: {classified} degrees classified.", end="\r")
+    conn.close()
+    print(f"backfill_msc: {classified} degrees classified with model {version}.")
+    return {'version': version, 'classified': classified,
+            'seconds': time.perf_counter() - start}
+
+
+""" load_predictions:
+    input:  degree_ids: list-like of degree ids, or None for all
+            db_file: path of the degree store
+            version: keep only predictions of this model version (None: any)
+    output: a pd.DataFrame of msc_predicted rows.
+"""
+def load_predictions(degree_ids=None, db_file=store_file, version=None):
+    conn = get_store(db_file)
+    create_prediction_table(conn)
+    query, params = "select p.* from msc_predicted p", []
+    tables = []
+    if degree_ids is not None:
+        tables.append(load_id_table(conn, "find_predicted", degree_ids))
+        query = query + f" join temp.{tables[-1]} i on i.id = p.degree_id"
+    if version is not None:
+        query = query + " where p.model_version = ?"
+        params.append(version)
+    try:
+        return pd.read_sql_query(query, conn, params=params)
+    finally:
+        drop_id_tables(conn, tables)
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ------------
+#  BEGIN MAIN
+# ------------
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Backfill MSC codes of unclassified theses.")
+    parser.add_argument("model", nargs="?", default=model_file)
+    parser.add_argument("--db", default=store_file)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+    backfill_msc(args.model, args.db, args.processes, args.chunk_size)
+
+# ------------
+#   END  MAIN
+# ------------
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 19:20:00 2026
+
+@mcarlisle
+
+# A compact, memory-mappable format for the CountVectorizer + RandomForest
+# pipeline of what_msc_are_you (count_rf_20190729.pickle), and a NumPy-only
+# predictor for it, with the same probabilities as the pipeline, bit for bit.
+#     python msc_compact.py ../count_rf_20190729.pickle count_rf_20190729
+# The model is a folder of .npy arrays (the tree nodes of every tree, end to
+# end, and the leaf class probabilities, stored sparse) plus the vocabulary
+# as a string heap (as in mgp_columnar), restricted to the terms the trees
+# actually split on; a manifest.json describes it. Loading memory-maps the
+# arrays, so processes share the pages, and needs no sklearn.
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+import json
+import numpy as np
+import os
+import re
+from mgp_columnar import read_string_column, write_string_column
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+compact_format = "msc-compact-forest-1"
+
+# the arrays of a compact model, each stored as <name>.npy
+compact_arrays = ["classes", "roots", "feature", "threshold", "left", "right",
+                  "node_leaf", "leaf_ptr", "leaf_class", "leaf_proba",
+                  "spine", "spine_pos", "spine_nodes", "spine_start", "jump_key"]
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" leaf_probabilities:
+    input:  tree: a fitted sklearn DecisionTreeClassifier (one output)
+            n_classes: number of classes of the forest
+    output: np.array (n_nodes, n_classes): the class probabilities that
+            tree.predict_proba gives for a sample ending in each node.
+
+    note: since sklearn 1.4, tree_.value holds the class fractions and
+          predict_proba returns them as they are; before, it held counts
+          that predict_proba divided by their sum. Both are reproduced
+          exactly, so the compact model matches the sklearn it came from.
+"""
+def leaf_probabilities(tree, n_classes):
+    import sklearn
+    proba = np.array(tree.tree_.value[:, 0, :n_classes], dtype=np.float64)
+    version = tuple(int(v) for v in re.findall(r"\d+", sklearn.__version__)[:2])
+    if version < (1, 4):
+        normalizer = proba.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        proba /= normalizer
+    return proba
+
+
+""" zero_spines:
+    input:  feature, threshold, left, right: the node arrays of all trees
+                   (feature -1 at leaves)
+            n_features: number of features
+    output: dict of the arrays that let a title skip every node splitting
+            on a term it does not contain. A title without the term of a
+            node goes to its "zero child" (left if 0 <= threshold); the
+            chains of zero children (spines) cut the trees into paths
+            ending at leaves. 'spine', 'spine_pos': each node's spine and
+            position in it; 'spine_nodes', 'spine_start': the nodes of each
+            spine, in order; 'jump_key': (spine * n_features + feature)
+            * spine_length + position of every inner node, sorted; and
+            'spine_length': the length of the longest spine, plus one.
+"""
+def zero_spines(feature, threshold, left, right, n_features):
+    inner = feature >= 0
+    zero_child = np.where(inner, np.where(0.0 <= threshold, left, right), -1)
+    head = np.ones(len(feature), dtype=bool)
+    head[zero_child[inner]] = False
+    spine_nodes, spine_start = [], [0]
+    for node in np.flatnonzero(head):
+        while node != -1:
+            spine_nodes.append(node)
+            node = zero_child[node]
+        spine_start.append(len(spine_nodes))
+    spine_nodes = np.asarray(spine_nodes, dtype=np.int64)
+    spine_start = np.asarray(spine_start, dtype=np.int64)
+    lengths = np.diff(spine_start)
+    spine = np.empty(len(feature), dtype=np.int64)
+    spine[spine_nodes] = np.repeat(np.arange(len(lengths)), lengths)
+    spine_pos = np.empty(len(feature), dtype=np.int64)
+    spine_pos[spine_nodes] = np.arange(len(spine_nodes)) - np.repeat(spine_start[:-1], lengths)
+    spine_length = int(lengths.max()) + 1
+    nodes = np.flatnonzero(inner)
+    jump_key = np.sort((spine[nodes] * n_features + feature[nodes]) * spine_length + spine_pos[nodes])
+    return {'spine': spine, 'spine_pos': spine_pos, 'spine_nodes': spine_nodes,
+            'spine_start': spine_start, 'jump_key': jump_key, 'spine_length': spine_length}
+
+
+""" export_compact_model:
+    input:  pipe: a fitted sklearn Pipeline of a CountVectorizer (word
+                  analyzer, unigrams) and a RandomForestClassifier
+            folder: the folder to write the compact model to
+            verify_texts: list of str; if given, the compact model must give
+                          exactly pipe.predict_proba on them, or this fails
+    output: None. folder holds manifest.json, the arrays of compact_arrays,
+            and the used vocabulary as the string column 'terms'.
+"""
+def export_compact_model(pipe, folder, verify_texts=None):
+    vectorizer, forest = pipe.steps[0][1], pipe.steps[-1][1]
+    assert vectorizer.analyzer == 'word' and tuple(vectorizer.ngram_range) == (1, 1) \
+           and vectorizer.preprocessor is None and vectorizer.tokenizer is None \
+           and vectorizer.strip_accents is None, \
+           "export_compact_model: only the default word analyzer is supported"
+    assert forest.n_outputs_ == 1, "export_compact_model: one output only"
+
+    # only the terms some tree splits on matter to the forest
+    used = np.unique(np.concatenate([e.tree_.feature[e.tree_.children_left != -1]
+                                     for e in forest.estimators_]))
+    compact_index = np.full(len(vectorizer.vocabulary_), -1, dtype=np.int32)
+    compact_index[used] = np.arange(len(used), dtype=np.int32)
+    terms = np.empty(len(vectorizer.vocabulary_), dtype=object)
+    for term, j in vectorizer.vocabulary_.items():
+        terms[j] = term
+
+    n_classes = len(forest.classes_)
+    roots, feature, threshold, left, right = [], [], [], [], []
+    node_leaf, leaf_ptr, leaf_class, leaf_proba = [], [np.zeros(1, dtype=np.int64)], [], []
+    offset, leaves = 0, 0
+    for e in forest.estimators_:
+        t = e.tree_
+        is_leaf = t.children_left == -1
+        roots.append(offset)
+        feature.append(np.where(is_leaf, -1, compact_index[np.maximum(t.feature, 0)]).astype(np.int32))
+        threshold.append(t.threshold.astype(np.float64))
+        left.append(np.where(is_leaf, -1, t.children_left + offset).astype(np.int64))
+        right.append(np.where(is_leaf, -1, t.children_right + offset).astype(np.int64))
+
+        # leaf probabilities, sparse: most leaves hold one class
+        proba = leaf_probabilities(e, n_classes)[is_leaf]
+        ids = np.full(t.node_count, -1, dtype=np.int64)
+        ids[is_leaf] = np.arange(leaves, leaves + is_leaf.sum())
+        node_leaf.append(ids)
+        nonzero_rows, nonzero_classes = np.nonzero(proba)
+        leaf_ptr.append(leaf_ptr[-1][-1] +
+                        np.cumsum(np.bincount(nonzero_rows, minlength=len(proba))))
+        leaf_class.append(nonzero_classes.astype(np.int32))
+        leaf_proba.append(proba[nonzero_rows, nonzero_classes])
+        offset += t.node_count
+        leaves += is_leaf.sum()
+
+    arrays = {'classes': np.asarray(forest.classes_),
+              'roots': np.asarray(roots, dtype=np.int64),
+              'feature': np.concatenate(feature), 'threshold': np.concatenate(threshold),
+              'left': np.concatenate(left), 'right': np.concatenate(right),
+              'node_leaf': np.concatenate(node_leaf), 'leaf_ptr': np.concatenate(leaf_ptr),
+              'leaf_class': np.concatenate(leaf_class), 'leaf_proba': np.concatenate(leaf_proba)}
+    arrays.update(zero_spines(arrays['feature'], arrays['threshold'],
+                              arrays['left'], arrays['right'], len(used)))
+
+    os.makedirs(folder, exist_ok=True)
+    for name in compact_arrays:
+        np.save(os.path.join(folder, f"{name}.npy"), arrays[name])
+    write_string_column(os.path.join(folder, "terms"), terms[used].tolist())
+    manifest = {'format': compact_format,
+                'n_estimators': len(forest.estimators_),
+                'n_features': int(len(used)),
+                'vocabulary_size': len(vectorizer.vocabulary_),
+                'lowercase': bool(vectorizer.lowercase),
+                'token_pattern': vectorizer.token_pattern,
+                'binary': bool(vectorizer.binary),
+                'spine_length': arrays['spine_length']}
+    with open(os.path.join(folder, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=1)
+
+    if verify_texts is not None:
+        assert np.array_equal(CompactModel(folder).predict_proba(verify_texts),
+                              pipe.predict_proba(verify_texts)), \
+               "export_compact_model: compact predictions differ from the pipeline"
+
+
+""" load_model:
+    input:  filename: a compact model folder, or a pickled sklearn pipeline
+    output: the model: a CompactModel, or the unpickled pipeline.
+"""
+def load_model(filename):
+    if os.path.isdir(filename):
+        return CompactModel(filename)
+    import pickle
+    with open(filename, 'rb') as f:
+        return pickle.load(f)
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ----------------------------
+#  START CLASS DEFINITIONS
+# ----------------------------
+""" CompactModel:
+    input:  folder: output folder of export_compact_model
+            mmap: boolean: if True, memory-map the arrays (read-only)
+
+    A drop-in for the pipeline's predict, predict_proba and classes_,
+    with NumPy only. Titles are tokenized as the CountVectorizer does
+    (lowercase, token_pattern); stop words need no removing, as they are
+    never in the vocabulary. Each tree is walked for all titles at once,
+    jumping along zero spines (see zero_spines) straight to the next node
+    that splits on a term of the title, and the leaf probabilities are
+    summed over the trees in order and divided by their number, as
+    RandomForestClassifier does (with n_jobs=1: in parallel, sklearn's
+    own summation order varies).
+"""
+class CompactModel:
+
+    def __init__(self, folder, mmap=True):
+        with open(os.path.join(folder, "manifest.json"), "r") as f:
+            self.manifest = json.load(f)
+        assert self.manifest['format'] == compact_format, \
+            f"CompactModel: {folder} is not a {compact_format} model"
+        for name in compact_arrays:
+            # plain ndarray views of the maps: indexing np.memmap is slower
+            setattr(self, name, np.asarray(np.load(os.path.join(folder, f"{name}.npy"),
+                                                   mmap_mode='r' if mmap else None)))
+        terms = read_string_column(os.path.join(folder, "terms"))
+        self.term_index = {term: j for j, term in enumerate(terms)}
+        self.token_re = re.compile(self.manifest['token_pattern'])
+        self.classes_ = np.asarray(self.classes)
+        self.verbose = False
+
+    def count_terms(self, texts):
+        rows, cols = [], []
+        for i, text in enumerate(texts):
+            if self.manifest['lowercase']:
+                text = text.lower()
+            for token in self.token_re.findall(text):
+                j = self.term_index.get(token)
+                if j is not None:
+                    rows.append(i)
+                    cols.append(j)
+        keys = np.asarray(rows, dtype=np.int64) * self.manifest['n_features'] + \
+               np.asarray(cols, dtype=np.int64)
+        keys, counts = np.unique(keys, return_counts=True)
+        if self.manifest['binary']:
+            counts = np.ones_like(counts)
+        return keys, counts.astype(np.float64)
+
+    def apply(self, keys, counts, n):
+        # the leaf reached by each of the n titles in each tree
+        n_features = self.manifest['n_features']
+        length = self.manifest['spine_length']
+        row_ptr = np.searchsorted(keys // n_features, np.arange(n + 1))
+        terms = keys % n_features
+        leaves = np.empty((len(self.roots), n), dtype=np.int64)
+        for t, root in enumerate(self.roots):
+            node = np.full(n, root, dtype=np.int64)
+            active = np.arange(n) if self.feature[root] >= 0 else np.zeros(0, dtype=np.int64)
+            while len(active) > 0:
+                # for every term of every active title, the next node on the
+                # title's spine that splits on that term, if any
+                sizes = row_ptr[active + 1] - row_ptr[active]
+                title = np.repeat(active, sizes)
+                entry = np.repeat(row_ptr[active] - np.cumsum(sizes) + sizes, sizes) + \
+                        np.arange(sizes.sum())
+                spine = self.spine[node[title]]
+                wanted = spine * n_features + terms[entry]
+                at = np.searchsorted(self.jump_key, wanted * length + self.spine_pos[node[title]])
+                at = np.minimum(at, len(self.jump_key) - 1)
+                found = self.jump_key[at] // length == wanted
+                position = np.where(found, self.jump_key[at] % length, length)
+
+                # the nearest of them, per title (length: none, go to the spine's leaf)
+                nearest = np.full(n, length, dtype=np.int64)
+                has_terms = sizes > 0
+                if has_terms.any():
+                    starts = np.cumsum(sizes) - sizes
+                    nearest[active[has_terms]] = np.minimum.reduceat(position, starts[has_terms])
+                spines = self.spine[node[active]]
+                ends = nearest[active] == length
+                node[active[ends]] = self.spine_nodes[self.spine_start[spines[ends] + 1] - 1]
+
+                split, spines = active[~ends], spines[~ends]
+                here = self.spine_nodes[self.spine_start[spines] + nearest[split]]
+                query = split * n_features + self.feature[here]
+                at = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+                x = np.where(keys[at] == query, counts[at], 0.0)
+                node[split] = np.where(x <= self.threshold[here], self.left[here], self.right[here])
+                active = split[self.feature[node[split]] >= 0]
+            leaves[t] = self.node_leaf[node]
+        return leaves
+
+    def predict_proba(self, texts):
+        texts = list(texts)
+        keys, counts = self.count_terms(texts)
+        leaves = self.apply(keys, counts, len(texts))
+        proba = np.zeros((len(texts), len(self.classes_)), dtype=np.float64)
+        for t in range(len(self.roots)):
+            start, end = self.leaf_ptr[leaves[t]], self.leaf_ptr[leaves[t] + 1]
+            sizes = end - start
+            rows = np.repeat(np.arange(len(texts)), sizes)
+            at = np.repeat(start - np.cumsum(sizes) + sizes, sizes) + np.arange(sizes.sum())
+            proba[rows, self.leaf_class[at]] += self.leaf_proba[at]
+        proba /= self.manifest['n_estimators']
+        return proba
+
+    def predict(self, texts):
+        return self.classes_[np.argmax(self.predict_proba(texts), axis=1)]
+
+# ----------------------------
+#   END  CLASS DEFINITIONS
+# ----------------------------
+
+
+# ------------
+#  BEGIN MAIN
+# ------------
+
+if __name__ == "__main__":
+
+    import sys
+    # python msc_compact.py <pickled pipeline> <compact model folder>
+    pipe = load_model(sys.argv[1])
+    export_compact_model(pipe, sys.argv[2])
+    manifest = CompactModel(sys.argv[2]).manifest
+    print(f"msc_compact: {manifest['n_features']} of {manifest['vocabulary_size']} terms "
+          f"used by {manifest['n_estimators']} trees, written to {sys.argv[2]}.")
+
+# ------------
+#   END  MAIN
+# ------------
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 20:25:00 2026
+
+@mcarlisle
+
+# The 2-D t-SNE map of the LDA topic vectors of notebook 5
+# (tsne_lda_20190730.pickle), made fast, and kept up to date without
+# re-running t-SNE:
+# - layout() embeds a large topic matrix: PCA first (for wide inputs), then
+#   Barnes-Hut t-SNE (FFT-accelerated openTSNE if it is installed), on at
+#   most max_layout rows; any other rows are placed as below.
+# - FrozenEmbedding keeps an embedding fixed and places new theses on it,
+#   at the distance-weighted mean position of their nearest embedded
+#   neighbours in topic space, so a new dump is added to the topic scatter
+#   in seconds.
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+import numpy as np
+import os
+import pandas as pd
+import pickle
+import scipy.sparse as sp
+from sklearn.decomposition import PCA, TruncatedSVD
+from sklearn.manifold import TSNE
+from sklearn.neighbors import NearestNeighbors
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+embedding_file = "tsne_lda_embedding.pickle"
+
+# what notebook 5 saved: the LDA topic matrix of the training titles, and its t-SNE
+lda_ft_file = "lda_ft_20190730.pickle"
+tsne_file = "tsne_lda_20190730.pickle"
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" reduce_dimensions:
+    input:  X: np.array or sparse matrix (n, d)
+            n_components: dimensions to keep
+            random_state: seed
+    output: (reduced, reducer): X itself (dense) and None if it is narrow
+            enough, else its PCA (TruncatedSVD if sparse) and the fitted PCA.
+"""
+def reduce_dimensions(X, n_components=50, random_state=0):
+    if X.shape[1] <= n_components:
+        return (X.toarray() if sp.issparse(X) else np.asarray(X)), None
+    if sp.issparse(X):
+        reducer = TruncatedSVD(n_components, random_state=random_state)
+    else:
+        reducer = PCA(n_components, random_state=random_state)
+    return reducer.fit_transform(X), reducer
+
+
+""" tsne:
+    input:  X: np.array (n, d)
+            perplexity, random_state: as for TSNE
+            angle: the Barnes-Hut trade-off (notebook 5 used .99)
+            n_jobs: threads
+    output: np.array (n, 2): the t-SNE embedding of X, by openTSNE's FFT
+            gradients if installed, else sklearn's Barnes-Hut, PCA-initialized.
+"""
+def tsne(X, perplexity=30.0, random_state=0, angle=0.5, n_jobs=-1):
+    try:
+        from openTSNE import TSNE as OpenTSNE
+    except ImportError:
+        OpenTSNE = None
+    if OpenTSNE is not None:
+        model = OpenTSNE(perplexity=perplexity, initialization='pca',
+                         negative_gradient_method='fft', n_jobs=n_jobs,
+                         random_state=random_state)
+        return np.asarray(model.fit(X))
+    model = TSNE(n_components=2, perplexity=min(perplexity, (len(X) - 1) / 3),
+                 method='barnes_hut', angle=angle, init='pca',
+                 random_state=random_state, n_jobs=n_jobs)
+    return model.fit_transform(X)
+
+
+""" layout:
+    input:  X: topic matrix (n, d), e.g. notebook 5's lda_ft, dense or sparse
+            max_layout: most rows embedded by t-SNE; the others, if any, are
+                        a random sample's neighbours and are placed on it
+            n_components: PCA dimensions before t-SNE
+            k: neighbours used to place the other rows
+            random_state, perplexity, angle: as for tsne
+    output: a FrozenEmbedding of every row of X (its .positions, in row order).
+"""
+def layout(X, max_layout=50000, n_components=50, k=10, random_state=0,
+           perplexity=30.0, angle=0.5):
+    reduced, reducer = reduce_dimensions(X, n_components, random_state)
+    n = reduced.shape[0]
+    if n <= max_layout:
+        sample = np.arange(n)
+    else:
+        sample = np.sort(np.random.RandomState(random_state).choice(n, max_layout, replace=False))
+    embedding = FrozenEmbedding(reduced[sample], tsne(reduced[sample], perplexity,
+                                                      random_state, angle), k)
+    if len(sample) < n:
+        rest = np.setdiff1d(np.arange(n), sample)
+        positions = np.zeros((n, 2), dtype=embedding.positions.dtype)
+        positions[sample] = embedding.positions
+        positions[rest] = embedding.place(reduced[rest], projected=True)
+        embedding = FrozenEmbedding(reduced, positions, k)
+    embedding.reducer = reducer
+    return embedding
+
+
+""" load_embedding:
+    input:  filename: a pickled FrozenEmbedding (default: embedding_file)
+    output: the FrozenEmbedding; if filename is missing, the one made from
+            notebook 5's pickles (lda_ft_file, tsne_file), saved to filename.
+"""
+def load_embedding(filename=embedding_file):
+    if os.path.exists(filename):
+        with open(filename, 'rb') as f:
+            return pickle.load(f)
+    with open(lda_ft_file, 'rb') as f:
+        lda_ft = pickle.load(f)
+    with open(tsne_file, 'rb') as f:
+        tsne_lda = pickle.load(f)
+    embedding = FrozenEmbedding(lda_ft, tsne_lda)
+    embedding.save(filename)
+    return embedding
+
+
+""" scatter_data:
+    input:  embedding: a FrozenEmbedding
+            topics: topic matrix (n, n_topics) of the titles to show
+            texts: the n titles
+            threshold: keep the titles whose top topic weighs more
+                       (notebook 5's cut; 0 keeps all)
+    output: pd.DataFrame with x, y, topic_key, content: the columns of
+            notebook 5's Bokeh ColumnDataSource, new titles placed by the
+            embedding.
+"""
+def scatter_data(embedding, topics, texts, threshold=0.0):
+    topics = np.asarray(topics)
+    positions = embedding.place(topics)
+    keep = np.amax(topics, axis=1) > threshold
+    return pd.DataFrame({'x': positions[keep, 0], 'y': positions[keep, 1],
+                         'topic_key': topics[keep].argmax(axis=1),
+                         'content': np.asarray(texts, dtype=object)[keep]})
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ----------------------------
+#  START CLASS DEFINITIONS
+# ----------------------------
+""" FrozenEmbedding:
+    input:  points: np.array (n, d): the vectors that were embedded
+            positions: np.array (n, 2): their embedding
+            k: neighbours used to place a new vector
+            reducer: None, or the fitted PCA that made points of the
+                     original vectors (then place and add take those)
+
+    place(X) puts each row of X at the mean position of its k nearest
+    points, weighted by inverse distance (at the position of a point it
+    equals); the embedded points never move. add(X) places X and keeps it,
+    so later theses may land next to it.
+"""
+class FrozenEmbedding:
+
+    def __init__(self, points, positions, k=10, reducer=None):
+        self.points = np.asarray(points, dtype=np.float64)
+        self.positions = np.asarray(positions)
+        self.k = k
+        self.reducer = reducer
+        self.index = None
+
+    def neighbours(self):
+        if self.index is None:
+            self.index = NearestNeighbors(n_neighbors=min(self.k, len(self.points)))
+            self.index.fit(self.points)
+        return self.index
+
+    def project(self, X):
+        if self.reducer is not None:
+            X = self.reducer.transform(X)
+        return X.toarray() if sp.issparse(X) else np.asarray(X, dtype=np.float64)
+
+    def place(self, X, projected=False):
+        X = X if projected else self.project(X)
+        if len(X) == 0:
+            return np.zeros((0, 2), dtype=self.positions.dtype)
+        distances, nearest = self.neighbours().kneighbors(X)
+        weights = 1.0 / np.maximum(distances, 1e-12)
+        exact = distances[:, 0] <= 1e-12
+        weights[exact] = 0.0
+        weights[exact, 0] = 1.0
+        weights /= weights.sum(axis=1)[:, np.newaxis]
+        placed = np.einsum('ij,ijk->ik', weights, self.positions[nearest])
+        return placed.astype(self.positions.dtype)
+
+    def add(self, X):
+        X = self.project(X)
+        placed = self.place(X, projected=True)
+        self.points = np.vstack([self.points, X])
+        self.positions = np.vstack([self.positions, placed])
+        self.index = None
+        return placed
+
+    def save(self, filename=embedding_file):
+        index, self.index = self.index, None  # rebuilt on load, in well under a second
+        try:
+            with open(filename + ".tmp", 'wb') as f:
+                pickle.dump(self, f)
+            os.replace(filename + ".tmp", filename)
+        finally:
+            self.index = index
+
+# ----------------------------
+#   END  CLASS DEFINITIONS
+# ----------------------------
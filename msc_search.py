@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 20:50:00 2026
+
+@mcarlisle
+
+# "Which theses are most like this title?" without a pass over every title:
+#     python msc_search.py build        (writes search_index_folder)
+#     python msc_search.py "Hilbert spaces of analytic functions"
+# The index keeps, for every titled degree, its TF-IDF term vector as an
+# inverted index (the postings of each term: degrees and weights), and its
+# LDA topic vector (msc_topics) as a dense, normalized row. A query touches
+# only the postings of its own terms, plus one matrix-vector product over
+# the topic rows; its score is a mix of both cosines. The index is a folder
+# of .npy arrays and string heaps (as in msc_compact), memory-mapped on load,
+# and answers with degree ids, titles, school, year and MSC.
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+import json
+import numpy as np
+import os
+import pandas as pd
+import re
+from sklearn.feature_extraction.text import TfidfVectorizer
+from mgp_columnar import read_string_column, write_string_column
+from mgp_data import mgp_data
+from msc_topics import load_topic_model, titled_degrees
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+search_format = "msc-search-index-1"
+search_index_folder = "thesis_search_index"
+
+# the arrays of a search index, each stored as <name>.npy
+search_arrays = ["degree_id", "year", "msc", "school", "idf",
+                 "postings_ptr", "postings_degree", "postings_weight", "topics",
+                 "school_id"]
+
+# weight of the term cosine in the score (the topic cosine has the rest)
+default_alpha = 0.5
+
+# shared index of this process, loaded on first use by get_search_index
+search_index = None
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" build_search_index:
+    input:  folder: where to write the index
+            degree, degree_grant, school: the MGP tables (default: mgp_data's)
+            topic_model: an msc_topics.OnlineTopicModel (default: the saved
+                         one, if any; without one the index has no topic part)
+    output: None. Writes the index of every degree with a thesis title.
+            A degree is shown at its first granting school (as in mgp_functions).
+"""
+def build_search_index(folder=search_index_folder, degree=None, degree_grant=None,
+                       school=None, topic_model=None):
+    degree = mgp_data.degree if degree is None else degree
+    degree_grant = mgp_data.degree_grant if degree_grant is None else degree_grant
+    school = mgp_data.school if school is None else school
+    topic_model = load_topic_model() if topic_model is None else topic_model
+
+    degree_ids, titles = titled_degrees(degree)
+    titled = degree.set_index('degree_id').loc[degree_ids]
+    grants = degree_grant[['degree', 'school']].drop_duplicates('degree', keep='first')
+    school_of = pd.Series(grants['school'].to_numpy(), index=grants['degree'].to_numpy())
+
+    # sublinear tf and l2 norms: a long title does not outweigh a short one
+    vectorizer = TfidfVectorizer(stop_words='english', sublinear_tf=True, dtype=np.float32)
+    X = vectorizer.fit_transform(titles).tocsc()
+    terms = np.empty(len(vectorizer.vocabulary_), dtype=object)
+    for term, j in vectorizer.vocabulary_.items():
+        terms[j] = term
+
+    if topic_model is not None:
+        topics = topic_model.transform(titles).astype(np.float32)
+        topics /= np.maximum(np.linalg.norm(topics, axis=1), 1e-12)[:, np.newaxis]
+    else:
+        topics = np.zeros((len(titles), 0), dtype=np.float32)
+
+    arrays = {'degree_id': degree_ids,
+              'year': titled['year'].to_numpy(dtype=np.int64),
+              'msc': titled['msc'].to_numpy(dtype=np.int64),
+              'school': school_of.reindex(degree_ids).fillna(-1).to_numpy(dtype=np.int64),
+              'idf': vectorizer.idf_.astype(np.float32),
+              'postings_ptr': X.indptr.astype(np.int64),
+              'postings_degree': X.indices.astype(np.int32),  # rows, not degree ids
+              'postings_weight': X.data,
+              'topics': topics,
+              'school_id': school['school_id'].to_numpy(dtype=np.int64)}
+
+    os.makedirs(folder, exist_ok=True)
+    for name in search_arrays:
+        np.save(os.path.join(folder, f"{name}.npy"), arrays[name])
+    write_string_column(os.path.join(folder, "terms"), terms.tolist())
+    write_string_column(os.path.join(folder, "thesis"), titles)
+    write_string_column(os.path.join(folder, "school_name"), list(school['school_name']))
+    manifest = {'format': search_format,
+                'n_degrees': len(degree_ids),
+                'n_terms': len(terms),
+                'n_topics': int(topics.shape[1]),
+                'lowercase': bool(vectorizer.lowercase),
+                'token_pattern': vectorizer.token_pattern}
+    with open(os.path.join(folder, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=1)
+
+
+""" get_search_index:
+    input:  folder: a search index folder (default: search_index_folder)
+    output: the SearchIndex shared by this process.
+"""
+def get_search_index(folder=None):
+    global search_index
+    if search_index is None or (folder is not None and folder != search_index.folder):
+        search_index = SearchIndex(search_index_folder if folder is None else folder)
+    return search_index
+
+
+""" similar_theses:
+    input:  text: a title
+            k: number of theses
+            alpha: weight of the term cosine (the topic cosine has 1 - alpha)
+    output: pd.DataFrame of the k most similar theses, best first
+            (see SearchIndex.query), from the shared index.
+"""
+def similar_theses(text, k=10, alpha=default_alpha):
+    return get_search_index().query(text, k, alpha)
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ----------------------------
+#  START CLASS DEFINITIONS
+# ----------------------------
+""" SearchIndex:
+    input:  folder: a search index folder (see build_search_index)
+            topic_model: the msc_topics.OnlineTopicModel for the topic vector
+                         of a query (default: the saved one, if the index
+                         has topics)
+            mmap: memory-map the arrays (False reads them into memory)
+
+    query(text, k, alpha) scores every thesis as
+        alpha * cos(tf-idf vectors) + (1 - alpha) * cos(topic vectors)
+    (the term cosine alone without topics), from the postings of the query's
+    terms and one product with the topic rows, and returns the top k.
+"""
+class SearchIndex:
+
+    def __init__(self, folder=search_index_folder, topic_model=None, mmap=True):
+        self.folder = folder
+        with open(os.path.join(folder, "manifest.json"), "r") as f:
+            self.manifest = json.load(f)
+        assert self.manifest['format'] == search_format, \
+               f"SearchIndex: {folder} is not a {search_format} folder"
+        mmap_mode = 'r' if mmap else None
+        for name in search_arrays:
+            setattr(self, name, np.asarray(np.load(os.path.join(folder, f"{name}.npy"),
+                                                   mmap_mode=mmap_mode)))
+        self.term_index = {t: j for j, t in
+                           enumerate(read_string_column(os.path.join(folder, "terms")))}
+        self.token_re = re.compile(self.manifest['token_pattern'])
+        self.titles = None
+        self.school_names = None
+        if self.manifest['n_topics'] > 0 and topic_model is None:
+            topic_model = load_topic_model()
+        self.topic_model = topic_model if self.manifest['n_topics'] > 0 else None
+
+    def query_terms(self, text):
+        # the tf-idf vector of text, as TfidfVectorizer(sublinear_tf=True) makes it
+        text = text.lower() if self.manifest['lowercase'] else text
+        found = [self.term_index[w] for w in self.token_re.findall(text) if w in self.term_index]
+        terms, counts = np.unique(np.asarray(found, dtype=np.int64), return_counts=True)
+        weights = (1.0 + np.log(counts)) * self.idf[terms]
+        return terms, weights / max(np.linalg.norm(weights), 1e-12)
+
+    def term_scores(self, text):
+        terms, weights = self.query_terms(text)
+        starts, ends = self.postings_ptr[terms], self.postings_ptr[terms + 1]
+        at = np.concatenate([np.arange(a, b) for a, b in zip(starts, ends)] +
+                            [np.zeros(0, dtype=np.int64)])
+        query_weight = np.repeat(weights, ends - starts)
+        return np.bincount(self.postings_degree[at],
+                           weights=self.postings_weight[at] * query_weight,
+                           minlength=self.manifest['n_degrees'])
+
+    def topic_scores(self, text):
+        vector = self.topic_model.transform([text])[0].astype(np.float32)
+        vector /= max(np.linalg.norm(vector), 1e-12)
+        return self.topics @ vector
+
+    def query(self, text, k=10, alpha=default_alpha):
+        scores = self.term_scores(text)
+        if self.topic_model is not None:
+            scores = alpha * scores + (1.0 - alpha) * self.topic_scores(text)
+        k = min(k, len(scores))
+        if k == 0:
+            return self.results(np.zeros(0, dtype=np.int64), scores)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.lexsort((best, -scores[best]))]
+        return self.results(best, scores)
+
+    def results(self, rows, scores):
+        if self.titles is None:
+            self.titles = read_string_column(os.path.join(self.folder, "thesis"))
+            names = pd.Series(read_string_column(os.path.join(self.folder, "school_name")),
+                              index=self.school_id)
+            self.school_names = names[~names.index.duplicated()]
+        school = self.school[rows]
+        names = self.school_names.reindex(school)
+        return pd.DataFrame({'degree_id': self.degree_id[rows],
+                             'score': scores[rows],
+                             'thesis': self.titles[rows],
+                             'school': school,
+                             'school_name': names.to_numpy(),
+                             'year': self.year[rows],
+                             'msc': self.msc[rows]})
+
+# ----------------------------
+#   END  CLASS DEFINITIONS
+# ----------------------------
+
+
+# ------------
+#  BEGIN MAIN
+# ------------
+
+if __name__ == "__main__":
+
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "build":
+        build_search_index()
+        print(f"msc_search: index written to {search_index_folder}.")
+    else:
+        print(similar_theses(" ".join(sys.argv[1:])).to_string(index=False))
+
+# ------------
+#   END  MAIN
+# ------------
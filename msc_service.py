@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 17:45:00 2026
+
+@mcarlisle
+
+# A service layer around the MSC classifier of what_msc_are_you.
+# The pickled pipeline (CountVectorizer + RandomForest) is loaded on first
+# use, once per process; classify_many runs the vectorizer and the forest
+# once per batch; an LRU cache keyed by the normalized title skips titles
+# already seen; and top-k codes come with their probabilities.
+# serve() exposes it as a local HTTP/JSON endpoint that groups concurrent
+# requests into micro-batches:
+#     python msc_service.py [port]
+#     curl -d '{"texts": ["Hilbert spaces"], "top_k": 3}' localhost:8765/classify
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import numpy as np
+import queue
+import threading
+import time
+import urllib.parse
+from msc_compact import load_model
+from mgp_metrics import register_cache, stage
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+model_file = "../count_rf_20190729.pickle"
+
+# shared classifier of this process, made on first use by get_classifier
+classifier = None
+
+# if True, every predict_proba_many call is a 'classify' stage of
+# mgp_metrics; off by default, as msc_classify_string makes one per title
+record_calls = False
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" normalize_title:
+    input:  text: str
+    output: the cache key of text: lowercase, whitespace collapsed.
+            The CountVectorizer lowercases and splits on non-word
+            characters anyway, so titles with the same key classify the same.
+"""
+def normalize_title(text):
+    return " ".join(text.lower().split())
+
+
+""" get_classifier:
+    input:  filename: the pickled pipeline (default: model_file)
+    output: the MSCClassifier shared by this process.
+"""
+def get_classifier(filename=None):
+    global classifier
+    if classifier is None or (filename is not None and filename != classifier.filename):
+        classifier = MSCClassifier(model_file if filename is None else filename)
+    return classifier
+
+
+""" serve:
+    input:  port: port to listen on (localhost only)
+            classifier: an MSCClassifier (default: get_classifier())
+            max_batch: most titles classified in one batch
+            max_wait: seconds a request waits for others to join its batch
+    output: None. Serves until interrupted:
+            POST /classify {"texts": [...], "top_k": k}  ->  {"codes": [...]}
+                 (with top_k: {"codes": [...], "top": [[[code, p], ...], ...]})
+            GET  /classify?text=...&top_k=k             ->  the same, for one text
+            GET  /stats                                 ->  cache statistics
+            Malformed requests (texts not strings, top_k not a positive
+            integer) get a 400, without joining a batch.
+"""
+def serve(port=8765, classifier=None, max_batch=256, max_wait=0.005):
+    server = make_server(port, classifier, max_batch, max_wait)
+    print(f"serve: classifying on http://127.0.0.1:{server.server_address[1]}/classify")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.stop()
+
+
+""" make_server:
+    input:  as serve (port 0 picks a free port)
+    output: the ThreadingHTTPServer, not yet serving; .batcher is its MicroBatcher.
+"""
+def make_server(port=8765, classifier=None, max_batch=256, max_wait=0.005):
+    classifier = get_classifier() if classifier is None else classifier
+    batcher = MicroBatcher(classifier, max_batch, max_wait)
+
+    class Handler(BaseHTTPRequestHandler):
+        def reply(self, code, body):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def answer(self, texts, top_k):
+            if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                return self.reply(400, {'error': "texts must be a list of strings"})
+            # checked here: a bad top_k in the batcher would fail the whole batch
+            if top_k is not None and (not isinstance(top_k, int) or isinstance(top_k, bool)
+                                      or top_k < 1):
+                return self.reply(400, {'error': "top_k must be a positive integer"})
+            codes, top = batcher.submit(texts, top_k)
+            body = {'codes': codes}
+            if top is not None:
+                body['top'] = top
+            self.reply(200, body)
+
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            query = urllib.parse.parse_qs(url.query)
+            if url.path == "/stats":
+                return self.reply(200, classifier.cache_stats())
+            if url.path != "/classify" or 'text' not in query:
+                return self.reply(404, {'error': "GET /classify?text=...&top_k=k"})
+            top_k = query['top_k'][0] if 'top_k' in query else None
+            if top_k is not None and top_k.isdigit():
+                top_k = int(top_k)
+            self.answer(query['text'], top_k)
+
+        def do_POST(self):
+            if urllib.parse.urlparse(self.path).path != "/classify":
+                return self.reply(404, {'error': "POST /classify"})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length).decode('utf-8'))
+                texts, top_k = request.get('texts', []), request.get('top_k')
+            except (ValueError, AttributeError):
+                return self.reply(400, {'error': "expected JSON {\"texts\": [...]}"})
+            self.answer(texts, top_k)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.batcher = batcher
+    return server
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ----------------------------
+#  START CLASS DEFINITIONS
+# ----------------------------
+""" MSCClassifier:
+    input:  filename: the pickled sklearn pipeline (e.g. count_rf_20190729.pickle),
+                      or its compact model folder (see msc_compact)
+            cache_size: number of normalized titles kept in the LRU cache
+
+    The model is loaded on first use (pipe). predict_proba_many
+    classifies a batch in one call of the pipeline, for the titles not
+    in the cache; classify_many and classify give the codes, and the
+    top_k codes with their probabilities if asked. With record_calls,
+    each batch is a 'classify' stage of mgp_metrics.
+"""
+class MSCClassifier:
+
+    def __init__(self, filename=model_file, cache_size=100000):
+        self.filename = filename
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.model = None
+        self.lock = threading.Lock()
+        register_cache('msc_classifier', self.cache_stats)
+
+    @property
+    def pipe(self):
+        if self.model is None:
+            with self.lock:
+                if self.model is None:
+                    model = load_model(self.filename)
+                    model.verbose = False
+                    self.model = model
+        return self.model
+
+    @property
+    def classes(self):
+        return self.pipe.classes_
+
+    def predict_proba_many(self, texts):
+        if not record_calls:
+            return self.predict_proba_batch(texts)
+        with stage('classify', function='predict_proba_many', rows=len(texts)):
+            return self.predict_proba_batch(texts)
+
+    def predict_proba_batch(self, texts):
+        keys = [normalize_title(t) for t in texts]
+        found = dict()
+        with self.lock:
+            for k in keys:
+                if k not in found and k in self.cache:
+                    self.cache.move_to_end(k)
+                    found[k] = self.cache[k]
+            missing = [k for k in dict.fromkeys(keys) if k not in found]
+            self.misses += len(missing)
+            self.hits += len(keys) - len(missing)
+        if len(missing) > 0:
+            # one pass of the vectorizer and the forest for the whole batch
+            proba = self.pipe.predict_proba(missing)
+            with self.lock:
+                for k, p in zip(missing, proba):
+                    self.cache[k] = p
+                    found[k] = p
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        if len(keys) == 0:
+            return np.zeros((0, len(self.classes)))
+        return np.vstack([found[k] for k in keys])
+
+    def classify_many(self, texts, top_k=None):
+        proba = self.predict_proba_many(texts)
+        # the forest predicts the class of highest probability, first one on ties
+        codes = [int(c) for c in self.classes[np.argmax(proba, axis=1)]]
+        if top_k is None:
+            return codes
+        best = np.argsort(-proba, axis=1, kind='stable')[:, :top_k]
+        top = [[(int(self.classes[j]), float(p[j])) for j in row]
+               for row, p in zip(best, proba)]
+        return codes, top
+
+    def classify(self, text, top_k=None):
+        if top_k is None:
+            return self.classify_many([text])[0]
+        codes, top = self.classify_many([text], top_k)
+        return codes[0], top[0]
+
+    def cache_stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {'entries': len(self.cache), 'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / total if total > 0 else 0.0}
+
+
+""" MicroBatcher:
+    input:  classifier: an MSCClassifier
+            max_batch: most titles classified in one batch
+            max_wait: seconds to wait for more requests before classifying
+
+    submit(texts, top_k) blocks until texts are classified, together with
+    whatever other requests arrived meanwhile, in one classify_many call.
+"""
+class MicroBatcher:
+
+    def __init__(self, classifier, max_batch=256, max_wait=0.005):
+        self.classifier = classifier
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, texts, top_k=None):
+        done = threading.Event()
+        request = {'texts': texts, 'top_k': top_k, 'done': done}
+        self.requests.put(request)
+        done.wait()
+        if 'error' in request:
+            raise request['error']
+        return request['codes'], request['top']
+
+    def run(self):
+        while self.running:
+            try:
+                first = self.requests.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            batch, size = [first], len(first['texts'])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                try:
+                    request = self.requests.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request['texts'])
+            self.classify(batch)
+
+    def classify(self, batch):
+        texts = [t for request in batch for t in request['texts']]
+        top_k = max((request['top_k'] or 0) for request in batch)
+        try:
+            if top_k > 0:
+                codes, top = self.classifier.classify_many(texts, top_k)
+            else:
+                codes, top = self.classifier.classify_many(texts), None
+        except Exception as error:
+            for request in batch:
+                request['error'] = error
+                request['done'].set()
+            return
+        start = 0
+        for request in batch:
+            end = start + len(request['texts'])
+            request['codes'] = codes[start:end]
+            request['top'] = None if not request['top_k'] else \
+                             [row[:request['top_k']] for row in top[start:end]]
+            request['done'].set()
+            start = end
+
+    def stop(self):
+        self.running = False
+
+# ----------------------------
+#   END  CLASS DEFINITIONS
+# ----------------------------
+
+
+# ------------
+#  BEGIN MAIN
+# ------------
+
+if __name__ == "__main__":
+
+    import sys
+    serve(int(sys.argv[1]) if len(sys.argv) > 1 else 8765)
+
+# ------------
+#   END  MAIN
+# ------------
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created: Sun Oct 18 19:55:00 2026
+
+@mcarlisle
+
+# The LDA topic model of notebook 5, fitted online (minibatch variational
+# Bayes) instead of in one batch, so that it can be updated:
+#     python msc_topics.py [model_file]
+# folds every titled degree of the MGP tables not yet seen into the model
+# (creating it if missing), saves it, and prints the topic keywords.
+# The model keeps its own vocabulary: words of new titles become new
+# columns of the topic-word matrix (starting at the prior), so a fresh MGP
+# dump is folded in with partial_fit, without refitting from scratch;
+# transform gives the topic mixture of new titles without any fitting.
+# topic_keywords is notebook 5's 10topics_15keywords_*.pickle, on demand.
+"""
+
+# -------------------------
+#  START IMPORT STATEMENTS
+# -------------------------
+from collections import Counter
+import numpy as np
+import os
+import pickle
+import scipy.sparse as sp
+from scipy.special import psi
+from sklearn.base import clone
+from sklearn.decomposition import LatentDirichletAllocation
+from sklearn.feature_extraction.text import CountVectorizer, ENGLISH_STOP_WORDS
+from mgp_data import mgp_data
+# -------------------------
+#   END  IMPORT STATEMENTS
+# -------------------------
+
+
+# ------------------------
+#  START GLOBAL VARIABLES
+# ------------------------
+
+topic_model_file = "lda_topics.pickle"
+stop_words_file = "../custom_stop_words.pickle"
+
+# notebook 5: "we keep getting German and French words coming out in topics."
+more_stop_words = ['modles', 'berechnung', 'zum', 'quelques', 'contribution',
+                   'untersuchungen', 'thorie', 'tude', 'quations', 'etude',
+                   'aux', 'self', 'systmes', 'van', 'analyse']
+
+num_keywords = 15
+
+# ------------------------
+#   END  GLOBAL VARIABLES
+# ------------------------
+
+
+# ----------------------------
+#  START FUNCTION DEFINITIONS
+# ----------------------------
+""" get_stop_words:
+    input:  filename: the pickled set of custom stop words of notebook 3
+    output: set of str: the custom stop words (sklearn's English ones if the
+            file is missing) and notebook 5's more_stop_words.
+"""
+def get_stop_words(filename=stop_words_file):
+    if os.path.exists(filename):
+        with open(filename, 'rb') as f:
+            stop_words = set(pickle.load(f))
+    else:
+        stop_words = set(ENGLISH_STOP_WORDS)
+    return stop_words.union(more_stop_words)
+
+
+""" load_topic_model:
+    input:  filename: a pickled OnlineTopicModel (default: topic_model_file)
+    output: the OnlineTopicModel, or None if there is no such file.
+"""
+def load_topic_model(filename=topic_model_file):
+    if not os.path.exists(filename):
+        return None
+    with open(filename, 'rb') as f:
+        return pickle.load(f)
+
+
+""" titled_degrees:
+    input:  degree: the degree table (default: mgp_data.degree)
+    output: (degree_ids, titles) of the degrees with a thesis title.
+"""
+def titled_degrees(degree=None):
+    degree = mgp_data.degree if degree is None else degree
+    titled = degree[degree['thesis'] != ""]
+    return titled['degree_id'].to_numpy(dtype=np.int64), list(titled['thesis'])
+
+# ----------------------------
+#   END  FUNCTION DEFINITIONS
+# ----------------------------
+
+
+# ----------------------------
+#  START CLASS DEFINITIONS
+# ----------------------------
+""" OnlineTopicModel:
+    input:  n_components: number of topics (notebook 5: 10)
+            stop_words: set of words to leave out (default: get_stop_words())
+            min_count: titles a word must appear in before it is a term
+                       (1, as notebook 5's CountVectorizer; words seen fewer
+                       times wait, counted, until they are)
+            batch_size: titles per online update
+            learning_decay, learning_offset, random_state: as for sklearn's
+                       LatentDirichletAllocation(learning_method='online')
+
+    fit(texts, passes, degree_ids) learns the model from scratch, in passes
+    of minibatches over texts (the titles of degree_ids, if given: the
+    degrees it has seen); fit_degrees() does that for the titled degrees of
+    the MGP tables. partial_fit(texts) updates it with more titles,
+    weighting them as part of a corpus of all the titles seen so far;
+    fold_in_degrees() does that for the degrees it has not seen. transform(texts)
+    gives topic mixtures, topic_keywords(n) the n top words of each topic.
+"""
+class OnlineTopicModel:
+
+    def __init__(self, n_components=10, stop_words=None, min_count=1, batch_size=4096,
+                 learning_decay=0.7, learning_offset=10.0, random_state=0):
+        stop_words = get_stop_words() if stop_words is None else set(stop_words)
+        self.vectorizer = CountVectorizer(stop_words=sorted(stop_words))
+        self.min_count = min_count
+        self.lda = LatentDirichletAllocation(n_components=n_components,
+                                             learning_method='online',
+                                             batch_size=batch_size,
+                                             learning_decay=learning_decay,
+                                             learning_offset=learning_offset,
+                                             random_state=random_state)
+        self.reset()
+
+    def reset(self):
+        self.lda = clone(self.lda)
+        self.terms = []
+        self.vocabulary = dict()
+        self.pending = Counter()  # word -> titles seen in, for words not yet terms
+        self.n_documents = 0
+        self.degree_ids = np.zeros(0, dtype=np.int64)
+
+    @property
+    def fitted(self):
+        return hasattr(self.lda, 'components_')
+
+    def tokenize(self, texts):
+        analyze = self.vectorizer.build_analyzer()
+        return [analyze(t) for t in texts]
+
+    def grow_vocabulary(self, tokens):
+        self.pending.update(w for ts in tokens for w in set(ts) if w not in self.vocabulary)
+        new = sorted(w for w, n in self.pending.items() if n >= self.min_count)
+        if len(new) == 0:
+            return
+        for w in new:
+            self.vocabulary[w] = len(self.terms)
+            self.terms.append(w)
+            del self.pending[w]
+        if self.fitted:
+            # a new word has no evidence yet: its weight in every topic is the prior
+            lda = self.lda
+            prior = np.full((lda.n_components, len(new)), lda.topic_word_prior_)
+            lda.components_ = np.hstack([lda.components_, prior])
+            lda.n_features_in_ = lda.components_.shape[1]
+            self.update_expectation()
+
+    def update_expectation(self):
+        # exp E[log beta], which transform and the E-step use
+        components = self.lda.components_
+        self.lda.exp_dirichlet_component_ = np.exp(
+            psi(components) - psi(components.sum(axis=1))[:, np.newaxis])
+
+    def count_matrix(self, tokens):
+        rows, columns = [], []
+        for i, ts in enumerate(tokens):
+            found = [self.vocabulary[w] for w in ts if w in self.vocabulary]
+            rows.extend([i] * len(found))
+            columns.extend(found)
+        counts = sp.csr_matrix((np.ones(len(rows)), (rows, columns)),
+                               shape=(len(tokens), len(self.terms)))
+        counts.sum_duplicates()
+        return counts
+
+    def update(self, counts):
+        # online updates on the titles with some term, in minibatches
+        counts = counts[np.diff(counts.indptr) > 0]
+        if counts.shape[0] == 0:
+            return
+        self.lda.total_samples = max(self.n_documents, counts.shape[0])
+        self.lda.partial_fit(counts)
+
+    def partial_fit(self, texts):
+        tokens = self.tokenize(texts)
+        self.grow_vocabulary(tokens)
+        self.n_documents += len(tokens)
+        self.update(self.count_matrix(tokens))
+        return self
+
+    def fit(self, texts, passes=1, degree_ids=None):
+        self.reset()
+        if degree_ids is not None:
+            self.degree_ids = np.unique(np.asarray(degree_ids, dtype=np.int64))
+        tokens = self.tokenize(texts)
+        self.grow_vocabulary(tokens)
+        self.n_documents = len(tokens)
+        counts = self.count_matrix(tokens)
+        random_state = np.random.RandomState(self.lda.random_state)
+        for _ in range(passes):
+            self.update(counts[random_state.permutation(counts.shape[0])])
+        return self
+
+    def fit_degrees(self, degree=None, passes=1):
+        degree_ids, titles = titled_degrees(degree)
+        return self.fit(titles, passes, degree_ids)
+
+    def fold_in_degrees(self, degree=None):
+        degree_ids, titles = titled_degrees(degree)
+        new = ~np.isin(degree_ids, self.degree_ids)
+        titles = [t for t, n in zip(titles, new) if n]
+        if len(titles) > 0:
+            self.partial_fit(titles)
+            self.degree_ids = np.union1d(self.degree_ids, degree_ids[new])
+        return len(titles)
+
+    def transform(self, texts):
+        return self.lda.transform(self.count_matrix(self.tokenize(texts)))
+
+    def topic_keywords(self, n=num_keywords):
+        # as notebook 5: the n heaviest words of each topic, heaviest last
+        terms = np.array(self.terms, dtype=object)
+        return [list(terms[topic.argsort()[-n:]]) for topic in self.lda.components_]
+
+    def save(self, filename=topic_model_file):
+        with open(filename + ".tmp", 'wb') as f:
+            pickle.dump(self, f)
+        os.replace(filename + ".tmp", filename)
+
+# ----------------------------
+#   END  CLASS DEFINITIONS
+# ----------------------------
+
+
+# ------------
+#  BEGIN MAIN
+# ------------
+
+if __name__ == "__main__":
+
+    import sys
+    filename = sys.argv[1] if len(sys.argv) > 1 else topic_model_file
+    model = load_topic_model(filename)
+    model = OnlineTopicModel() if model is None else model
+    folded = model.fold_in_degrees()
+    model.save(filename)
+    print(f"msc_topics: {folded} titles folded in, {model.n_documents} in all, "
+          f"{len(model.terms)} terms.")
+    for index, keywords in enumerate(model.topic_keywords()):
+        print(f"topic #{index}: {keywords}")
+
+# ------------
+#   END  MAIN
+# ------------
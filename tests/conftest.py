@@ -0,0 +1,97 @@
+"""
+Shared fixtures: the repository's modules on sys.path, small synthetic MGP
+tables (mgp_synthetic), and a clean mgp_data context (data folder: the
+repository) around every test.
+"""
+import os
+import pickle
+import sys
+import types
+
+import pandas as pd
+import pytest
+
+repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo)
+
+from mgp_data import mgp_data, mgp_table_names  # noqa: E402
+from mgp_metrics import configure  # noqa: E402
+from mgp_synthetic import generate_mgp_tables  # noqa: E402
+
+configure(progress="none")
+mgp_data.folder = repo
+
+
+def read_notebook_pickle(name):
+    """ a DataFrame the notebooks pickled (under pandas < 2, whose numeric
+        index classes are gone) """
+    if 'pandas.core.indexes.numeric' not in sys.modules:
+        numeric = types.ModuleType('pandas.core.indexes.numeric')
+        numeric.Int64Index = numeric.UInt64Index = numeric.Float64Index = pd.Index
+        numeric.NumericIndex = pd.Index
+        sys.modules['pandas.core.indexes.numeric'] = numeric
+    return pd.read_pickle(os.path.join(repo, f"{name}.pickle"))
+
+
+@pytest.fixture(scope="session")
+def synthetic_tables():
+    return generate_mgp_tables(20000, seed=3)
+
+
+@pytest.fixture(scope="session")
+def msc_forest(synthetic_tables):
+    """ a small CountVectorizer + RandomForest pipeline, like the MSC
+        classifier's, fit on the classified synthetic titles """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.pipeline import Pipeline
+    degree = synthetic_tables['degree']
+    titled = degree[(degree['msc'] >= 0) & (degree['thesis'] != "")]
+    pipe = Pipeline([('count', CountVectorizer()),
+                     ('rf', RandomForestClassifier(n_estimators=30, random_state=0))])
+    return pipe.fit(titled['thesis'].tolist(), titled['msc'].to_numpy())
+
+
+@pytest.fixture
+def msc_model_file(tmp_path, msc_forest):
+    """ msc_forest, pickled as the MSC classifier's model file """
+    model_file = str(tmp_path / "model.pickle")
+    with open(model_file, "wb") as f:
+        pickle.dump(msc_forest, f)
+    return model_file
+
+
+@pytest.fixture(autouse=True)
+def clean_mgp_data():
+    yield
+    mgp_data.clear()
+    mgp_data.folder = repo
+
+
+@pytest.fixture
+def mgp_tables(synthetic_tables):
+    """ the synthetic tables, set in mgp_data (copies: tests may change them) """
+    tables = {name: synthetic_tables[name].copy() for name in mgp_table_names}
+    for name, table in tables.items():
+        mgp_data.set(name, table)
+    return tables
+
+
+def advice_steps(advises, get_advisors=False):
+    """ { academic_id: set of their students (resp. advisors) } of advises """
+    steps = dict()
+    for advisor, advisee in zip(advises['advisor'], advises['advisee']):
+        a, b = (advisee, advisor) if get_advisors else (advisor, advisee)
+        steps.setdefault(int(a), set()).add(int(b))
+    return steps
+
+
+def brute_force_reach(steps, academic_id):
+    """ the academics reachable from academic_id along steps (see
+        advice_steps), not academic_id itself, by a plain breadth-first search """
+    seen, frontier = set(), {int(academic_id)}
+    while frontier:
+        frontier = set().union(*[steps.get(a, set()) for a in frontier]) - seen
+        seen |= frontier
+    seen.discard(int(academic_id))
+    return seen
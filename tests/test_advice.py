@@ -0,0 +1,22 @@
+"""
+mgp_functions: traverse_advice over the advice index reaches what a plain
+breadth-first search over advises reaches, on synthetic MGP tables.
+"""
+import numpy as np
+import pytest
+
+from conftest import advice_steps, brute_force_reach
+from mgp_functions import build_advice_index, traverse_advice
+
+
+@pytest.mark.parametrize('get_advisors', [True, False], ids=['advisors', 'students'])
+def test_traverse_advice(synthetic_tables, get_advisors):
+    advises = synthetic_tables['advises']
+    index = build_advice_index(advises)
+    steps = advice_steps(advises, get_advisors=get_advisors)
+
+    rng = np.random.default_rng(0)
+    academic_ids = rng.choice(index['ids'], 300, replace=False).tolist() + [-1]
+    for academic_id in academic_ids:
+        reached = traverse_advice(academic_id, get_advisors, index)
+        assert reached.tolist() == sorted(brute_force_reach(steps, academic_id))
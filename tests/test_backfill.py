@@ -0,0 +1,100 @@
+"""
+msc_backfill: predictions of the shared compact model, committed chunk by
+chunk, resumed after an interruption, and redone for a new model version.
+"""
+import pickle
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import msc_backfill
+from mgp_store import use_store
+from msc_backfill import backfill_msc, model_version, pending_chunks, share_model
+from msc_compact import CompactModel
+
+
+def pending_degrees(tables):
+    degree = tables['degree']
+    return degree[(degree['msc'] == -1) & (degree['thesis'] != "")].sort_values('degree_id')
+
+
+def predictions(db_file):
+    conn = sqlite3.connect(db_file)
+    try:
+        return pd.read_sql_query("select * from msc_predicted order by degree_id", conn)
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def backfill_folder(tmp_path, monkeypatch, mgp_tables):
+    """ a store of the synthetic tables, with the model copies next to it """
+    monkeypatch.chdir(tmp_path)
+    db_file = str(tmp_path / "store.sqlite")
+    with use_store(db_file):
+        yield db_file
+
+
+def test_share_model(backfill_folder, msc_model_file, msc_forest):
+    path, version = share_model(msc_model_file)
+    assert version == model_version(msc_model_file)
+    titles = ["finite groups of lie type", "no such words", ""]
+    assert np.array_equal(CompactModel(path).predict_proba(titles), msc_forest.predict_proba(titles))
+    assert share_model(msc_model_file) == (path, version)
+    assert share_model(path) == (path, model_version(path))
+
+
+def test_pending_chunks(backfill_folder, mgp_tables, msc_model_file):
+    msc_backfill.create_prediction_table(sqlite3.connect(backfill_folder))
+    chunks = list(pending_chunks(backfill_folder, "v1", chunk_size=100))
+    ids = np.concatenate([c[0] for c in chunks])
+    assert all(len(c[0]) == 100 for c in chunks[:-1])
+    assert ids.tolist() == pending_degrees(mgp_tables)['degree_id'].tolist()
+
+
+def failing_chunk(chunk):
+    if chunk[0][0] > failing_chunk.after:
+        raise RuntimeError("interrupted")
+    return classify_chunk(chunk)
+
+
+classify_chunk = msc_backfill.classify_chunk
+
+
+def test_resume_and_new_version(backfill_folder, mgp_tables, msc_model_file, msc_forest,
+                                monkeypatch):
+    pending = pending_degrees(mgp_tables)
+    version = model_version(msc_model_file)
+
+    # interrupted in its third chunk: the first two are committed
+    failing_chunk.after = int(pending['degree_id'].iloc[99])
+    monkeypatch.setattr(msc_backfill, 'classify_chunk', failing_chunk)
+    with pytest.raises(RuntimeError):
+        backfill_msc(msc_model_file, backfill_folder, processes=1, chunk_size=50)
+    assert predictions(backfill_folder)['degree_id'].tolist() == pending['degree_id'].iloc[:100].tolist()
+    monkeypatch.setattr(msc_backfill, 'classify_chunk', classify_chunk)
+
+    # the re-run only does the rest
+    run = backfill_msc(msc_model_file, backfill_folder, processes=2, chunk_size=50)
+    assert run['version'] == version and run['classified'] == len(pending) - 100
+    done = predictions(backfill_folder)
+    assert done['degree_id'].tolist() == pending['degree_id'].tolist()
+    assert (done['msc'].to_numpy() == msc_forest.predict(pending['thesis'].tolist())).all()
+    assert (done['model_version'] == version).all()
+    assert backfill_msc(msc_model_file, backfill_folder, processes=1)['classified'] == 0
+
+    # a new model redoes every prediction
+    new_pipe = pickle.loads(pickle.dumps(msc_forest))
+    new_pipe.steps[-1][1].set_params(random_state=1)
+    titled = mgp_tables['degree'][(mgp_tables['degree']['msc'] >= 0) &
+                                  (mgp_tables['degree']['thesis'] != "")]
+    new_pipe.fit(titled['thesis'].tolist(), titled['msc'].to_numpy())
+    with open(msc_model_file, "wb") as f:
+        pickle.dump(new_pipe, f)
+    run = backfill_msc(msc_model_file, backfill_folder, processes=1, chunk_size=500)
+    assert run['version'] != version and run['classified'] == len(pending)
+    done = predictions(backfill_folder)
+    assert (done['model_version'] == run['version']).all()
+    assert (done['msc'].to_numpy() == new_pipe.predict(pending['thesis'].tolist())).all()
@@ -0,0 +1,63 @@
+"""
+mgp_synthetic and mgp_benchmark: the synthetic tables are reproducible and
+shaped like the MGP tables, and a small benchmark runs every stage on them.
+"""
+import json
+import os
+import shutil
+
+import pandas as pd
+
+from conftest import repo
+from mgp_benchmark import compare_benchmarks, run_benchmarks
+from mgp_data import mgp_data
+from mgp_synthetic import generate_mgp_tables
+
+
+def test_synthetic_tables_are_consistent(synthetic_tables):
+    again = generate_mgp_tables(20000, seed=3)
+    for name, table in synthetic_tables.items():
+        pd.testing.assert_frame_equal(again[name], table)
+    assert not generate_mgp_tables(20000, seed=4)['degree'].equals(synthetic_tables['degree'])
+
+    academic, advises = synthetic_tables['academic'], synthetic_tables['advises']
+    degree, degree_grant = synthetic_tables['degree'], synthetic_tables['degree_grant']
+    school = synthetic_tables['school']
+    assert academic['academic_id'].is_unique and degree['degree_id'].is_unique
+    assert school['school_id'].is_unique
+    assert advises['advisor'].isin(academic['academic_id']).all()
+    assert advises['advisee'].isin(academic['academic_id']).all()
+    assert degree['academic'].isin(academic['academic_id']).all()
+    assert degree_grant['degree'].isin(degree['degree_id']).all()
+    assert degree_grant['school'].isin(school['school_id']).all()
+
+    # an advisor's first degree is 20 to 55 years before their student's
+    first = degree.drop_duplicates('academic').set_index('academic')['year']
+    advisor_year = first.reindex(advises['advisor']).to_numpy()
+    advisee_year = first.reindex(advises['advisee']).to_numpy()
+    known = (advisor_year > 0) & (advisee_year > 0)
+    gap = advisee_year[known] - advisor_year[known]
+    assert known.any() and gap.min() >= 20 and gap.max() <= 55
+
+
+def test_benchmark_runs_every_stage(tmp_path, monkeypatch):
+    # what_msc_are_you reads ../MSC/msc_2010.pickle when imported
+    os.makedirs(tmp_path / "MSC")
+    shutil.copy(os.path.join(repo, "msc_2010.pickle"), tmp_path / "MSC")
+    os.makedirs(tmp_path / "work")
+    monkeypatch.chdir(tmp_path / "work")
+
+    output = str(tmp_path / "benchmark.json")
+    report = run_benchmarks(scales=[2000], repeat=2, output=output)
+    with open(output, "r") as f:
+        assert json.load(f) == report
+    stages = [r['stage'] for r in report['results']]
+    assert stages == ['generate', 'build_store', 'put_data_under_year_ranges',
+                      'bin_schools_by_time_frame', 'aggs', 'build_lineage',
+                      'generate_mgp_map', 'msc_classify_string']
+    assert [r for r in report['results'] if 'error' in r] == []
+    assert all(len(r['seconds']) == 2 for r in report['results'][2:])
+    assert mgp_data.tables == dict()
+
+    compared = compare_benchmarks(output, report)
+    assert len(compared) == len(stages) and (compared['ratio'] == 1.0).all()
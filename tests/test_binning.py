@@ -0,0 +1,122 @@
+"""
+mgp_functions: the binning engine and the school counts give what the loops
+they replaced gave, on synthetic MGP tables (mgp_synthetic), and importing
+it does not load matplotlib.
+"""
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import repo
+
+from mgp_functions import bin_indices_by_year_ranges, bin_schools_by_time_frame, \
+                          bin_schools_table, build_year_ranges, put_data_under_year_ranges, \
+                          year_range_membership_matrix
+
+
+def baseline_put_data_under_year_ranges(data, years, year_ranges):
+    """ the loop put_data_under_year_ranges was before it was vectorized """
+    data_ranges = dict()
+    for y in year_ranges:
+        data_ranges[y] = []
+    for i in range(len(data)):
+        for y in year_ranges:
+            if y[0] <= years[i] and years[i] < y[1]:
+                data_ranges[y].append(data[i])
+    return data_ranges
+
+
+year_range_cases = pytest.mark.parametrize('inc, over', [(10, 10), (9, 10), (10, 5), (1, 1)],
+                                           ids=['clean', 'gaps', 'overlaps', 'years'])
+
+
+@year_range_cases
+def test_put_data_under_year_ranges(synthetic_tables, inc, over):
+    degree = synthetic_tables['degree']
+    year_ranges = build_year_ranges(1800, 2020, inc, over)
+    ids, years = degree['degree_id'].tolist(), degree['year'].tolist()
+    baseline = baseline_put_data_under_year_ranges(ids, years, year_ranges)
+
+    as_list = put_data_under_year_ranges(ids, years, year_ranges)
+    as_array = put_data_under_year_ranges(np.asarray(ids), np.asarray(years), year_ranges)
+    as_series = put_data_under_year_ranges(degree['degree_id'], degree['year'], year_ranges)
+    as_frame = put_data_under_year_ranges(degree, 'year', year_ranges)
+    assert list(as_list) == list(baseline) == year_ranges
+    for y in year_ranges:
+        assert as_list[y] == baseline[y]
+        assert as_array[y].tolist() == baseline[y]
+        assert as_series[y].tolist() == baseline[y]
+        assert isinstance(as_frame[y], pd.DataFrame)
+        assert as_frame[y]['degree_id'].tolist() == baseline[y]
+
+
+@year_range_cases
+def test_bin_positions(synthetic_tables, inc, over):
+    years = synthetic_tables['degree']['year'].to_numpy()
+    year_ranges = build_year_ranges(1800, 2020, inc, over)
+    baseline = baseline_put_data_under_year_ranges(list(range(len(years))), years, year_ranges)
+
+    bin_indices = bin_indices_by_year_ranges(years, year_ranges)
+    membership = year_range_membership_matrix(years, year_ranges)
+    assert membership.shape == (len(year_ranges), len(years))
+    for k, y in enumerate(year_ranges):
+        assert bin_indices[y].tolist() == baseline[y]
+        assert membership[k].indices.tolist() == baseline[y]
+
+
+def baseline_bin_schools_by_time_frame(binned_degrees, degree_grant, school):
+    """ the per-degree scans bin_schools_by_time_frame made before the merge """
+    binned_schools = {}
+    total_degrees, error_count = 0, 0
+    for k, v in binned_degrees.items():
+        binned_schools[k] = dict()
+        for d in v:
+            total_degrees += 1
+            rows = np.flatnonzero((degree_grant['degree'] == d).to_numpy())
+            if len(rows) > 0:
+                s = degree_grant['school'].iloc[rows[0]]
+                if s in binned_schools[k]:
+                    binned_schools[k][s]['count'] = binned_schools[k][s]['count'] + 1
+                else:
+                    s_idx = np.flatnonzero((school['school_id'] == s).to_numpy())[0]
+                    binned_schools[k][s] = { 'lat': school['lat'].iloc[s_idx],
+                                             'lng': school['lng'].iloc[s_idx],
+                                             'count': 1,
+                                             'name': school['school_name'].iloc[s_idx] }
+            else:
+                error_count += 1
+    return binned_schools, error_count, total_degrees
+
+
+def test_bin_schools_by_time_frame(mgp_tables):
+    degree = mgp_tables['degree']
+    binned_degrees = put_data_under_year_ranges(degree['degree_id'].to_numpy(),
+                                                degree['year'].to_numpy(),
+                                                build_year_ranges(1900, 2020, 10, 5))
+    baseline, error_count, total_degrees = baseline_bin_schools_by_time_frame(
+        binned_degrees, mgp_tables['degree_grant'], mgp_tables['school'])
+    assert error_count > 0  # the synthetic tables have degrees without a school
+
+    binned_schools = bin_schools_by_time_frame(binned_degrees)
+    assert list(binned_schools) == list(baseline)
+    for k in baseline:
+        assert list(binned_schools[k]) == list(baseline[k])  # schools in order of appearance
+        assert binned_schools[k] == baseline[k]
+    binned_table, table_errors, table_total = bin_schools_table(binned_degrees)
+    assert (table_errors, table_total) == (error_count, total_degrees)
+    assert binned_table['count'].sum() == total_degrees - error_count
+
+
+def test_import_does_not_load_the_renderer():
+    code = ("import sys, mgp_functions; "
+            "print(sorted(m for m in ('matplotlib', 'mpl_toolkits.basemap', 'mgp_render', "
+            "'mgp_store', 'mgp_spatial') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=repo,
+                            env=dict(os.environ, PYTHONPATH=repo),
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
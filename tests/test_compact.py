@@ -0,0 +1,34 @@
+"""
+msc_compact: the exported forest predicts what the sklearn pipeline does,
+probabilities bit for bit.
+"""
+import numpy as np
+
+from msc_compact import CompactModel, export_compact_model, load_model
+
+
+def test_same_predictions(tmp_path, synthetic_tables, msc_forest):
+    folder = str(tmp_path / "compact")
+    export_compact_model(msc_forest, folder)
+    model = CompactModel(folder)
+    assert model.manifest['n_estimators'] == 30
+
+    degree = synthetic_tables['degree']
+    titles = degree.loc[degree['thesis'] != "", 'thesis'].tolist()
+    titles += ["", "no vocabulary hits here", "zzz qqq", "FINITE Groups, finite GROUPS!"]
+    assert np.array_equal(model.classes_, msc_forest.classes_)
+    assert np.array_equal(model.predict_proba(titles), msc_forest.predict_proba(titles))
+    assert np.array_equal(model.predict(titles), msc_forest.predict(titles))
+
+    # a title without any term of the vocabulary goes down every zero spine
+    none = ["no vocabulary hits here"]
+    assert msc_forest.steps[0][1].transform(none).nnz == 0
+    assert np.array_equal(model.predict_proba(none), msc_forest.predict_proba(none))
+
+
+def test_load_model(tmp_path, msc_forest, msc_model_file):
+    folder = str(tmp_path / "compact")
+    export_compact_model(msc_forest, folder, verify_texts=["finite groups", ""])
+    assert isinstance(load_model(folder), CompactModel)
+    assert np.array_equal(load_model(msc_model_file).predict(["finite groups"]),
+                          msc_forest.predict(["finite groups"]))
@@ -0,0 +1,78 @@
+"""
+mgp_cube: country counts against a brute-force count, and the recipes
+against the notebooks' pickles.
+"""
+import os
+
+import pytest
+
+from country_bounding_boxes import country_bounding_boxes
+from conftest import read_notebook_pickle, repo
+from mgp_columnar import columnar_folder
+from mgp_cube import DegreeCube, build_cube_cells, cube_recipes
+from mgp_data import MGPData, mgp_data
+
+
+def brute_force_country_counts(tables, classified=False):
+    school = tables['school'].drop_duplicates('school_id').set_index('school_id')
+    first_school = dict()
+    for degree_id, school_id in zip(tables['degree_grant']['degree'], tables['degree_grant']['school']):
+        first_school.setdefault(degree_id, school_id)
+    counts = dict()
+    for degree_id, msc in zip(tables['degree']['degree_id'], tables['degree']['msc']):
+        if degree_id not in first_school or (classified and msc < 0):
+            continue
+        code = school.loc[first_school[degree_id], 'country_code']
+        if isinstance(code, str):
+            counts[code] = counts.get(code, 0) + 1
+    return counts
+
+
+def test_country_counts(mgp_tables):
+    cube = DegreeCube(build_cube_cells())
+    counts = cube.query('country', where={'country': lambda c: c != ""})
+    assert dict(zip(counts['country'], counts['count'])) == brute_force_country_counts(mgp_tables)
+    top = cube_recipes['mtpcn_top25_df'](cube)
+    expected = brute_force_country_counts(mgp_tables, classified=True)
+    code_of = {country_bounding_boxes[c][0].replace(" ", ""): c for c in expected}
+    assert {code_of[name]: count for name, count in zip(top['country'], top['count'])} == expected
+    assert top['count'].is_monotonic_decreasing
+
+
+@pytest.mark.parametrize('name', sorted(cube_recipes))
+def test_recipe_columns(mgp_tables, name):
+    result = cube_recipes[name](DegreeCube(build_cube_cells()))
+    notebook = read_notebook_pickle(name)
+    assert list(result.columns) == list(notebook.columns)
+    if 'msc' in result:
+        assert (result['msc'] >= 0).all()
+
+
+def test_msc_per_school_big(mgp_tables):
+    cube = DegreeCube(build_cube_cells())
+    everything = cube_recipes['msc_per_school_df'](cube)
+    big = cube_recipes['msc_per_school_big_df'](cube)
+    totals = everything.groupby('school')['count'].sum()
+    assert 0 < len(big) < len(everything)
+    assert set(big['school']) == set(totals.index[totals >= 500])
+
+
+data_folder = os.environ.get("MGP_DATA_FOLDER", repo)
+has_mgp_tables = all(os.path.exists(os.path.join(data_folder, f"{name}.pickle")) or
+                     os.path.exists(os.path.join(data_folder, columnar_folder, name))
+                     for name in ["degree", "degree_grant", "school"])
+
+
+@pytest.mark.skipif(not has_mgp_tables, reason="the MGP tables are not in MGP_DATA_FOLDER")
+def test_recipes_on_the_mgp_tables():
+    data = MGPData(data_folder)
+    for name in ["degree", "degree_grant", "school"]:
+        mgp_data.set(name, data.get(name))
+    mgp_data.folder = data_folder
+    cube = DegreeCube(build_cube_cells())
+    top = cube_recipes['mtpcn_top25_df'](cube)
+    counts = dict(zip(top['country'], top['count']))
+    assert counts['UnitedStates'] == 104047
+    assert counts['Canada'] == 6815
+    notebook = read_notebook_pickle('mtpcn_top25_df')
+    assert len(set(top['country']) & set(notebook['country'])) >= 20
@@ -0,0 +1,59 @@
+"""
+msc_embedding: the layout is notebook 5's t-SNE, and a FrozenEmbedding
+places new theses on it without moving the embedded ones.
+"""
+import numpy as np
+import pytest
+from sklearn.decomposition import LatentDirichletAllocation
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.manifold import TSNE
+
+from msc_embedding import FrozenEmbedding, layout, load_embedding, scatter_data
+
+
+@pytest.fixture(scope="module")
+def topic_vectors(synthetic_tables):
+    """ (titles, topic matrix) of synthetic titles, as notebook 5's lda_ft """
+    degree = synthetic_tables['degree']
+    titles = degree.loc[degree['thesis'] != "", 'thesis'].head(700).tolist()
+    counts = CountVectorizer().fit_transform(titles)
+    lda = LatentDirichletAllocation(n_components=8, random_state=0)
+    return titles, lda.fit_transform(counts)
+
+
+def test_layout_is_the_notebook_tsne(topic_vectors):
+    try:
+        import openTSNE  # noqa: F401
+        pytest.skip("openTSNE is installed: layout uses its FFT gradients")
+    except ImportError:
+        pass
+    _, topics = topic_vectors
+    embedding = layout(topics[:300], angle=.99)
+    expected = TSNE(n_components=2, perplexity=30.0, angle=.99, init='pca',
+                    random_state=0).fit_transform(topics[:300])
+    assert np.allclose(embedding.positions, expected)
+
+
+def test_new_theses_are_placed_on_a_frozen_embedding(tmp_path, topic_vectors):
+    titles, topics = topic_vectors
+    embedding = layout(topics[:500], max_layout=300, k=5)
+    positions = embedding.positions.copy()
+    assert positions.shape == (500, 2)
+
+    # embedded theses are placed where they are; new ones among their neighbours
+    assert np.array_equal(embedding.place(topics[:500]), positions)
+    placed = embedding.add(topics[500:])
+    assert np.array_equal(embedding.positions[:500], positions)
+    assert np.array_equal(embedding.positions[500:], placed)
+    low, high = positions.min(axis=0), positions.max(axis=0)
+    assert ((placed >= low) & (placed <= high)).all()
+
+    embedding.save(str(tmp_path / "embedding.pickle"))
+    loaded = load_embedding(str(tmp_path / "embedding.pickle"))
+    assert isinstance(loaded, FrozenEmbedding)
+    assert np.array_equal(loaded.place(topics[600:]), embedding.place(topics[600:]))
+
+    data = scatter_data(embedding, topics[600:], titles[600:], threshold=0.5)
+    keep = topics[600:].max(axis=1) > 0.5
+    assert data['content'].tolist() == list(np.asarray(titles[600:], dtype=object)[keep])
+    assert (data['topic_key'].to_numpy() == topics[600:][keep].argmax(axis=1)).all()
@@ -0,0 +1,55 @@
+"""
+mgp_geocode: the cache keeps answers, never failures; a denied key stops the run.
+"""
+import pytest
+
+from mgp_geocode import FakeGeocoder, geocode_names, normalize_school_name, open_geocode_cache, \
+                        read_geocode_cache
+
+names = ["Harvard University", "University of Toronto", "Nowhere College"]
+
+
+def test_failures_are_not_cached(tmp_path):
+    cache_file = str(tmp_path / "geocode.sqlite")
+    with FakeGeocoder(failure_rate=1.0) as fake:
+        results = geocode_names(names, url=fake.url, key="", cache_file=cache_file,
+                                retries=0, backoff=0.0)
+    assert set(results['status']) <= {'REQUEST_FAILED', 'OVER_QUERY_LIMIT'}
+    assert 'OVER_QUERY_LIMIT' in set(results['status'])
+    conn = open_geocode_cache(cache_file)
+    assert read_geocode_cache(conn, {normalize_school_name(n) for n in names}) == dict()
+    conn.close()
+
+    # the next run asks again, and keeps the answers
+    with FakeGeocoder(zero_results=["Nowhere College"],
+                      places={"Harvard University": (42.37, -71.12, "US")}) as fake:
+        results = geocode_names(names, url=fake.url, key="", cache_file=cache_file)
+        assert fake.requests == len(names)
+    assert results['status'].tolist() == ['OK', 'OK', 'ZERO_RESULTS']
+    assert results['country'].tolist()[0] == "US"
+    assert not results['cached'].any()
+
+    with FakeGeocoder() as fake:
+        results = geocode_names(names[:2], url=fake.url, key="", cache_file=cache_file)
+        assert fake.requests == 0
+    assert results['cached'].all()
+
+
+def test_denied_stops_the_run(tmp_path):
+    cache_file = str(tmp_path / "geocode.sqlite")
+    with FakeGeocoder(status="REQUEST_DENIED") as fake:
+        with pytest.raises(RuntimeError, match="REQUEST_DENIED"):
+            geocode_names(names, url=fake.url, key="expired", cache_file=cache_file)
+    conn = open_geocode_cache(cache_file)
+    assert read_geocode_cache(conn, {normalize_school_name(n) for n in names}) == dict()
+    conn.close()
+
+    with FakeGeocoder(status="INVALID_REQUEST") as fake:
+        results = geocode_names(names, url=fake.url, key="", cache_file=cache_file)
+    assert (results['status'] == "INVALID_REQUEST").all()
+
+    # neither is kept: a run with a good key asks for every name
+    with FakeGeocoder() as fake:
+        results = geocode_names(names, url=fake.url, key="", cache_file=cache_file)
+        assert fake.requests == len(names)
+    assert (results['status'] == "OK").all()
@@ -0,0 +1,67 @@
+"""
+mgp_ingest: a small raw dump through ingest_dump, and read_plain_table
+against a one-shot read.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from mgp_columnar import columnar_folder, has_table
+from mgp_ingest import ingest_dump, read_plain_table
+
+degree_lines = ['degree_id,academic,thesis,year,msc,degree_type',
+                '1,10,"A clean title",1950,35,Ph.D.',
+                '2,11,"First title; Second title",1960,14,Ph.D.,Dr. rer. nat.',
+                '3,12,"Quoted"piece",1970,,Ph.D.',
+                '4,13,"broken title,1980']
+
+
+def write_dump(folder):
+    os.makedirs(folder)
+    with open(os.path.join(folder, "degree.csv"), "w") as f:
+        f.write("\n".join(degree_lines) + "\n")
+    pd.DataFrame({'degree': [1, 2, 2, 3], 'school': [100, 200, 201, 300]})\
+      .to_csv(os.path.join(folder, "degree_grant.tsv"), sep='\t', index=False)
+    pd.DataFrame({'school_id': [100, 200, 201, 300], 'school_name': ["A", "B", "C", "D"]})\
+      .to_csv(os.path.join(folder, "school.tsv"), sep='\t', index=False)
+
+
+def test_ingest_dump(tmp_path):
+    dump, out = str(tmp_path / "dump"), str(tmp_path / "out")
+    write_dump(dump)
+    tables = ingest_dump(dump, out, processes=1, columnar=True)
+
+    degree = tables['degree'].set_index('degree_id')
+    # the dual degree's second half: a fixed id, and the grants of its entry
+    assert degree.loc[2, 'thesis'] == "First title"
+    assert degree.loc[-2, 'thesis'] == "Second title"
+    assert degree.loc[-2, 'degree_type'] == "Dr. rer. nat."
+    assert degree.loc[3, 'thesis'] == "Quotedpiece" and degree.loc[3, 'msc'] == -1
+    assert 4 not in degree.index
+    grants = tables['degree_grant']
+    assert sorted(grants.loc[grants['degree'] == -2, 'school']) == [200, 201]
+    assert len(grants) == 6
+
+    assert has_table('degree_grant', os.path.join(out, columnar_folder))
+    quarantine = pd.read_csv(os.path.join(out, "degree_quarantine.tsv"), sep='\t')
+    assert list(quarantine['line']) == [5]
+
+    # the same dump gives the same ids
+    again = ingest_dump(dump, str(tmp_path / "again"), processes=1)
+    assert again['degree']['degree_id'].tolist() == tables['degree']['degree_id'].tolist()
+
+
+def test_read_plain_table(tmp_path):
+    filename = str(tmp_path / "academic.tsv")
+    rng = np.random.default_rng(0)
+    n = 2500
+    table = pd.DataFrame({'academic_id': np.arange(n),
+                          'given_name': rng.choice(["Ada", "Carl", "Emmy"], n),
+                          # empty only in the last rows: a float column, from the last chunk
+                          'count': np.where(np.arange(n) < n - 3, 1, -1)})
+    table.to_csv(filename, sep='\t', index=False)
+    with open(filename, "a") as f:
+        f.write("2500\tSofia\t\n")
+    expected = pd.read_csv(filename, sep='\t')
+    pd.testing.assert_frame_equal(read_plain_table(filename, chunk_rows=1000), expected)
@@ -0,0 +1,85 @@
+"""
+mgp_lineage_stats: the whole-genealogy counts against a breadth-first
+search per academic, with self-loops and advising cycles.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import mgp_lineage_stats
+from conftest import advice_steps, brute_force_reach
+from mgp_data import mgp_data
+from mgp_functions import build_advice_index
+from mgp_lineage_stats import compute_lineage_stats, lineage_stats_file, load_lineage_stats
+
+
+def stats_of(advises, academic_ids=None):
+    ids = sorted(set(advises['advisor']) | set(advises['advisee'])) if academic_ids is None \
+          else academic_ids
+    return compute_lineage_stats(build_advice_index(advises), ids).set_index('academic_id')
+
+
+def test_self_loop():
+    stats = stats_of(pd.DataFrame({'advisor': [1, 2, 3, 2], 'advisee': [2, 3, 3, 5]}))
+    assert stats['descendants'].to_dict() == {1: 3, 2: 2, 3: 0, 5: 0}
+    assert stats['ancestors'].to_dict() == {1: 0, 2: 1, 3: 2, 5: 2}
+    assert stats['students'].to_dict() == {1: 1, 2: 2, 3: 0, 5: 0}
+    assert stats['generation'].to_dict() == {1: 0, 2: 1, 3: 2, 5: 2}
+
+
+def test_cycle():
+    # 2 -> 3 -> 4 -> 2 is one cycle, below 1 and above 5
+    stats = stats_of(pd.DataFrame({'advisor': [1, 2, 3, 4, 4], 'advisee': [2, 3, 4, 2, 5]}))
+    assert stats['descendants'].to_dict() == {1: 4, 2: 3, 3: 3, 4: 3, 5: 0}
+    assert stats['ancestors'].to_dict() == {1: 0, 2: 3, 3: 3, 4: 3, 5: 4}
+    assert stats['generation'].to_dict() == {1: 0, 2: 1, 3: 1, 4: 1, 5: 2}
+
+
+def test_empty_advises():
+    stats = stats_of(pd.DataFrame({'advisor': [], 'advisee': []}, dtype=np.int64), [7, 8])
+    assert (stats[['students', 'descendants', 'ancestors', 'generation']] == 0).all().all()
+
+
+def test_against_brute_force(synthetic_tables):
+    advises = synthetic_tables['advises']
+    # a few cycles and self-loops on top of the synthetic DAG
+    rng = np.random.default_rng(0)
+    ids = advises['advisee'].to_numpy()
+    back = pd.DataFrame({'advisor': rng.choice(ids, 20), 'advisee': rng.choice(ids, 20)})
+    loops = pd.DataFrame({'advisor': ids[:5], 'advisee': ids[:5]})
+    advises = pd.concat([advises[['advisor', 'advisee']], back, loops], ignore_index=True)
+
+    stats = stats_of(advises)
+    students, advisors = advice_steps(advises), advice_steps(advises, get_advisors=True)
+    for academic_id in rng.choice(stats.index.to_numpy(), 300, replace=False):
+        assert stats.loc[academic_id, 'descendants'] == len(brute_force_reach(students, academic_id))
+        assert stats.loc[academic_id, 'ancestors'] == len(brute_force_reach(advisors, academic_id))
+
+
+def test_stats_file_in_the_data_folder(tmp_path, mgp_tables):
+    mgp_data.folder = str(tmp_path)
+    load_lineage_stats(rebuild=True)
+    assert os.path.exists(tmp_path / lineage_stats_file)
+
+
+def test_stats_file_follows_the_tables(tmp_path, synthetic_tables, monkeypatch):
+    for name in ['academic', 'advises']:
+        synthetic_tables[name].to_pickle(tmp_path / f"{name}.pickle")
+    mgp_data.folder = str(tmp_path)
+    stats = load_lineage_stats()
+
+    # current: read back without loading the tables or recomputing
+    mgp_data.clear()
+    monkeypatch.setattr(mgp_lineage_stats, 'compute_lineage_stats', None)
+    assert load_lineage_stats().equals(stats)
+    assert mgp_data.tables == dict()
+    monkeypatch.undo()
+
+    # a new advises table makes it stale
+    advises = synthetic_tables['advises']
+    advisor, advisee = int(advises['advisor'].iloc[0]), int(advises['advisee'].iloc[-1])
+    pd.concat([advises, pd.DataFrame({'advisor': [advisor], 'advisee': [advisee]})],
+              ignore_index=True).to_pickle(tmp_path / "advises.pickle")
+    updated = load_lineage_stats().set_index('academic_id')
+    assert updated.loc[advisor, 'students'] == stats.set_index('academic_id').loc[advisor, 'students'] + 1
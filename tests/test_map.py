@@ -0,0 +1,35 @@
+"""
+mgp_map: aggs gives the running totals a plain loop over the degrees gives,
+on synthetic MGP tables, with gapped and overlapping year ranges.
+"""
+import pytest
+
+from mgp_functions import build_year_ranges
+from mgp_map import aggs
+
+
+@pytest.mark.parametrize('f, l, i, o', [(1290, 2019, 9, 10), (1800, 2019, 20, 10),
+                                        (1900, 2019, 5, 5)],
+                         ids=['gaps', 'overlaps', 'clean'])
+def test_aggs(mgp_tables, f, l, i, o):
+    degree = mgp_tables['degree']
+    aggregated = aggs(degree, f, l, i, o)
+
+    # each degree sits at the first school granting it, at that school's first row
+    first_school = dict()
+    for d, s in zip(mgp_tables['degree_grant']['degree'], mgp_tables['degree_grant']['school']):
+        first_school.setdefault(d, s)
+    location = dict()
+    for s, lng, lat in zip(mgp_tables['school']['school_id'], mgp_tables['school']['lng'],
+                           mgp_tables['school']['lat']):
+        location.setdefault(s, (lng, lat))
+
+    year_ranges = build_year_ranges(f, l, i, o)
+    assert list(aggregated) == year_ranges
+    for first, last in year_ranges:
+        baseline = dict()
+        for d, y in zip(degree['degree_id'], degree['year']):
+            if f <= y < last and first_school.get(d) in location:
+                place = location[first_school[d]]
+                baseline[place] = baseline.get(place, 0) + 1
+        assert aggregated[(first, last)] == baseline
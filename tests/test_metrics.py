@@ -0,0 +1,50 @@
+"""
+mgp_metrics: a bounded record window with exact per-stage totals, and the
+opt-in per-call records of the MSC classifier.
+"""
+import pickle
+
+import msc_service
+from mgp_metrics import MetricsReport, metrics
+
+
+def test_records_are_bounded():
+    report = MetricsReport(max_records=5)
+    for i in range(12):
+        with report.stage('bin', rows=10):
+            pass
+    with report.stage('render', rows=3):
+        pass
+    assert len(report.records) == 5
+    assert report.records[-1]['stage'] == 'render'
+    summary = report.summary().set_index('stage')
+    assert summary.loc['bin', 'calls'] == 12 and summary.loc['bin', 'rows'] == 120
+    assert summary.loc['render', 'calls'] == 1
+    assert report.to_dict()['stages_recorded'] == 13
+    report.reset()
+    assert len(report.records) == 0 and len(report.summary()) == 0
+
+
+def test_classify_records_are_opt_in(tmp_path, monkeypatch):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.pipeline import Pipeline
+    pipe = Pipeline([('count', CountVectorizer()),
+                     ('rf', RandomForestClassifier(n_estimators=5, random_state=0))])
+    pipe.fit(["hilbert spaces", "finite groups", "banach spaces", "group rings"], [46, 20, 46, 20])
+    model_file = str(tmp_path / "model.pickle")
+    with open(model_file, "wb") as f:
+        pickle.dump(pipe, f)
+    classifier = msc_service.MSCClassifier(model_file)
+
+    def classify_calls():
+        return sum(r['stage'] == 'classify' for r in metrics.records)
+
+    before = classify_calls()
+    for title in ["Hilbert spaces", "Finite groups"] * 10:
+        classifier.classify_many([title])
+    assert classify_calls() == before
+
+    monkeypatch.setattr(msc_service, 'record_calls', True)
+    classifier.classify_many(["Banach spaces"])
+    assert classify_calls() == before + 1
@@ -0,0 +1,88 @@
+"""
+mgp_render: frames rendered across a process pool, or streamed to an
+encoder, are the frames rendered one by one; a failing ffmpeg reports
+its stderr.
+"""
+import os
+
+import numpy as np
+import pytest
+
+import mgp_render
+from mgp_render import FFmpegWriter, frame_points, render_frame_to_rgb, render_frames, \
+                       stream_frames
+
+
+class RecordingWriter:
+    """ an encoder backend that keeps the frames """
+
+    def __init__(self):
+        self.frames = []
+        self.closed = False
+
+    def write_frame(self, rgb):
+        self.frames.append(rgb)
+
+    def close(self):
+        self.closed = True
+
+
+def map_jobs(school, count=6):
+    """ rgb jobs of count small frames of school locations """
+    rng = np.random.default_rng(0)
+    jobs = []
+    for k in range(count):
+        rows = school.iloc[rng.choice(len(school), size=40, replace=False)]
+        v = {(lng, lat): int(n) for lng, lat, n in
+             zip(rows['lng'], rows['lat'], rng.integers(1, 100, size=len(rows)))}
+        x, y, c = frame_points(v)
+        jobs.append((x, y, c, f"frame {k}", (-180, -90, 180, 90), 100, (4, 2), 50))
+    return jobs
+
+
+def test_parallel_frames_equal_serial_frames(synthetic_tables):
+    jobs = map_jobs(synthetic_tables['school'])
+    serial = render_frames(jobs, render_frame_to_rgb, processes=1)
+    parallel = render_frames(jobs, render_frame_to_rgb, processes=2, frames_per_worker=2)
+    assert len(parallel) == len(jobs)
+    assert all(np.array_equal(a, b) for a, b in zip(serial, parallel))
+    # the frames differ: the scatter is redrawn on the cached background
+    assert not np.array_equal(serial[0], serial[1])
+
+    writer = RecordingWriter()
+    assert stream_frames(jobs, writer, processes=2) == len(jobs)
+    assert writer.closed
+    assert all(np.array_equal(a, b) for a, b in zip(serial, writer.frames))
+
+
+def fake_ffmpeg(tmp_path, script):
+    """ an executable shell script standing in for ffmpeg """
+    path = tmp_path / "ffmpeg"
+    path.write_text("#!/bin/sh\n" + script + "\n")
+    os.chmod(path, 0o755)
+    return str(path)
+
+
+def test_ffmpeg_gets_the_raw_frames(tmp_path, monkeypatch):
+    # copies the piped frames to the output file, its last argument
+    monkeypatch.setattr(mgp_render, "ffmpeg_executable",
+                        fake_ffmpeg(tmp_path, 'for last; do :; done; cat > "$last"'))
+    frames = [np.full((11, 16, 3), k, dtype=np.uint8) for k in range(3)]
+    movie = str(tmp_path / "movie.raw")
+    with FFmpegWriter(movie) as writer:
+        for rgb in frames:
+            writer.write_frame(rgb)
+    assert writer.size == (16, 10)
+    assert open(movie, "rb").read() == b"".join(rgb[:10].tobytes() for rgb in frames)
+
+
+@pytest.mark.parametrize("height", [4, 1000])
+def test_crashed_ffmpeg_reports_its_stderr(tmp_path, monkeypatch, height):
+    # exits at once: small frames may still fit in the pipe, large ones break it
+    monkeypatch.setattr(mgp_render, "ffmpeg_executable",
+                        fake_ffmpeg(tmp_path, "echo \"Unknown encoder 'libx264'\" >&2; exit 1"))
+    frames = [np.zeros((height, 1000, 3), dtype=np.uint8)] * 3
+    writer = FFmpegWriter(str(tmp_path / "movie.mp4"))
+    with pytest.raises(RuntimeError, match="Unknown encoder 'libx264'"):
+        stream_frames(frames, writer, render_function=np.asarray)
+    assert writer.process is None
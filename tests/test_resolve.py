@@ -0,0 +1,37 @@
+"""
+mgp_resolve: a known duplicate pair and a misspelling resolve to the
+geocoded school, whatever the order of the school table.
+"""
+import numpy as np
+import pandas as pd
+
+from mgp_resolve import apply_resolutions, resolve_schools
+
+
+def test_stable_matches_on_a_known_duplicate_pair(synthetic_tables):
+    montreal = (45.5048, -73.6132)
+    school = pd.concat([synthetic_tables['school'], pd.DataFrame({
+        'school_id': [10001, 10002, 10003],
+        'school_name': ["Université de Montréal", "UNIVERSITE DE MONTREAL.",
+                        "Universite de Montreall"],
+        'lat': [montreal[0], 0.0, 0.0], 'lng': [montreal[1], 0.0, 0.0],
+        'country_code': ["CA", None, None]})], ignore_index=True)
+    degree_grant = synthetic_tables['degree_grant']
+
+    resolved = resolve_schools(school, degree_grant).set_index('school_id')
+    assert resolved.loc[10002, 'reason'] == 'duplicate'
+    assert resolved.loc[10002, 'match_school_id'] == 10001
+    assert resolved.loc[10002, 'score'] == 1.0
+    assert resolved.loc[10003, 'reason'] == 'fuzzy'
+    assert resolved.loc[10003, 'match_school_id'] == 10001
+    assert 10001 not in resolved.index
+
+    # the same matches from the rows in any order
+    for seed in range(3):
+        shuffled = school.sample(frac=1.0, random_state=seed)
+        again = resolve_schools(shuffled, degree_grant).set_index('school_id')
+        pd.testing.assert_frame_equal(again.loc[resolved.index], resolved)
+
+    placed = apply_resolutions(school, resolved.reset_index()).set_index('school_id')
+    assert placed.loc[[10002, 10003], 'resolved_to'].tolist() == [10001, 10001]
+    assert np.allclose(placed.loc[10003, ['lat', 'lng']].to_numpy(dtype=float), montreal)
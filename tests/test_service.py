@@ -0,0 +1,93 @@
+"""
+msc_service: the LRU cache, batch classification as the pipeline's, and the
+HTTP endpoint, where a bad top_k is refused before it reaches a batch.
+"""
+import json
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import numpy as np
+import pytest
+
+from msc_service import MSCClassifier, make_server
+
+
+@pytest.fixture
+def titles(synthetic_tables):
+    degree = synthetic_tables['degree']
+    return degree.loc[degree['thesis'] != "", 'thesis'].tolist()[:300]
+
+
+def test_lru_cache(msc_model_file):
+    classifier = MSCClassifier(msc_model_file, cache_size=2)
+    classifier.classify_many(["Hilbert  spaces", "hilbert spaces", "finite groups"])
+    assert classifier.cache_stats() == {'entries': 2, 'hits': 1, 'misses': 2, 'hit_rate': 1 / 3}
+    classifier.classify("Hilbert spaces")     # a hit, and now the most recent
+    classifier.classify("banach algebras")    # evicts "finite groups"
+    assert list(classifier.cache) == ["hilbert spaces", "banach algebras"]
+    classifier.classify("finite groups")
+    stats = classifier.cache_stats()
+    assert stats['hits'] == 2 and stats['misses'] == 4 and stats['entries'] == 2
+
+
+def test_classify_many_as_the_pipeline(msc_model_file, msc_forest, titles):
+    classifier = MSCClassifier(msc_model_file)
+    codes, top = classifier.classify_many(titles, top_k=3)
+    assert codes == msc_forest.predict(titles).tolist()
+    proba = msc_forest.predict_proba(titles)
+    for row, p in zip(top, proba):
+        assert [c for c, _ in row][0] in msc_forest.classes_[p == p.max()]
+        assert [q for _, q in row] == sorted(p, reverse=True)[:3]
+    # a second pass is all cache hits, with the same answers
+    assert classifier.classify_many(titles) == codes
+    assert classifier.cache_stats()['hits'] >= len(titles)
+
+
+def test_server_round_trip(msc_model_file, msc_forest, titles):
+    server = make_server(port=0, classifier=MSCClassifier(msc_model_file), max_wait=0.05)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/classify"
+
+    def post(body):
+        request = urllib.request.Request(url, data=json.dumps(body).encode('utf-8'))
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as error:
+            return error.code, json.loads(error.read())
+
+    def get(params):
+        try:
+            with urllib.request.urlopen(url + "?" + urllib.parse.urlencode(params)) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as error:
+            return error.code, json.loads(error.read())
+
+    try:
+        status, body = post({'texts': titles[:20], 'top_k': 2})
+        assert status == 200 and body['codes'] == msc_forest.predict(titles[:20]).tolist()
+        assert all(len(row) == 2 for row in body['top'])
+        status, body = get({'text': titles[0], 'top_k': 1})
+        assert status == 200 and body['codes'] == [int(msc_forest.predict(titles[:1])[0])]
+
+        # bad top_k values are refused, and do not fail requests batched alongside
+        results = dict()
+        requests = {'good': {'texts': titles[20:40]}, 'string': {'texts': titles[:1], 'top_k': "3"},
+                    'zero': {'texts': titles[:1], 'top_k': 0}}
+        threads = [threading.Thread(target=lambda k=k, b=b: results.update({k: post(b)}))
+                   for k, b in requests.items()]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert results['good'][0] == 200
+        assert results['good'][1]['codes'] == msc_forest.predict(titles[20:40]).tolist()
+        assert results['string'][0] == 400 and results['zero'][0] == 400
+        assert get({'text': titles[0], 'top_k': "abc"})[0] == 400
+    finally:
+        server.shutdown()
+        server.server_close()
+        server.batcher.stop()
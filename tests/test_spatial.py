@@ -0,0 +1,131 @@
+"""
+mgp_spatial: the country of a school, near borders, and the grid index
+against a scan of every point.
+"""
+import numpy as np
+import pandas as pd
+
+from mgp_data import mgp_data
+from mgp_spatial import GridIndex, assign_countries, in_bbox, load_country_shapes, \
+                        points_in_polygon, school_countries
+
+# simplified country shapes around two borders where bounding boxes fail:
+# southern Ontario reaches below Chicago, Ithaca and Ann Arbor; Austria's
+# box covers Munich, Hungary's covers Vienna, Germany's covers Strasbourg
+border = [(-123.0, 49.0), (-95.0, 49.0), (-89.5, 48.0), (-84.5, 46.5), (-82.5, 45.3),
+          (-83.1, 42.3), (-83.0, 41.7), (-79.0, 42.8), (-79.2, 43.3), (-76.5, 44.2),
+          (-75.0, 45.0), (-67.0, 45.0)]
+shapes = {
+    'CA': [np.array([(-141.0, 49.0)] + border + [(-52.0, 45.0), (-52.0, 70.0), (-141.0, 70.0)])],
+    'US': [np.array(border + [(-67.0, 44.0), (-80.0, 25.0), (-125.0, 32.0), (-125.0, 49.0)])],
+    'FR': [np.array([(-4.5, 48.5), (8.2, 49.0), (7.8, 48.6), (7.55, 47.6), (6.0, 46.2),
+                     (3.0, 42.5), (-1.8, 43.4)])],
+    'DE': [np.array([(8.2, 49.0), (6.0, 51.0), (7.0, 54.0), (14.5, 54.0), (15.0, 51.0),
+                     (12.1, 50.3), (13.8, 48.6), (13.0, 48.0), (13.0, 47.5), (12.2, 47.6),
+                     (10.5, 47.5), (9.5, 47.5), (7.55, 47.6), (7.8, 48.6)])],
+    'AT': [np.array([(9.5, 47.5), (10.5, 47.5), (12.2, 47.6), (13.0, 47.5), (13.0, 48.0),
+                     (13.8, 48.6), (15.0, 49.0), (16.9, 48.6), (17.1, 48.0), (16.1, 46.9),
+                     (13.7, 46.5), (9.6, 47.0)])],
+    'HU': [np.array([(17.1, 48.0), (18.8, 48.1), (22.9, 48.0), (21.0, 46.2), (18.8, 45.9),
+                     (16.1, 46.9)])],
+}
+
+# (lng, lat) of known places, and their country
+places = {'Harvard':     (-71.12, 42.38, 'US'), 'Chicago':     (-87.60, 41.79, 'US'),
+          'Ann Arbor':   (-83.74, 42.28, 'US'), 'Madison':     (-89.40, 43.07, 'US'),
+          'Ithaca':      (-76.48, 42.45, 'US'), 'Minneapolis': (-93.23, 44.97, 'US'),
+          'Seattle':     (-122.31, 47.66, 'US'), 'Toronto':    (-79.40, 43.66, 'CA'),
+          'London, ON':  (-81.27, 42.98, 'CA'), 'Montreal':    (-73.58, 45.50, 'CA'),
+          'Vancouver':   (-123.25, 49.26, 'CA'), 'Munich':     (11.58, 48.15, 'DE'),
+          'Vienna':      (16.36, 48.21, 'AT'), 'Strasbourg':  (7.76, 48.58, 'FR'),
+          'Budapest':    (19.06, 47.49, 'HU')}
+
+
+def test_points_in_polygon_square_with_hole():
+    outer = np.array([(0, 0), (10, 0), (10, 10), (0, 10)], dtype=float)
+    hole = np.array([(4, 4), (6, 4), (6, 6), (4, 6)], dtype=float)
+    x = np.array([1.0, 5.0, 9.9, 11.0, -0.1])
+    y = np.array([1.0, 5.0, 5.0, 5.0, 5.0])
+    assert points_in_polygon(x, y, [outer, hole]).tolist() == [True, False, True, False, False]
+
+
+def test_assign_countries_near_borders():
+    x = np.array([p[0] for p in places.values()])
+    y = np.array([p[1] for p in places.values()])
+    codes = assign_countries(x, y, shapes)
+    assert dict(zip(places, codes)) == {name: p[2] for name, p in places.items()}
+    # off every shape: no guess
+    assert assign_countries(np.array([-30.0]), np.array([0.5]), shapes)[0] is None
+
+
+def test_load_country_shapes_round_trip(tmp_path):
+    import shapefile
+    filename = str(tmp_path / "countries.shp")
+    with shapefile.Writer(filename, shapeType=shapefile.POLYGON) as writer:
+        writer.field("ISO_A2", "C", size=2)
+        for code, rings in shapes.items():
+            # pyshp wants closed rings, outer rings clockwise
+            writer.poly([[tuple(p) for p in ring[::-1]] + [tuple(ring[-1])] for ring in rings])
+            writer.record(code)
+    loaded = load_country_shapes(filename)
+    assert set(loaded) == set(shapes)
+    x = np.array([p[0] for p in places.values()])
+    y = np.array([p[1] for p in places.values()])
+    assert list(assign_countries(x, y, loaded)) == [p[2] for p in places.values()]
+
+
+def test_school_countries_prefers_the_geocoder(tmp_path):
+    # no shapes in the data folder: only the geocoder's countries count
+    mgp_data.folder = str(tmp_path)
+    school = pd.DataFrame({'school_id': [1, 2, 3, 4],
+                           'school_name': ["Harvard", "Toronto", "Munich", "Lost"],
+                           'lat': [42.38, 43.66, 48.15, 0.0],
+                           'lng': [-71.12, -79.40, 11.58, 0.0],
+                           'country_code': ["US", "CA", None, None]})
+    school['geocode_json'] = [None, None,
+                              {'status': 'OK', 'results': [{
+                                  'geometry': {'location': {'lat': 48.15, 'lng': 11.58}},
+                                  'address_components': [{'short_name': 'DE',
+                                                          'types': ['country']}]}]},
+                              None]
+    mgp_data.set('school', school)
+    countries = school_countries()
+    assert countries['country'].tolist() == ["US", "CA", "DE", None]
+    assert countries['country_name'].tolist()[:2] == ["United States", "Canada"]
+
+
+def test_school_countries_prefers_the_mgp(tmp_path):
+    mgp_data.folder = str(tmp_path)
+    pd.DataFrame({'country_id': [1, 2, 3], 'country_name': ["United States", "SouthKorea",
+                                                            "Catalonia"]})\
+      .to_pickle(tmp_path / "country.pickle")
+    school = pd.DataFrame({'school_id': [1, 2, 3, 4], 'school_name': ["A", "B", "C", "D"],
+                           'lat': [0.0] * 4, 'lng': [0.0] * 4, 'country': [1, 2, 3, 9],
+                           'country_code': ["CA", None, "ES", "FR"]})
+    mgp_data.set('school', school)
+    assert school_countries()['country'].tolist() == ["US", "KR", "ES", "FR"]
+
+
+def test_synthetic_schools_by_geocoder_country(mgp_tables):
+    countries = school_countries()
+    school = mgp_tables['school']
+    assert (countries['country'].fillna("").to_numpy() ==
+            school['country_code'].fillna("").to_numpy()).all()
+
+
+def test_grid_index_query(synthetic_tables):
+    school = synthetic_tables['school']
+    rng = np.random.default_rng(1)
+    x = np.concatenate([school['lng'], rng.uniform(-180, 180, 5000), [180, -180, 179.99]])
+    y = np.concatenate([school['lat'], rng.uniform(-90, 90, 5000), [0, 0, 90]])
+    grid = GridIndex(x, y, cell_size=5)
+
+    bboxes = [(-130, 20, -60, 55), (-10, 35, 30, 60), (-180, -90, 180, 90),
+              (170, -50, -170, 10),  # across the antimeridian
+              (12.3, 45.6, 12.4, 45.7), (0, 0, 0, 0)]
+    # random boxes; lllon > urlon (about half of them) wraps the antimeridian
+    for lllon, urlon, lllat in zip(rng.uniform(-180, 180, 20), rng.uniform(-180, 180, 20),
+                                   rng.uniform(-90, 70, 20)):
+        bboxes.append((lllon, lllat, urlon, lllat + 20))
+    for bbox in bboxes:
+        assert grid.query(bbox).tolist() == np.flatnonzero(in_bbox(x, y, bbox)).tolist()
@@ -0,0 +1,95 @@
+"""
+mgp_store: one connection per store file, rebuilt when the tables change,
+and lookups that do not share temporary tables.
+"""
+import threading
+
+import numpy as np
+
+import mgp_store
+from mgp_data import mgp_data
+from mgp_store import find_degrees, get_store, use_store
+
+
+def test_connections_by_path(tmp_path, mgp_tables):
+    first, second = str(tmp_path / "first.sqlite"), str(tmp_path / "second.sqlite")
+    try:
+        assert get_store(first) is get_store(first)
+        assert get_store(second) is not get_store(first)
+        with use_store(second) as conn:
+            assert get_store() is conn
+        assert second not in mgp_store.store_connections
+    finally:
+        mgp_store.close_store(first)
+
+
+def test_rebuilt_when_the_tables_change(tmp_path, mgp_tables):
+    db_file = str(tmp_path / "store.sqlite")
+    with use_store(db_file):
+        academic = int(mgp_tables['degree']['academic'].iloc[0])
+        before = find_degrees(academic_ids=[academic])
+        conn = get_store()
+        conn.execute("create table msc_predicted (degree_id integer)")
+        conn.commit()
+
+        degree = mgp_tables['degree'].copy()
+        degree.loc[degree['academic'] == academic, 'year'] = 1234
+        mgp_data.set('degree', degree)
+        after = find_degrees(academic_ids=[academic])
+        assert len(after) == len(before) and (after['year'] == 1234).all()
+        # the store's own tables are rebuilt, other tables are kept
+        tables = {r[0] for r in get_store().execute("select name from sqlite_master")}
+        assert 'msc_predicted' in tables
+
+    # a store file built from other tables is rebuilt when opened
+    mgp_data.set('degree', mgp_tables['degree'])
+    with use_store(db_file):
+        assert (find_degrees(academic_ids=[academic])['year'] == before['year']).all()
+
+
+def test_concurrent_lookups(tmp_path, mgp_tables):
+    academics = mgp_tables['degree']['academic'].unique()
+    expected = {int(a): set(mgp_tables['degree'].loc[mgp_tables['degree']['academic'] == a,
+                                                     'degree_id']) for a in academics[:40]}
+    errors = []
+
+    def look_up(ids):
+        try:
+            for a in ids:
+                found = set(find_degrees(academic_ids=[a])['degree_id'])
+                if found != expected[a]:
+                    errors.append(a)
+        except Exception as error:
+            errors.append(error)
+
+    with use_store(str(tmp_path / "store.sqlite")):
+        threads = [threading.Thread(target=look_up, args=(ids,))
+                   for ids in np.array_split(list(expected), 4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    assert errors == []
+
+
+def test_checked_without_loading_the_tables(tmp_path, synthetic_tables):
+    for name in mgp_store.store_tables:
+        synthetic_tables[name].to_pickle(tmp_path / f"{name}.pickle")
+    mgp_data.folder = str(tmp_path)
+    db_file = str(tmp_path / "store.sqlite")
+    with use_store(db_file):
+        pass
+
+    # a current store is opened from the file stats alone
+    mgp_data.clear()
+    with use_store(db_file) as conn:
+        assert mgp_store.store_fingerprint(conn) == mgp_store.source_fingerprint()
+        assert len(find_degrees(year_range=(1900, 1950))) > 0
+    assert mgp_data.tables == {}
+
+    # a new pickle of a table makes it stale
+    degree = synthetic_tables['degree'].copy()
+    degree['year'] = 1234
+    degree.to_pickle(tmp_path / "degree.pickle")
+    with use_store(db_file):
+        assert (find_degrees()['year'] == 1234).all()
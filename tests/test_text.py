@@ -0,0 +1,68 @@
+"""
+msc_text: clean_text, clean_texts and TextNormalizer give what the cleaning
+of notebook 3 gives, word for word (needs the NLTK data).
+"""
+import re
+import string
+
+import nltk
+import pytest
+from nltk.corpus import stopwords
+from nltk.stem import PorterStemmer
+from nltk.stem.wordnet import WordNetLemmatizer
+from nltk.tokenize import sent_tokenize, word_tokenize
+
+from msc_text import TextNormalizer, clean_text, clean_texts
+
+
+def notebook_clean_text(text, stem_or_lem='stem'):
+    """ clean_text of notebook 3, one word at a time """
+    def get_wordnet_pos(word):
+        tag = nltk.pos_tag([word])[0][1][0].upper()
+        tag_dict = {"J": "a", "N": "n", "V": "v", "R": "r"}  # wordnet.ADJ, NOUN, VERB, ADV
+        return tag_dict.get(tag, "n")
+
+    def tokenize_text(text):
+        return [w for s in sent_tokenize(text) for w in word_tokenize(s)]
+
+    def remove_special_characters(text, characters=string.punctuation.replace('-', '')):
+        tokens = tokenize_text(text)
+        pattern = re.compile('[{}]'.format(re.escape(characters)))
+        return ' '.join(filter(None, [pattern.sub('', t) for t in tokens]))
+
+    text = text.strip(' ').lower()
+    text = remove_special_characters(text)
+    text = ' '.join(w for w in tokenize_text(text) if w not in set(stopwords.words('english')))
+    if stem_or_lem == 'stem':
+        text = ' '.join(PorterStemmer().stem(t) for t in tokenize_text(text))
+    elif stem_or_lem == 'lem':
+        lemmatizer = WordNetLemmatizer()
+        text = ' '.join(lemmatizer.lemmatize(t, get_wordnet_pos(t)) for t in tokenize_text(text))
+    return text
+
+
+def has_nltk_data():
+    try:
+        notebook_clean_text("Testing the tagged words.", 'lem')
+    except LookupError:
+        return False
+    return True
+
+
+titles = ["On the Riemann-Hilbert problem: a survey (with applications).",
+          "  Lie Algebras & their Representations  ",
+          "Running flows, studied and analyzed; better bounds for the best.",
+          "Über die Klassenzahl quadratischer Zahlkörper",
+          ""]
+
+
+@pytest.mark.skipif(not has_nltk_data(), reason="the NLTK data (punkt, stopwords, wordnet, "
+                                                "the perceptron tagger) is not installed")
+@pytest.mark.parametrize("stem_or_lem", ['stem', 'lem', 'none'])
+def test_normalizer_equals_the_notebook_cleaning(synthetic_tables, stem_or_lem):
+    texts = titles + synthetic_tables['degree']['thesis'].head(400).tolist()
+    expected = [notebook_clean_text(t, stem_or_lem) for t in texts]
+    assert [clean_text(t, stem_or_lem) for t in titles] == expected[:len(titles)]
+    assert clean_texts(texts, stem_or_lem, processes=1) == expected
+    normalizer = TextNormalizer(stem_or_lem, processes=2, chunk_size=50)
+    assert normalizer.fit(texts).transform(texts) == expected
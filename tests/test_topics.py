@@ -0,0 +1,25 @@
+"""
+msc_topics: a model fit on the degrees knows which degrees it has seen, so
+folding the same tables in again adds nothing.
+"""
+import numpy as np
+
+from msc_topics import OnlineTopicModel, titled_degrees
+
+
+def test_fit_degrees_records_the_degrees(synthetic_tables):
+    degree = synthetic_tables['degree'].head(3000)
+    model = OnlineTopicModel(n_components=3, batch_size=512).fit_degrees(degree)
+    degree_ids, titles = titled_degrees(degree)
+    assert np.array_equal(model.degree_ids, np.unique(degree_ids))
+    assert model.n_documents == len(titles)
+    assert model.fold_in_degrees(degree) == 0
+
+    more = synthetic_tables['degree'].head(3500)
+    assert model.fold_in_degrees(more) == len(titled_degrees(more)[0]) - len(degree_ids)
+
+    # fit(texts) alone has seen no degrees; with degree_ids, those
+    model = OnlineTopicModel(n_components=3, batch_size=512).fit(titles)
+    assert len(model.degree_ids) == 0
+    model.fit(titles, degree_ids=degree_ids)
+    assert np.array_equal(model.degree_ids, np.unique(degree_ids))
@@ -0,0 +1,23 @@
+"""
+what_msc_are_you: importing it for the classifier does not import the
+similar-theses search.
+"""
+import os
+import shutil
+import subprocess
+import sys
+
+from conftest import repo
+
+
+def test_search_is_imported_on_first_use(tmp_path):
+    # the module reads ../MSC/msc_2010.pickle when imported
+    os.makedirs(tmp_path / "MSC")
+    shutil.copy(os.path.join(repo, "msc_2010.pickle"), tmp_path / "MSC")
+    os.makedirs(tmp_path / "work")
+    code = "import sys, what_msc_are_you; print('msc_search' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path / "work",
+                            env=dict(os.environ, PYTHONPATH=repo),
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "False"
@@ -13,6 +13,7 @@ Created: Mon Jul 29 11:39:46 2019
 # -------------------------
 import pickle
 from IPython.core.display import display, HTML
+from msc_service import get_classifier
 # -------------------------
 #   END  IMPORT STATEMENTS
 # -------------------------
@@ -23,9 +24,9 @@ from IPython.core.display import display, HTML
 # ------------------------
 with open("../MSC/msc_2010.pickle", "rb") as f:
     msc_names_2010 = pickle.load(f)
-with open('../count_rf_20190729.pickle', 'rb') as f:
-    pipe = pickle.load(f)
-pipe.verbose = False
+# the classifier pipeline ('../count_rf_20190729.pickle') is loaded on 
+# first use, once per process, by msc_service; pipe is still available 
+# as what_msc_are_you.pipe, through __getattr__ below.
 # ------------------------
 #   END  GLOBAL VARIABLES 
 # ------------------------
@@ -40,14 +41,21 @@ def msc_code_to_name(code):
     
 def msc_classify_string(text):
     assert type(text) is str, "msc_classify_string: string input only"
-    pipe.verbose = False  # this doesn't seem to be working
-    code = pipe.predict([text])[0]
+    code = get_classifier().classify(text)
     code_str = '0'+str(code) if code < 10 else str(code)
     msc_name = msc_code_to_name(code)
     link = f"<a href=\"http://msc2010.org/mediawiki/index.php?title={code_str}-XX\""
     link = f"{link} target=\"_blank\">{msc_name}</a>"
     return f"MSC 2010: {code}: {link}"
 
+def msc_similar_theses(text, k=5):
+    assert type(text) is str, "msc_similar_theses: string input only"
+    from msc_search import similar_theses  # loads the index's modules only when used
+    similar = similar_theses(text, k)
+    similar['msc_name'] = [msc_code_to_name(code) if code >= 0 else "no classification given"
+                           for code in similar['msc']]
+    return similar
+
 def msc_classify_presentation():
     request = "Input a line of text, and we will classify it for you under the"
     request = request + " Mathematics Subject Classification (MSC) 2010!\n"
@@ -60,6 +68,11 @@ def msc_classify_presentation():
         print("\nYour text classifies mathematically as:")
         display(HTML(msc_classify_string(some_string)))
         print("\nWhy not try again?\n")
+
+def __getattr__(name):
+    if name == 'pipe':
+        return get_classifier().pipe
+    raise AttributeError(f"module {__name__} has no attribute {name}")
 # ----------------------------
 #   END  FUNCTION DEFINITIONS 
 # ----------------------------